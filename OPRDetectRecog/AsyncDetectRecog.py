@@ -0,0 +1,180 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from concurrent.futures import Executor, ThreadPoolExecutor
+import asyncio
+
+
+
+class AsyncDetector:
+    """
+    asyncio front-end for a Detector, running detection on an executor so the event loop is never blocked.
+
+    Parameters
+    ----------
+    detector : Detector
+        An initialized detector.
+    executor : Executor | None, optional
+        Where detection runs, by default a single thread since most engines are not thread-safe.
+    """
+
+    def __init__(self, detector: Detector, executor: Executor = None):
+        self._detector = detector
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="OPRDetectRecog-detect")
+
+    async def adetect(self, frame) -> QuadBoxArray:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._detector.detect, frame)
+
+    async def adetect_and_crop(self, frame) -> list[CroppedBox]:
+        """
+        Detects and crops a frame. The crops are detached before they are handed out, since concurrent requests
+        keep them around while the detector crops later frames into the same reusable arenas.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.detect_and_detach, frame)
+
+    def detect_and_detach(self, frame) -> list[CroppedBox]:
+        # detached on the same executor call, before the detector can crop another frame over them
+        return [crop.detach() for crop in self._detector.detect_and_crop(frame)]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    @property
+    def Detector(self) -> Detector:
+        return self._detector
+
+
+
+class AsyncRecognizer:
+    """
+    asyncio front-end for a Recognizer that coalesces crops from concurrent requests into micro-batches.
+
+    Every arecognize call parks its crop in a pending list. The list is flushed through recognize_batch on the
+    executor as soon as it holds max_batch_size crops, or max_wait seconds after the first crop arrived, whichever
+    comes first. Under many small concurrent requests the model sees full batches, while a lone request waits at
+    most max_wait before it is sent on its own.
+
+    Parameters
+    ----------
+    recognizer : Recognizer
+        An initialized recognizer.
+    max_batch_size : int | None, optional
+        The most crops per flush, by default the recognizer's MaxBatchSize.
+    max_wait : float, optional
+        The longest a crop waits for company before being flushed, in seconds, by default 0.005.
+    executor : Executor | None, optional
+        Where recognition runs, by default a single thread since most engines are not thread-safe.
+
+    Properties
+    ----------
+    Batches : int
+        The number of batches flushed so far.
+    Items : int
+        The number of crops recognized so far.
+    MeanBatchSize : float
+        Items / Batches.
+    """
+
+    def __init__(self, recognizer: Recognizer, max_batch_size: int = None, max_wait: float = 0.005, executor: Executor = None):
+        self._recognizer = recognizer
+        self._max_batch_size = max_batch_size or recognizer.MaxBatchSize
+        self._max_wait = max_wait
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="OPRDetectRecog-recognize")
+
+        self._pending = []
+        self._timer = None
+        self._batches = 0
+        self._items = 0
+
+    async def arecognize(self, frame, bbox: QuadBox) -> list[LinguistResult]:
+        """
+        Recognizes one crop, sharing a batch with whatever other crops arrive within max_wait.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((frame, bbox, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self.flush)
+
+        return await future
+
+    async def arecognize_batch(self, frames: list, bboxes: list[QuadBox]) -> list[list[LinguistResult]]:
+        self._recognizer.validate_batch(frames, bboxes)
+        return list(await asyncio.gather(*(self.arecognize(frame, bbox) for frame, bbox in zip(frames, bboxes))))
+
+    async def arecognize_crops(self, crops: list[CroppedBox]) -> list[LinguistResult]:
+        """
+        Recognizes every crop of a frame from Detector.detect_and_crop, flattening the results.
+        """
+        frames = [crop.get(self._recognizer.InputFormat) for crop in crops]
+        results = await self.arecognize_batch(frames, [crop.QuadBox for crop in crops])
+        return [result for result_list in results for result in result_list]
+
+    def flush(self) -> None:
+        """
+        Sends up to max_batch_size pending crops to the executor. Must be called from the event loop.
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self._max_batch_size]
+        self._pending = self._pending[self._max_batch_size:]
+
+        # drop requests that were cancelled while waiting
+        batch = [item for item in batch if not item[2].cancelled()]
+
+        loop = asyncio.get_running_loop()
+        if self._pending:
+            self._timer = loop.call_later(self._max_wait, self.flush)
+
+        if not batch:
+            return
+
+        self._batches += 1
+        self._items += len(batch)
+
+        frames = [frame for frame, _, _ in batch]
+        bboxes = [bbox for _, bbox, _ in batch]
+        task = loop.run_in_executor(self._executor, self._recognizer.recognize_batch, frames, bboxes)
+        task.add_done_callback(lambda done: self.resolve(batch, done))
+
+    @staticmethod
+    def resolve(batch: list, done: asyncio.Future) -> None:
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+
+        for index, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[index])
+
+    async def aclose(self) -> None:
+        while self._pending:
+            self.flush()
+        self._executor.shutdown(wait=False)
+
+    @property
+    def Recognizer(self) -> Recognizer:
+        return self._recognizer
+
+    @property
+    def Batches(self) -> int:
+        return self._batches
+
+    @property
+    def Items(self) -> int:
+        return self._items
+
+    @property
+    def MeanBatchSize(self) -> float:
+        return self._items / self._batches if self._batches else 0.0
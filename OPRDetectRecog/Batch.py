@@ -0,0 +1,225 @@
+"""
+Non-interactive batch OCR over files, folders and archives.
+
+    python -m OPRDetectRecog.Batch "scans/**/*.png" chapter_01.cbz --detector paddleocr_detector
+        --recognizer mangaocr_recognizer --language japanese --workers 4 --output results.jsonl
+
+Every worker process loads and initializes its own detector and recognizer once. One JSON line is written per
+page, and re-running the same command skips inputs whose pages are all in the output already. On a CPU-only host,
+--threads 1 with one worker per core keeps the workers from fighting over cores.
+"""
+
+from OPRDetectRecog.Pipeline import _WORKER_PLUGINS, _init_worker, recognize_crops
+from OPRDetectRecog.Sources import ARCHIVE_EXTENSIONS, IMAGE_EXTENSIONS, natural_key, open_source
+from OPRDetectRecog.Custom.ExecutionConfig import DEVICES, ExecutionConfig
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from OperaPowerRelay import opr
+import argparse
+import glob
+import json
+import time
+import os
+
+
+def expand_inputs(patterns: list[str], recursive: bool = False) -> list[str]:
+    """
+    Resolves globs and folders into the list of image files and archives to process, without duplicates, in natural
+    order within each pattern.
+    """
+
+    inputs, seen = [], set()
+    extensions = IMAGE_EXTENSIONS + ARCHIVE_EXTENSIONS
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                matches = [os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names]
+            else:
+                matches = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+
+        for path in sorted(matches, key=natural_key):
+            path = os.path.abspath(path)
+            if path.lower().endswith(extensions) and os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                inputs.append(path)
+
+    return inputs
+
+
+def completed_inputs(output: str) -> set[str]:
+    """
+    The inputs whose every page is already in output. Lines cut off by a crash and failed inputs don't count, so
+    they are processed again.
+    """
+
+    if not os.path.exists(output):
+        return set()
+
+    written, expected = {}, {}
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" in record:
+                continue
+            written[record["source"]] = written.get(record["source"], 0) + 1
+            expected[record["source"]] = record["pages"]
+
+    return {source for source, count in written.items() if count >= expected[source]}
+
+
+def _process_input(path: str, mode: str) -> list[dict]:
+    detector, recognizer = _WORKER_PLUGINS["detector"], _WORKER_PLUGINS["recognizer"]
+    records = []
+
+    try:
+        for page in open_source(path, mode):
+            start = time.perf_counter()
+            results = recognize_crops(recognizer, detector.detect_and_crop(page.Image))
+
+            records.append({
+                "source": path,
+                "name": page.Name,
+                "page": len(records),
+                "width": page.Image.width,
+                "height": page.Image.height,
+                "seconds": time.perf_counter() - start,
+                "results": [result.to_dict() for result in results],
+            })
+    except Exception as e:
+        return [{"source": path, "error": f"{type(e).__name__}: {e}"}]
+
+    for record in records:
+        record["pages"] = len(records)
+    return records
+
+
+def run_batch(inputs: list[str],
+        output: str,
+        detector_name: str,
+        recognizer_name: str,
+        language: str = None,
+        workers: int = 1,
+        mode: str = None,
+        resume: bool = True,
+        execution: ExecutionConfig = None) -> dict:
+    """
+    Processes inputs on a pool of worker processes and appends one JSON line per page to output.
+
+    Parameters
+    ----------
+    inputs : list[str]
+        Image files and archives, see expand_inputs.
+    output : str
+        The JSONL file to append to.
+    detector_name, recognizer_name : str
+        Plugin names, as listed by the registries.
+    language : str, optional
+        Passed to both plugins' initialize, by default None.
+    workers : int, optional
+        Number of worker processes, each holding its own models, by default 1.
+    mode : str, optional
+        The PIL mode pages are converted to, by default None which keeps L, RGB and RGBA pages as they are.
+    resume : bool, optional
+        Whether to skip inputs already complete in output, by default True.
+    execution : ExecutionConfig, optional
+        The device and threads every worker's plugins run with, by default None for the plugins' default.
+
+    Returns
+    -------
+    dict
+        Counts and throughput of the run.
+    """
+
+    done = completed_inputs(output) if resume else set()
+    pending = [path for path in inputs if path not in done]
+
+    stats = {"inputs": len(inputs), "skipped": len(inputs) - len(pending), "processed": 0, "failed": 0,
+             "pages": 0, "boxes": 0, "seconds": 0.0}
+
+    if not pending:
+        return stats
+
+    init_kwargs = {"detector": {"execution": execution}, "recognizer": {"execution": execution}} if execution else {}
+
+    start = time.perf_counter()
+    in_flight = set()
+    queued = iter(pending)
+
+    with open(output, "a", encoding="utf-8") as f, \
+         ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(detector_name, recognizer_name, language, init_kwargs)) as pool:
+
+        def submit_next() -> None:
+            path = next(queued, None)
+            if path is not None:
+                in_flight.add(pool.submit(_process_input, path, mode))
+
+        # two inputs per worker keeps everyone busy without decoding the whole job up front
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                in_flight.discard(future)
+                records = future.result()
+
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+
+                if not records:
+                    stats["processed"] += 1
+                elif "error" in records[0]:
+                    stats["failed"] += 1
+                    opr.print_from("OPR DetectRecog Batch", f"Failed {records[0]['source']}: {records[0]['error']}")
+                else:
+                    stats["processed"] += 1
+                    stats["pages"] += len(records)
+                    stats["boxes"] += sum(len(record["results"]) for record in records)
+
+                submit_next()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run OPR DetectRecog over many images and write the results as JSON lines")
+    parser.add_argument("inputs", nargs="+", help="image files, folders, zip/cbz archives or glob patterns")
+    parser.add_argument("--detector", default="paddleocr_detector")
+    parser.add_argument("--recognizer", default="mangaocr_recognizer")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each loads its own models")
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--recursive", action="store_true", help="also look inside subfolders of folder inputs")
+    parser.add_argument("--mode", default=None, help="PIL mode pages are converted to, by default their own")
+    parser.add_argument("--no-resume", action="store_true", help="process every input even if it is already in the output")
+    parser.add_argument("--device", default=None, choices=DEVICES, help="where the models run, falling back to the CPU")
+    parser.add_argument("--threads", type=int, default=None, help="threads each worker's models may use")
+    args = parser.parse_args(argv)
+
+    inputs = expand_inputs(args.inputs, args.recursive)
+    if not inputs:
+        opr.print_from("OPR DetectRecog Batch", "No images found!")
+        return
+
+    execution = ExecutionConfig(args.device, args.threads) if args.device or args.threads else None
+    stats = run_batch(inputs, args.output, args.detector, args.recognizer, args.language, args.workers, args.mode, not args.no_resume, execution)
+
+    seconds = stats["seconds"]
+    opr.print_from("OPR DetectRecog Batch",
+                   f"{stats['processed']} processed, {stats['skipped']} skipped, {stats['failed']} failed of {stats['inputs']} inputs")
+    if seconds:
+        opr.print_from("OPR DetectRecog Batch",
+                       f"{stats['pages']} pages and {stats['boxes']} boxes in {seconds:.1f}s, "
+                       f"{stats['pages'] / seconds:.2f} pages/s, {stats['boxes'] / seconds:.1f} boxes/s with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.BoxIndex import pairwise_iou
+from OPRDetectRecog.Custom.PixelDiff import grayscale, local_change
+import numpy
+
+
+def greedy_assignment(cost: numpy.ndarray, valid: numpy.ndarray) -> list[tuple[int, int]]:
+    """
+    Matches rows to columns cheapest pair first, each row and column at most once, only over valid pairs.
+    """
+
+    rows, columns = numpy.nonzero(valid)
+    order = numpy.argsort(cost[rows, columns], kind="stable")
+
+    used_rows, used_columns, pairs = set(), set(), []
+    for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+        if row in used_rows or column in used_columns:
+            continue
+        used_rows.add(row)
+        used_columns.add(column)
+        pairs.append((row, column))
+
+    return pairs
+
+
+
+class Track:
+    """
+    A piece of text followed across frames.
+
+    Properties
+    ----------
+    TrackId : int
+        Stable for as long as the text stays matched.
+    QuadBox : QuadBox
+        Where the text is in the latest frame.
+    Results : list[LinguistResult]
+        The recognized text, bound to the latest QuadBox.
+    Reused : bool
+        Whether the latest Results came from a previous frame instead of the recognizer.
+    """
+
+    __slots__ = ("_id", "_box", "_results", "_pixels", "_missed", "_reused")
+
+    def __init__(self, track_id: int, box: QuadBox, results: list[LinguistResult], pixels: numpy.ndarray):
+        self._id = track_id
+        self._box = box
+        self._results = results
+        self._pixels = pixels
+        self._missed = 0
+        self._reused = False
+
+    @property
+    def TrackId(self) -> int:
+        return self._id
+
+    @property
+    def QuadBox(self) -> QuadBox:
+        return self._box
+
+    @property
+    def Results(self) -> list[LinguistResult]:
+        return self._results
+
+    @property
+    def Reused(self) -> bool:
+        return self._reused
+
+    def __repr__(self) -> str:
+        return f"Track {self._id}: {[r.Original for r in self._results]}"
+
+
+
+class BoxTracker:
+    """
+    Follows text boxes across frames so that text which stayed put and didn't change is not recognized again.
+
+    Every frame's boxes are matched to the previous frame's tracks on a cost matrix built from IoU and centre
+    distance (relative to box height) in one vectorized pass. For a matched box the crop is compared with the
+    track's previous crop one character-sized window at a time, so a single changed digit in a long HUD line still
+    counts as changed (see PixelDiff.local_change); when they match, the previous results are re-bound to the new
+    QuadBox and the track keeps its id. New and changed boxes are recognized together in a single recognize_batch
+    call.
+
+    Parameters
+    ----------
+    recognizer : Recognizer
+        The initialized recognizer used for new and changed text.
+    iou_threshold : float, optional
+        Minimum IoU for a box to match a track, unless it is within max_center_distance, by default 0.3.
+    max_center_distance : float, optional
+        Maximum centre distance, in box heights, for a box to match a track, by default 0.5.
+    pixel_threshold : int, optional
+        How much a grayscale pixel must change to count as changed, by default 48.
+    changed_fraction : float, optional
+        The fraction of changed pixels in any character-sized window above which a matched crop is recognized
+        again, by default 0.03.
+    max_missed : int, optional
+        How many frames a track survives without being matched, by default 2.
+
+    Properties
+    ----------
+    Recognized, Reused : int
+        How many crops were sent to the recognizer and how many reused their track's results, in total.
+    """
+
+    def __init__(self,
+            recognizer: Recognizer,
+            iou_threshold: float = 0.3,
+            max_center_distance: float = 0.5,
+            pixel_threshold: int = 48,
+            changed_fraction: float = 0.03,
+            max_missed: int = 2):
+
+        self._recognizer = recognizer
+        self._iou_threshold = iou_threshold
+        self._max_center_distance = max_center_distance
+        self._pixel_threshold = pixel_threshold
+        self._changed_fraction = changed_fraction
+        self._max_missed = max_missed
+
+        self._tracks = []
+        self._next_id = 0
+        self._recognized = 0
+        self._reused = 0
+
+    @staticmethod
+    def grayscale(pixels: numpy.ndarray) -> numpy.ndarray:
+        return grayscale(pixels)
+
+    def unchanged(self, track: Track, pixels: numpy.ndarray) -> bool:
+        # empty crops are handled before any conversion, two empty crops count as the same
+        return local_change(track._pixels, pixels, self._pixel_threshold) <= self._changed_fraction
+
+    def match(self, boxes: QuadBoxArray) -> list[tuple[int, int]]:
+        """
+        Pairs (track index, box index) for this frame's boxes.
+        """
+
+        if not self._tracks or len(boxes) == 0:
+            return []
+
+        previous = QuadBoxArray.from_boxes([track._box for track in self._tracks])
+
+        iou = pairwise_iou(previous.Bounds, boxes.Bounds)
+        distance = numpy.linalg.norm(previous.CentersStrict[:, None, :] - boxes.CentersStrict[None, :, :], axis=2)
+        scale = numpy.maximum(numpy.maximum(previous.Heights[:, None], boxes.Heights[None, :]), 1.0)
+        relative = distance / scale
+
+        valid = (iou >= self._iou_threshold) | (relative <= self._max_center_distance)
+        cost = (1.0 - iou) + relative
+
+        return greedy_assignment(cost, valid)
+
+    def update(self, crops: list[CroppedBox]) -> list[Track]:
+        """
+        Processes one frame's crops, from Detector.detect_and_crop.
+
+        Parameters
+        ----------
+        crops : list[CroppedBox]
+            Every crop of the frame.
+
+        Returns
+        -------
+        list[Track]
+            One Track per crop, in the same order, with its text either reused or freshly recognized.
+        """
+
+        boxes = QuadBoxArray.from_boxes([crop.QuadBox for crop in crops])
+        pixels = [self.grayscale(crop.Array) for crop in crops]
+
+        matched = {box: track for track, box in self.match(boxes)}
+        current = [None] * len(crops)
+        pending = []
+
+        for index, crop in enumerate(crops):
+            track_index = matched.get(index)
+            if track_index is not None:
+                track = self._tracks[track_index]
+                if self.unchanged(track, pixels[index]):
+                    track._box = crop.QuadBox
+                    track._results = [LinguistResult(crop.QuadBox, r.Original, r.Translated, r.Confidence) for r in track._results]
+                    track._missed = 0
+                    track._reused = True
+                    current[index] = track
+                    continue
+
+            pending.append((index, track_index))
+
+        if pending:
+            frames = [crops[index].get(self._recognizer.InputFormat) for index, _ in pending]
+            bboxes = [crops[index].QuadBox for index, _ in pending]
+            recognized = self._recognizer.recognize_batch(frames, bboxes)
+
+            for (index, track_index), results in zip(pending, recognized):
+                if track_index is not None:
+                    # same place, different text: keep the id, replace the content
+                    track = self._tracks[track_index]
+                    track._box, track._results, track._pixels = crops[index].QuadBox, results, pixels[index]
+                    track._missed = 0
+                else:
+                    track = Track(self._next_id, crops[index].QuadBox, results, pixels[index])
+                    self._next_id += 1
+                track._reused = False
+                current[index] = track
+
+        self._recognized += len(pending)
+        self._reused += len(crops) - len(pending)
+
+        seen = {id(track) for track in current}
+        survivors = []
+        for track in self._tracks:
+            if id(track) not in seen:
+                track._missed += 1
+                if track._missed > self._max_missed:
+                    continue
+            survivors.append(track)
+
+        known = {id(track) for track in self._tracks}
+        survivors.extend(track for track in current if id(track) not in known)
+        self._tracks = survivors
+
+        return current
+
+    def reset(self) -> None:
+        self._tracks = []
+
+    @property
+    def Tracks(self) -> list[Track]:
+        return list(self._tracks)
+
+    @property
+    def Recognized(self) -> int:
+        return self._recognized
+
+    @property
+    def Reused(self) -> int:
+        return self._reused
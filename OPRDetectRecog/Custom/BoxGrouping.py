@@ -0,0 +1,249 @@
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.BoxIndex import BoxIndex, is_vertical, reading_order
+from OperaPowerRelay import opr
+import numpy
+
+
+class BoxGroups:
+    """
+    The result of grouping: merged boxes plus, for every merged box, which source boxes it was built from.
+
+    Properties
+    ----------
+    Boxes : QuadBoxArray
+        The merged boxes, in reading order.
+    Sources : QuadBoxArray
+        The boxes that were grouped, as given.
+    Members : list[numpy.ndarray]
+        For every merged box, the indices into Sources of the boxes it contains, in reading order.
+    GroupOf : numpy.ndarray
+        For every source box, the index of the merged box it ended up in.
+    """
+
+    __slots__ = ("_boxes", "_sources", "_members", "_group_of")
+
+    def __init__(self, boxes: QuadBoxArray, sources: QuadBoxArray, members: list[numpy.ndarray], group_of: numpy.ndarray):
+        self._boxes = boxes
+        self._sources = sources
+        self._members = members
+        self._group_of = group_of
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def members_of(self, index: int) -> QuadBoxArray:
+        return self._sources[self._members[index]]
+
+    @property
+    def Boxes(self) -> QuadBoxArray:
+        return self._boxes
+
+    @property
+    def Sources(self) -> QuadBoxArray:
+        return self._sources
+
+    @property
+    def Members(self) -> list[numpy.ndarray]:
+        return self._members
+
+    @property
+    def GroupOf(self) -> numpy.ndarray:
+        return self._group_of
+
+    def __repr__(self) -> str:
+        return f"BoxGroups: {len(self._sources)} boxes in {len(self)} groups"
+
+
+def connected_components(count: int, i: numpy.ndarray, j: numpy.ndarray) -> numpy.ndarray:
+    """
+    Labels the connected components of a graph given as edge arrays, each box labelled with its component's
+    smallest index. Labels are propagated along all edges at once with pointer jumping.
+    """
+
+    labels = numpy.arange(count)
+    if not len(i):
+        return labels
+
+    while True:
+        low = numpy.minimum(labels[i], labels[j])
+        updated = labels.copy()
+        numpy.minimum.at(updated, i, low)
+        numpy.minimum.at(updated, j, low)
+        updated = updated[updated]
+
+        if numpy.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def projections(points: numpy.ndarray, theta: numpy.ndarray, vertical: bool) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Projects every box's corners (Nx4x2) onto its reading axis and the axis across it, rotated by theta (radians,
+    one per box). Returns two Nx2 arrays of (min, max): along the text and across it.
+    """
+
+    cos, sin = numpy.cos(theta)[:, None], numpy.sin(theta)[:, None]
+    x = points[:, :, 0] * cos + points[:, :, 1] * sin
+    y = -points[:, :, 0] * sin + points[:, :, 1] * cos
+
+    along, across = (y, x) if vertical else (x, y)
+    return numpy.stack([along.min(axis=1), along.max(axis=1)], axis=1), numpy.stack([across.min(axis=1), across.max(axis=1)], axis=1)
+
+
+def link(boxes: QuadBoxArray, vertical: bool, max_angle: float, max_height_ratio: float, search: float,
+         accept) -> numpy.ndarray:
+    """
+    Finds the pairs of boxes accept() agrees belong together and returns the resulting component labels.
+
+    Candidates come from a BoxIndex over bounds grown by search times each box's thickness. For each candidate
+    pair both boxes are projected in the first box's rotated frame, and accept(along_i, along_j, across_i,
+    across_j, thickness) decides.
+    """
+
+    count = len(boxes)
+    if count < 2:
+        return numpy.arange(count)
+
+    bounds = boxes.Bounds
+    thickness = boxes.Widths if vertical else boxes.Heights
+    grow = (search * thickness)[:, None] * numpy.array([-1, -1, 1, 1], dtype=numpy.float32)
+
+    i, j = BoxIndex(boxes, bounds=bounds + grow).candidate_pairs()
+
+    angles = boxes.Angles
+    difference = numpy.abs((angles[i] - angles[j] + 180) % 360 - 180)
+    ratio = numpy.maximum(thickness[i], thickness[j]) / numpy.maximum(numpy.minimum(thickness[i], thickness[j]), 1e-6)
+    keep = (difference <= max_angle) & (ratio <= max_height_ratio)
+    i, j = i[keep], j[keep]
+
+    if not len(i):
+        return numpy.arange(count)
+
+    theta = numpy.radians(angles[i].astype(numpy.float64))
+    along_i, across_i = projections(boxes.Points[i], theta, vertical)
+    along_j, across_j = projections(boxes.Points[j], theta, vertical)
+    size = numpy.minimum(across_i[:, 1] - across_i[:, 0], across_j[:, 1] - across_j[:, 0])
+
+    keep = accept(along_i, along_j, across_i, across_j, numpy.maximum(size, 1e-6))
+    return connected_components(count, i[keep], j[keep])
+
+
+def overlap(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    return numpy.minimum(a[:, 1], b[:, 1]) - numpy.maximum(a[:, 0], b[:, 0])
+
+
+def merge(boxes: QuadBoxArray, labels: numpy.ndarray, vertical: bool) -> tuple[QuadBoxArray, list[numpy.ndarray]]:
+    """
+    Builds one box per label: the rectangle, rotated by the members' mean angle, that encloses every member.
+    """
+
+    groups, inverse = numpy.unique(labels, return_inverse=True)
+
+    # mean angle through unit vectors, so -179 and 179 average to 180 rather than 0
+    radians = numpy.radians(boxes.Angles.astype(numpy.float64))
+    mean = numpy.arctan2(numpy.bincount(inverse, numpy.sin(radians)), numpy.bincount(inverse, numpy.cos(radians)))
+    theta = mean[inverse]
+
+    points = boxes.Points.astype(numpy.float64)
+    cos, sin = numpy.cos(theta)[:, None], numpy.sin(theta)[:, None]
+    x = points[:, :, 0] * cos + points[:, :, 1] * sin
+    y = -points[:, :, 0] * sin + points[:, :, 1] * cos
+
+    order = numpy.argsort(inverse, kind="stable")
+    starts = numpy.searchsorted(inverse[order], numpy.arange(len(groups)))
+
+    x0 = numpy.minimum.reduceat(x.min(axis=1)[order], starts)
+    x1 = numpy.maximum.reduceat(x.max(axis=1)[order], starts)
+    y0 = numpy.minimum.reduceat(y.min(axis=1)[order], starts)
+    y1 = numpy.maximum.reduceat(y.max(axis=1)[order], starts)
+
+    # corners in the rotated frame, top-left first, then rotated back
+    rx = numpy.stack([x0, x1, x1, x0], axis=1)
+    ry = numpy.stack([y0, y0, y1, y1], axis=1)
+    cos, sin = numpy.cos(mean)[:, None], numpy.sin(mean)[:, None]
+    corners = numpy.stack([rx * cos - ry * sin, rx * sin + ry * cos], axis=2).astype(numpy.float32)
+
+    merged = QuadBoxArray(corners, numpy.degrees(mean), padding=0)
+
+    # members follow the text: along x for lines, along y (top to bottom) for columns
+    along = (y if vertical else x).min(axis=1)
+    by_member = numpy.lexsort((along, inverse))
+    members = numpy.split(by_member, starts[1:])
+
+    return merged, members
+
+
+def group_boxes(boxes: QuadBoxArray,
+                mode: str = "line",
+                direction: str = "auto",
+                max_angle: float = 10.0,
+                max_height_ratio: float = 2.0,
+                min_overlap: float = 0.5,
+                max_gap: float = 1.0,
+                max_line_spacing: float = 0.8) -> BoxGroups:
+    """
+    Clusters fragmented detections into lines, or lines into blocks, so each is cropped and recognized once.
+
+    Two boxes join the same line when their angles are within max_angle, their thicknesses (height, or width
+    for vertical text) within max_height_ratio of each other, they overlap by at least min_overlap of the thinner
+    one across the reading direction (i.e. they share a baseline), and the gap between them along it is at most
+    max_gap times that thickness. In "block" mode the resulting lines are then merged with neighbouring lines that
+    overlap them along the reading direction and sit at most max_line_spacing line thicknesses apart, as in a
+    paragraph or speech bubble.
+
+    Parameters
+    ----------
+    boxes : QuadBoxArray
+        The boxes to group, typically Detector.detect output.
+    mode : str, optional
+        "line" or "block", by default "line".
+    direction : str, optional
+        "horizontal", "vertical" or "auto", as in reading_order, by default "auto".
+    max_angle, max_height_ratio, min_overlap, max_gap, max_line_spacing : float, optional
+        The thresholds described above.
+
+    Returns
+    -------
+    BoxGroups
+        The merged boxes in reading order and, for each, the indices of the source boxes it contains.
+    """
+
+    if mode not in ("line", "block"):
+        opr.error_pretty(ValueError, "OpheliaVisorR | group_boxes", f"Invalid mode! {mode}", "HUMAN ERROR")
+        raise ValueError("mode must be line or block")
+
+    count = len(boxes)
+    if count == 0:
+        return BoxGroups(boxes, boxes, [], numpy.empty(0, dtype=numpy.int64))
+
+    vertical = is_vertical(boxes) if direction == "auto" else direction == "vertical"
+
+    def same_line(along_i, along_j, across_i, across_j, size):
+        return (overlap(across_i, across_j) >= min_overlap * size) & (-overlap(along_i, along_j) <= max_gap * size)
+
+    labels = link(boxes, vertical, max_angle, max_height_ratio, max_gap, same_line)
+    lines, line_members = merge(boxes, labels, vertical)
+
+    if mode == "block" and len(lines) > 1:
+
+        def same_block(along_i, along_j, across_i, across_j, size):
+            return (overlap(along_i, along_j) > 0) & (-overlap(across_i, across_j) <= max_line_spacing * size)
+
+        block_labels = link(lines, vertical, max_angle, max_height_ratio, max_line_spacing, same_block)
+        merged, block_lines = merge(lines, block_labels, vertical)
+
+        # blocks read line by line: lines across the reading direction, top to bottom or right to left
+        across = lines.Bounds[:, 1] if not vertical else -lines.Bounds[:, 2]
+        members = [numpy.concatenate([line_members[line] for line in block[numpy.argsort(across[block], kind="stable")]]) for block in block_lines]
+    else:
+        merged, members = lines, line_members
+
+    order = reading_order(merged, "vertical" if vertical else "horizontal")
+    merged = merged[order]
+    members = [members[index] for index in order.tolist()]
+
+    group_of = numpy.empty(count, dtype=numpy.int64)
+    for index, sources in enumerate(members):
+        group_of[sources] = index
+
+    return BoxGroups(merged, boxes, members, group_of)
@@ -0,0 +1,316 @@
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OperaPowerRelay import opr
+import numpy
+
+
+def pairwise_iou(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    """
+    IoU of the axis-aligned rectangles a (Nx4) and b (Mx4), both as x0, y0, x1, y1, as an NxM matrix.
+    """
+
+    x0 = numpy.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = numpy.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = numpy.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = numpy.minimum(a[:, None, 3], b[None, :, 3])
+
+    intersection = numpy.clip(x1 - x0, 0, None) * numpy.clip(y1 - y0, 0, None)
+    union = rect_areas(a)[:, None] + rect_areas(b)[None, :] - intersection
+
+    return numpy.divide(intersection, union, out=numpy.zeros_like(intersection), where=union > 0)
+
+
+def paired_iou(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    """
+    IoU of a[k] with b[k] for every row k of two Nx4 rectangle arrays.
+    """
+
+    w = numpy.clip(numpy.minimum(a[:, 2], b[:, 2]) - numpy.maximum(a[:, 0], b[:, 0]), 0, None)
+    h = numpy.clip(numpy.minimum(a[:, 3], b[:, 3]) - numpy.maximum(a[:, 1], b[:, 1]), 0, None)
+
+    intersection = w * h
+    union = rect_areas(a) + rect_areas(b) - intersection
+
+    return numpy.divide(intersection, union, out=numpy.zeros_like(intersection), where=union > 0)
+
+
+def rect_areas(rects: numpy.ndarray) -> numpy.ndarray:
+    return (rects[:, 2] - rects[:, 0]) * (rects[:, 3] - rects[:, 1])
+
+
+
+class BoxIndex:
+    """
+    A uniform grid over a frame's boxes, so that overlap questions only look at boxes in nearby cells instead of
+    comparing every box with every other one.
+
+    Every box is entered in each cell its bounding rectangle touches. Cells default to twice the median box size,
+    which keeps most boxes in one to four cells and most cells short even on pages with thousands of boxes.
+    Overlap and IoU are computed on the boxes' axis-aligned bounds.
+
+    Parameters
+    ----------
+    boxes : QuadBoxArray
+        The boxes to index, typically Detector.detect output.
+    cell_size : float | None, optional
+        The side of a grid cell in pixels, by default None which derives it from the boxes.
+    bounds : numpy.ndarray | None, optional
+        Nx4 rectangles to index in place of the boxes' own bounds, e.g. bounds grown by a search distance, by
+        default None.
+
+    Properties
+    ----------
+    Boxes : QuadBoxArray
+        The indexed boxes; indices returned by the queries refer to these.
+    Bounds : numpy.ndarray
+        Their Nx4 bounds, x0, y0, x1, y1.
+    CellSize : float
+        The side of a grid cell in pixels.
+    """
+
+    __slots__ = ("_boxes", "_bounds", "_cell", "_keys", "_members", "_starts", "_cells")
+
+    def __init__(self, boxes: QuadBoxArray, cell_size: float | None = None, bounds: numpy.ndarray | None = None):
+        self._boxes = boxes
+
+        if bounds is not None:
+            self._bounds = numpy.asarray(bounds, dtype=numpy.float32).reshape(len(boxes), 4)
+        else:
+            self._bounds = boxes.Bounds if len(boxes) else numpy.empty((0, 4), dtype=numpy.float32)
+
+        if cell_size is None:
+            sizes = numpy.maximum(self._bounds[:, 2] - self._bounds[:, 0], self._bounds[:, 3] - self._bounds[:, 1])
+            cell_size = 2.0 * float(numpy.median(sizes)) if len(sizes) else 1.0
+
+        if cell_size <= 0:
+            opr.error_pretty(ValueError, "OpheliaVisorR | BoxIndex", f"Invalid cell size! {cell_size}", "HUMAN ERROR")
+            raise ValueError("cell_size must be positive")
+
+        self._cell = cell_size
+        self.build()
+
+    def cell_ranges(self, rects: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        cells = numpy.floor(rects / self._cell).astype(numpy.int64)
+        return cells[:, 0], cells[:, 1], cells[:, 2], cells[:, 3]
+
+    def build(self) -> None:
+        count = len(self._bounds)
+        cx0, cy0, cx1, cy1 = self.cell_ranges(self._bounds)
+        nx, ny = cx1 - cx0 + 1, cy1 - cy0 + 1
+        per_box = nx * ny
+
+        # one (box, cell) entry for every cell a box touches, without a Python loop over boxes
+        members = numpy.repeat(numpy.arange(count), per_box)
+        offsets = numpy.arange(per_box.sum()) - numpy.repeat(numpy.cumsum(per_box) - per_box, per_box)
+        columns = numpy.repeat(cx0, per_box) + offsets % numpy.repeat(nx, per_box)
+        rows = numpy.repeat(cy0, per_box) + offsets // numpy.repeat(nx, per_box)
+
+        keys = self.cell_key(columns, rows)
+        order = numpy.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._members = members[order]
+
+        cells, starts = numpy.unique(self._keys, return_index=True)
+        self._cells = cells
+        self._starts = numpy.append(starts, len(self._keys))
+
+    @staticmethod
+    def cell_key(columns: numpy.ndarray, rows: numpy.ndarray) -> numpy.ndarray:
+        return (rows.astype(numpy.int64) << 32) + (columns.astype(numpy.int64) & 0xFFFFFFFF)
+
+    def query(self, rect: tuple[float, float, float, float]) -> numpy.ndarray:
+        """
+        The indices of every box whose bounds overlap rect (x0, y0, x1, y1), sorted.
+        """
+
+        if not len(self._bounds):
+            return numpy.empty(0, dtype=numpy.int64)
+
+        rect = numpy.asarray(rect, dtype=numpy.float32).reshape(1, 4)
+        cx0, cy0, cx1, cy1 = (int(v[0]) for v in self.cell_ranges(rect))
+
+        columns, rows = numpy.meshgrid(numpy.arange(cx0, cx1 + 1), numpy.arange(cy0, cy1 + 1))
+        wanted = self.cell_key(columns.ravel(), rows.ravel())
+
+        positions = numpy.searchsorted(self._cells, wanted)
+        inside = positions < len(self._cells)
+        positions = positions[inside][self._cells[positions[inside]] == wanted[inside]]
+
+        if not len(positions):
+            return numpy.empty(0, dtype=numpy.int64)
+
+        candidates = numpy.unique(numpy.concatenate([self._members[self._starts[p]:self._starts[p + 1]] for p in positions.tolist()]))
+
+        bounds = self._bounds[candidates]
+        hit = (bounds[:, 0] < rect[0, 2]) & (bounds[:, 2] > rect[0, 0]) & (bounds[:, 1] < rect[0, 3]) & (bounds[:, 3] > rect[0, 1])
+        return candidates[hit]
+
+    def candidate_pairs(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Every pair (i, j), i < j, of boxes that share at least one cell, as two index arrays. Pairs of boxes that
+        don't share a cell can't overlap.
+        """
+
+        keys, members = self._keys, self._members
+        if len(keys) < 2:
+            empty = numpy.empty(0, dtype=numpy.int64)
+            return empty, empty
+
+        largest = int(numpy.diff(self._starts).max())
+        first, second = [], []
+
+        # entries of a cell are contiguous, so entry k pairs with entry k + step of the same cell
+        for step in range(1, largest):
+            same = keys[:-step] == keys[step:]
+            first.append(members[:-step][same])
+            second.append(members[step:][same])
+
+        if not first:
+            empty = numpy.empty(0, dtype=numpy.int64)
+            return empty, empty
+
+        i = numpy.concatenate(first)
+        j = numpy.concatenate(second)
+        low, high = numpy.minimum(i, j), numpy.maximum(i, j)
+
+        # boxes spanning several cells meet in each of them
+        unique = numpy.unique(low * len(self._bounds) + high)
+        return unique // len(self._bounds), unique % len(self._bounds)
+
+    def overlapping_pairs(self, min_iou: float = 0.0) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Every pair (i, j), i < j, whose bounds overlap with an IoU above min_iou, with that IoU.
+        """
+
+        i, j = self.candidate_pairs()
+        iou = paired_iou(self._bounds[i], self._bounds[j])
+        keep = iou > min_iou
+
+        return i[keep], j[keep], iou[keep]
+
+    @property
+    def Boxes(self) -> QuadBoxArray:
+        return self._boxes
+
+    @property
+    def Bounds(self) -> numpy.ndarray:
+        return self._bounds
+
+    @property
+    def CellSize(self) -> float:
+        return self._cell
+
+
+def non_max_suppression(boxes: QuadBoxArray, scores: numpy.ndarray | None = None, iou_threshold: float = 0.5, index: BoxIndex | None = None) -> numpy.ndarray:
+    """
+    Drops duplicate detections: whenever two boxes overlap with an IoU above iou_threshold, only the higher scoring
+    one is kept.
+
+    Parameters
+    ----------
+    boxes : QuadBoxArray
+        The boxes to filter.
+    scores : numpy.ndarray | None, optional
+        One score per box, by default None which scores boxes by area so the larger duplicate wins.
+    iou_threshold : float, optional
+        The IoU above which two boxes count as duplicates, by default 0.5.
+    index : BoxIndex | None, optional
+        An index already built over boxes, by default None which builds one.
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the boxes to keep, in their original order. boxes[result] gives the filtered QuadBoxArray.
+    """
+
+    count = len(boxes)
+    if count < 2:
+        return numpy.arange(count)
+
+    index = index or BoxIndex(boxes)
+    scores = boxes.Areas if scores is None else numpy.asarray(scores, dtype=numpy.float32)
+
+    i, j, _ = index.overlapping_pairs(iou_threshold)
+    if not len(i):
+        return numpy.arange(count)
+
+    # adjacency lists in CSR form, so the greedy pass visits every duplicate pair once
+    sources = numpy.concatenate([i, j])
+    targets = numpy.concatenate([j, i])
+    order = numpy.argsort(sources, kind="stable")
+    sources, targets = sources[order], targets[order]
+    starts = numpy.searchsorted(sources, numpy.arange(count + 1))
+
+    suppressed = numpy.zeros(count, dtype=bool)
+    involved = numpy.unique(sources)
+
+    for box in involved[numpy.argsort(-scores[involved], kind="stable")].tolist():
+        if suppressed[box]:
+            continue
+        suppressed[targets[starts[box]:starts[box + 1]]] = True
+
+    return numpy.flatnonzero(~suppressed)
+
+
+def is_vertical(boxes: QuadBoxArray, ratio: float = 1.5) -> bool:
+    """
+    Whether the page reads in vertical columns, i.e. most boxes are clearly taller than they are wide.
+    """
+
+    if not len(boxes):
+        return False
+    return bool(numpy.median(boxes.Heights / numpy.maximum(boxes.Widths, 1e-6)) > ratio)
+
+
+def reading_order(boxes: QuadBoxArray, direction: str = "auto", tolerance: float = 0.5) -> numpy.ndarray:
+    """
+    Sorts boxes the way a reader would go through them.
+
+    Horizontal text is grouped into lines top to bottom and read left to right within a line. Vertical text, as in
+    manga, is grouped into columns right to left and read top to bottom within a column. Boxes belong to the same
+    line (or column) when their centres are within tolerance times the median box height (or width) of each other,
+    chained through the sorted centres.
+
+    Parameters
+    ----------
+    boxes : QuadBoxArray
+        The boxes to sort.
+    direction : str, optional
+        "horizontal", "vertical" or "auto" which picks from the boxes' shapes, by default "auto".
+    tolerance : float, optional
+        How far apart, relative to the typical box, centres of the same line may be, by default 0.5.
+
+    Returns
+    -------
+    numpy.ndarray
+        The box indices in reading order. boxes[result] gives the sorted QuadBoxArray.
+    """
+
+    if direction not in ("auto", "horizontal", "vertical"):
+        opr.error_pretty(ValueError, "OpheliaVisorR | reading_order", f"Invalid direction! {direction}", "HUMAN ERROR")
+        raise ValueError("direction must be auto, horizontal or vertical")
+
+    count = len(boxes)
+    if count < 2:
+        return numpy.arange(count)
+
+    if direction == "auto":
+        direction = "vertical" if is_vertical(boxes) else "horizontal"
+
+    bounds = boxes.Bounds
+    centers = (bounds[:, :2] + bounds[:, 2:]) / 2
+
+    if direction == "horizontal":
+        across, along = centers[:, 1], bounds[:, 0]
+        size = numpy.median(bounds[:, 3] - bounds[:, 1])
+    else:
+        # columns run right to left, so negate x to read them in ascending order
+        across, along = -centers[:, 0], bounds[:, 1]
+        size = numpy.median(bounds[:, 2] - bounds[:, 0])
+
+    by_line = numpy.argsort(across, kind="stable")
+    gaps = numpy.diff(across[by_line]) > tolerance * max(float(size), 1.0)
+
+    lines = numpy.empty(count, dtype=numpy.int64)
+    lines[by_line] = numpy.concatenate([[0], numpy.cumsum(gaps)])
+
+    return numpy.lexsort((along, lines))
@@ -0,0 +1,211 @@
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.Frame import Frame, RGB_ORDER, as_frame, convert
+from PIL import Image
+import threading
+import numpy
+import cv2
+
+
+
+class CroppedBox:
+    """
+    A single crop produced by the CropEngine, holding the QuadBox it came from and the cropped pixels.
+
+    The numpy form is either a zero-copy view of the source frame (for axis-aligned boxes) or a view into one of the
+    CropEngine's reusable buffers (for rotated boxes). The PIL form is only built the first time it is asked for.
+
+    For compatibility with code written against the old (QuadBox, numpy.ndarray, Image.Image) tuples, a CroppedBox
+    can still be unpacked or indexed like one, keeping in mind that this builds the PIL image.
+
+    Properties
+    ----------
+    QuadBox : QuadBox
+        The box the crop was taken from.
+    Array : numpy.ndarray
+        The cropped pixels, in the channel order of the source frame.
+    Space : str
+        The colour space of Array, that of the source frame.
+    Image : Image.Image
+        The cropped pixels as an RGB PIL image, built lazily and cached.
+    """
+
+    __slots__ = ("_box", "_array", "_space", "_image")
+
+    def __init__(self, box: QuadBox, array: numpy.ndarray, space: str = "RGB"):
+        self._box = box
+        self._array = array
+        self._space = space
+        self._image = None
+
+    def get(self, input_format: str) -> numpy.ndarray | Image.Image:
+        """
+        Returns the crop in the format a recognizer asks for, either "numpy" or "pil".
+
+        numpy crops are always handed out in RGB, RGBA or GRAY order, which is what every recognizer expects, so
+        crops of BGR frames are converted here, one small crop at a time.
+        """
+        if input_format != "numpy":
+            return self.Image
+        return convert(self._array, self._space, RGB_ORDER[self._space])
+
+    def detach(self) -> "CroppedBox":
+        """
+        Copies the pixels out of the source frame or CropEngine buffer so the crop outlives them.
+        """
+        self._array = self._array.copy()
+        return self
+
+    @property
+    def Space(self) -> str:
+        return self._space
+
+    @property
+    def QuadBox(self) -> QuadBox:
+        return self._box
+
+    @property
+    def Array(self) -> numpy.ndarray:
+        return self._array
+
+    @property
+    def Image(self) -> Image.Image:
+        if self._image is None:
+            self._image = to_pil(self._array, self._space)
+        return self._image
+
+    def __iter__(self):
+        yield self._box
+        yield self._array
+        yield self.Image
+
+    def __getitem__(self, index: int):
+        if index in (2, -1):
+            return self.Image
+        return (self._box, self._array)[index]
+
+    def __len__(self) -> int:
+        return 3
+
+    def __repr__(self) -> str:
+        return f"CroppedBox: {self._box} {self._array.shape}"
+
+
+def to_pil(array: numpy.ndarray, space: str = "RGB") -> Image.Image:
+    """
+    An RGB PIL image of pixels in the given colour space. RGB data is wrapped as is, only other orders are converted.
+    """
+    if array.size == 0:
+        return Image.new("RGB", (1, 1))
+    return Image.fromarray(convert(array, space, "RGB"))
+
+
+
+class CropEngine:
+    """
+    Crops every box of a frame in one go.
+
+    Boxes whose rotation is under angle_threshold degrees are returned as zero-copy slices of the frame. The rest are
+    perspective warped into a flat buffer (an arena) that is kept and reused across frames, so a steady stream of
+    frames stops allocating once the arena has grown to fit the busiest frame.
+
+    Crops stay valid until the engine has cropped `arenas` more frames, after which their buffer gets reused. Call
+    CroppedBox.detach on anything that has to live longer.
+
+    Parameters
+    ----------
+    angle_threshold : float, optional
+        The largest rotation, in degrees, for which a box is sliced instead of warped, by default 1.0.
+    arenas : int, optional
+        The number of buffers to rotate between, i.e. how many frames' crops may be alive at once, by default 2.
+    """
+
+    def __init__(self, angle_threshold: float = 1.0, arenas: int = 2):
+        self._angle_threshold = angle_threshold
+        self._arenas = [numpy.empty(0, dtype=numpy.uint8) for _ in range(max(1, arenas))]
+        self._current = 0
+        self._lock = threading.Lock()
+
+    def crop(self, image: Frame | numpy.ndarray, boxes: QuadBoxArray) -> list[CroppedBox]:
+        """
+        Crops all boxes out of image.
+
+        Parameters
+        ----------
+        image : Frame | numpy.ndarray
+            The frame to crop from. A bare HxW or HxWxC array is taken to be in RGB order.
+        boxes : QuadBoxArray
+            The boxes to crop.
+
+        Returns
+        -------
+        list[CroppedBox]
+            One CroppedBox per box, in the same order as boxes.
+        """
+
+        if len(boxes) == 0:
+            return []
+
+        frame = as_frame(image)
+        image, space = frame.Array, frame.Space
+
+        pts = boxes.Points
+        widths = numpy.maximum(numpy.linalg.norm(pts[:, 0] - pts[:, 1], axis=1), numpy.linalg.norm(pts[:, 2] - pts[:, 3], axis=1)).astype(numpy.int64)
+        heights = numpy.maximum(numpy.linalg.norm(pts[:, 0] - pts[:, 3], axis=1), numpy.linalg.norm(pts[:, 1] - pts[:, 2], axis=1)).astype(numpy.int64)
+
+        left_edge = pts[:, 3] - pts[:, 0]
+        skew = numpy.degrees(numpy.arctan2(left_edge[:, 0], left_edge[:, 1]))
+        aligned = (numpy.abs(boxes.Angles) < self._angle_threshold) & (numpy.abs(skew) < self._angle_threshold)
+
+        image_height, image_width = image.shape[:2]
+        x0 = numpy.clip(numpy.floor(pts[:, :, 0].min(axis=1)), 0, image_width).astype(numpy.int64)
+        x1 = numpy.clip(numpy.ceil(pts[:, :, 0].max(axis=1)), 0, image_width).astype(numpy.int64)
+        y0 = numpy.clip(numpy.floor(pts[:, :, 1].min(axis=1)), 0, image_height).astype(numpy.int64)
+        y1 = numpy.clip(numpy.ceil(pts[:, :, 1].max(axis=1)), 0, image_height).astype(numpy.int64)
+
+        channels = image.shape[2:]
+        pixel_size = int(numpy.prod(channels, dtype=numpy.int64)) * image.itemsize
+        rotated = ~aligned
+        arena = self.next_arena(int(numpy.sum(widths[rotated] * heights[rotated])) * pixel_size)
+        offset = 0
+
+        crops = []
+        for i, box in enumerate(boxes):
+            if aligned[i]:
+                crops.append(CroppedBox(box, image[y0[i]:y1[i], x0[i]:x1[i]], space))
+                continue
+
+            width, height = int(widths[i]), int(heights[i])
+            size = width * height * pixel_size
+            out = arena[offset:offset + size].view(image.dtype).reshape((height, width) + channels)
+            offset += size
+
+            if width > 0 and height > 0:
+                dst = numpy.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=numpy.float32)
+                M = cv2.getPerspectiveTransform(pts[i], dst)
+                cv2.warpPerspective(image, M, (width, height), dst=out)
+
+            crops.append(CroppedBox(box, out, space))
+
+        return crops
+
+    def next_arena(self, size: int) -> numpy.ndarray:
+        with self._lock:
+            self._current = (self._current + 1) % len(self._arenas)
+            current = self._current
+
+        arena = self._arenas[current]
+
+        if arena.nbytes < size:
+            # grow with some headroom so slowly growing frames don't reallocate every time
+            arena = numpy.empty(int(size * 1.5), dtype=numpy.uint8)
+            self._arenas[current] = arena
+
+        return arena
+
+    @property
+    def AngleThreshold(self) -> float:
+        return self._angle_threshold
+
+    @property
+    def ArenaBytes(self) -> int:
+        return sum(arena.nbytes for arena in self._arenas)
@@ -0,0 +1,210 @@
+from OperaPowerRelay import opr
+from typing import Iterable
+import os
+
+
+DEVICES = ("auto", "cpu", "cuda", "dml")
+
+# the native thread pools engines size from the environment when they are first loaded
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+class ExecutionConfig:
+    """
+    Where and how a plugin runs its model, given to Detector.initialize and Recognizer.initialize and translated by
+    every plugin into its engine's own settings: PaddleOCR's use_gpu and cpu_threads, torch's device and thread
+    counts, onnxruntime's providers and session options.
+
+    When the requested accelerator is missing, or the engine can't use it, the plugin says so and runs on the CPU.
+    Thread and affinity settings are per process, so to pack several workers on one host without oversubscribing
+    it, give each worker process intra_op_threads=1 (and optionally its own cores).
+
+    Parameters
+    ----------
+    device : str, optional
+        "auto" for the best accelerator the engine can use and the CPU otherwise, "cpu", "cuda" or "dml"
+        (DirectML, onnxruntime plugins only), by default "auto".
+    intra_op_threads : int, optional
+        How many threads a single operation may use, by default None which leaves the engine's default.
+    inter_op_threads : int, optional
+        How many independent operations may run at once, by default None which leaves the engine's default.
+    cpu_affinity : Iterable[int], optional
+        The CPU cores the process is pinned to, by default None which leaves it unpinned. Only where the OS
+        supports it (Linux).
+    memory_arena : bool, optional
+        Whether engines that can keep freed CPU memory in an arena for reuse do so, by default True. Turning it off
+        trades some allocation speed for a smaller resident size per worker.
+    gpu_memory_mb : int, optional
+        How much accelerator memory engines that reserve it up front may take, by default None for the engine's
+        default.
+
+    Properties
+    ----------
+    Device, IntraOpThreads, InterOpThreads, CpuAffinity, MemoryArena, GpuMemoryMb
+        The settings above.
+    """
+
+    __slots__ = ("_device", "_intra_op_threads", "_inter_op_threads", "_cpu_affinity", "_memory_arena", "_gpu_memory_mb")
+
+    def __init__(self,
+            device: str = "auto",
+            intra_op_threads: int = None,
+            inter_op_threads: int = None,
+            cpu_affinity: Iterable[int] = None,
+            memory_arena: bool = True,
+            gpu_memory_mb: int = None):
+
+        device = (device or "auto").lower()
+        if device not in DEVICES:
+            opr.error_pretty(ValueError, "OPR ExecutionConfig", f"Unknown device! {device}", "HUMAN ERROR")
+            raise ValueError(f"device must be one of {DEVICES}")
+
+        for threads in (intra_op_threads, inter_op_threads):
+            if threads is not None and threads < 1:
+                opr.error_pretty(ValueError, "OPR ExecutionConfig", f"Invalid thread count! {threads}", "HUMAN ERROR")
+                raise ValueError("thread counts must be at least 1")
+
+        self._device = device
+        self._intra_op_threads = intra_op_threads
+        self._inter_op_threads = inter_op_threads
+        self._cpu_affinity = tuple(sorted(set(cpu_affinity))) if cpu_affinity is not None else None
+        self._memory_arena = bool(memory_arena)
+        self._gpu_memory_mb = gpu_memory_mb
+
+    def apply(self) -> None:
+        """
+        Applies the process-wide settings: pins the process to cpu_affinity and sizes the native thread pools of
+        engines that aren't loaded yet through OMP_NUM_THREADS and friends. Called by every plugin's initialize
+        before its engine is imported.
+        """
+
+        if self._intra_op_threads is not None:
+            for variable in THREAD_VARIABLES:
+                os.environ[variable] = str(self._intra_op_threads)
+
+        if self._cpu_affinity is not None:
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, self._cpu_affinity)
+            else:
+                opr.print_from("OPR ExecutionConfig", "CPU affinity is not supported on this platform, ignoring it")
+
+    def fallback(self, plugin: str) -> None:
+        if self._device not in ("auto", "cpu"):
+            opr.print_from(f"OPR ExecutionConfig | {plugin}", f"{self._device} is not available, falling back to the CPU")
+
+    def torch_device(self, plugin: str) -> str:
+        """
+        "cuda" or "cpu", for torch based engines.
+        """
+
+        import torch
+
+        if self._device in ("auto", "cuda") and torch.cuda.is_available():
+            return "cuda"
+
+        self.fallback(plugin)
+        return "cpu"
+
+    def configure_torch(self) -> None:
+        import torch
+
+        if self._intra_op_threads is not None:
+            torch.set_num_threads(self._intra_op_threads)
+
+        if self._inter_op_threads is not None:
+            try:
+                torch.set_num_interop_threads(self._inter_op_threads)
+            except RuntimeError:
+                # torch only takes it before its first parallel work
+                opr.print_from("OPR ExecutionConfig", "torch inter-op threads were already set, keeping them")
+
+    def paddle_options(self, plugin: str) -> dict:
+        """
+        The PaddleOCR constructor arguments for these settings.
+        """
+
+        import paddle
+
+        use_gpu = self._device in ("auto", "cuda") and paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+        if not use_gpu:
+            self.fallback(plugin)
+
+        options = {"use_gpu": use_gpu}
+        if self._intra_op_threads is not None:
+            options["cpu_threads"] = self._intra_op_threads
+        if self._gpu_memory_mb is not None:
+            options["gpu_mem"] = self._gpu_memory_mb
+        return options
+
+    def onnx_providers(self, plugin: str) -> list:
+        """
+        The onnxruntime execution providers for these settings, always ending with the CPU.
+        """
+
+        import onnxruntime
+
+        wanted = {"auto": ["CUDAExecutionProvider", "DmlExecutionProvider"], "cuda": ["CUDAExecutionProvider"],
+                  "dml": ["DmlExecutionProvider"], "cpu": []}[self._device]
+        available = onnxruntime.get_available_providers()
+        providers = [provider for provider in wanted if provider in available][:1]
+
+        if not providers:
+            self.fallback(plugin)
+        elif providers[0] == "CUDAExecutionProvider" and self._gpu_memory_mb is not None:
+            providers = [("CUDAExecutionProvider", {"gpu_mem_limit": self._gpu_memory_mb * 2**20})]
+
+        return providers + ["CPUExecutionProvider"]
+
+    def onnx_session_options(self):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.enable_cpu_mem_arena = self._memory_arena
+
+        if self._intra_op_threads is not None:
+            options.intra_op_num_threads = self._intra_op_threads
+        if self._inter_op_threads is not None:
+            options.inter_op_num_threads = self._inter_op_threads
+            if self._inter_op_threads > 1:
+                options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+
+        return options
+
+    def _key(self) -> tuple:
+        return (self._device, self._intra_op_threads, self._inter_op_threads, self._cpu_affinity, self._memory_arena, self._gpu_memory_mb)
+
+    # hashable, so registries and pools can cache plugins per configuration
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ExecutionConfig) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (f"ExecutionConfig {self._device}, threads {self._intra_op_threads}/{self._inter_op_threads}, "
+                f"affinity {self._cpu_affinity}, arena {self._memory_arena}, gpu {self._gpu_memory_mb} MB")
+
+    @property
+    def Device(self) -> str:
+        return self._device
+
+    @property
+    def IntraOpThreads(self) -> int | None:
+        return self._intra_op_threads
+
+    @property
+    def InterOpThreads(self) -> int | None:
+        return self._inter_op_threads
+
+    @property
+    def CpuAffinity(self) -> tuple[int, ...] | None:
+        return self._cpu_affinity
+
+    @property
+    def MemoryArena(self) -> bool:
+        return self._memory_arena
+
+    @property
+    def GpuMemoryMb(self) -> int | None:
+        return self._gpu_memory_mb
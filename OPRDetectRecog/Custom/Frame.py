@@ -0,0 +1,214 @@
+from OperaPowerRelay import opr
+from PIL import Image
+import numpy
+import cv2
+import os
+
+
+SPACES = ("GRAY", "RGB", "RGBA", "BGR", "BGRA")
+
+# cv2 conversion code for every (from, to) pair of colour spaces
+CONVERSIONS = {
+    ("RGB", "BGR"): cv2.COLOR_RGB2BGR,
+    ("RGB", "RGBA"): cv2.COLOR_RGB2RGBA,
+    ("RGB", "BGRA"): cv2.COLOR_RGB2BGRA,
+    ("RGB", "GRAY"): cv2.COLOR_RGB2GRAY,
+    ("RGBA", "RGB"): cv2.COLOR_RGBA2RGB,
+    ("RGBA", "BGR"): cv2.COLOR_RGBA2BGR,
+    ("RGBA", "BGRA"): cv2.COLOR_RGBA2BGRA,
+    ("RGBA", "GRAY"): cv2.COLOR_RGBA2GRAY,
+    ("BGR", "RGB"): cv2.COLOR_BGR2RGB,
+    ("BGR", "RGBA"): cv2.COLOR_BGR2RGBA,
+    ("BGR", "BGRA"): cv2.COLOR_BGR2BGRA,
+    ("BGR", "GRAY"): cv2.COLOR_BGR2GRAY,
+    ("BGRA", "RGB"): cv2.COLOR_BGRA2RGB,
+    ("BGRA", "RGBA"): cv2.COLOR_BGRA2RGBA,
+    ("BGRA", "BGR"): cv2.COLOR_BGRA2BGR,
+    ("BGRA", "GRAY"): cv2.COLOR_BGRA2GRAY,
+    ("GRAY", "RGB"): cv2.COLOR_GRAY2RGB,
+    ("GRAY", "RGBA"): cv2.COLOR_GRAY2RGBA,
+    ("GRAY", "BGR"): cv2.COLOR_GRAY2BGR,
+    ("GRAY", "BGRA"): cv2.COLOR_GRAY2BGRA,
+}
+
+# the numpy-facing order recognizers receive crops in, keyed by how many channels they have
+RGB_ORDER = {"GRAY": "GRAY", "RGB": "RGB", "RGBA": "RGBA", "BGR": "RGB", "BGRA": "RGBA"}
+
+
+def read_only(array: numpy.ndarray) -> numpy.ndarray:
+    if not array.flags.writeable:
+        return array
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def infer_space(array: numpy.ndarray) -> str:
+    """
+    The colour space of a bare numpy array, assuming RGB channel order as PIL produces it.
+    """
+    if array.ndim == 2 or (array.ndim == 3 and array.shape[2] == 1):
+        return "GRAY"
+    return "RGBA" if array.shape[2] == 4 else "RGB"
+
+
+def native_mode(image: Image.Image) -> Image.Image:
+    """
+    Returns image unchanged if numpy can take its pixels as they are (L, RGB or RGBA), otherwise converted once to
+    RGB, or RGBA when it carries transparency.
+    """
+    if image.mode in ("L", "RGB", "RGBA"):
+        return image
+    if image.mode in ("LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def convert(array: numpy.ndarray, source: str, target: str) -> numpy.ndarray:
+    if source == target:
+        return array
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+    return cv2.cvtColor(array, CONVERSIONS[(source, target)])
+
+
+
+class Frame:
+    """
+    One input image as a numpy array together with its colour space, so every stage knows the channel order
+    instead of guessing it.
+
+    Pixels are never copied to build a Frame from a numpy array, and every array it hands out is read-only. A
+    conversion to another colour space is done the first time it is asked for and cached, so it happens at most once
+    per frame and space no matter how many stages need it.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        The HxW or HxWxC pixels.
+    space : str | None, optional
+        One of GRAY, RGB, RGBA, BGR or BGRA, by default None which infers it from the channel count, assuming RGB
+        order.
+
+    Properties
+    ----------
+    Array : numpy.ndarray
+        The pixels in their own colour space, read-only.
+    Space : str
+        Their colour space.
+    Shape : tuple
+        The array's shape.
+    """
+
+    __slots__ = ("_array", "_space", "_converted")
+
+    def __init__(self, array: numpy.ndarray, space: str = None):
+        space = space or infer_space(array)
+
+        if space not in SPACES:
+            opr.error_pretty(ValueError, "OPR Frame", f"Unknown colour space! {space}", "HUMAN ERROR")
+            raise ValueError(f"colour space must be one of {SPACES}")
+
+        self._array = read_only(array)
+        self._space = space
+        self._converted = {}
+
+    def get(self, space: str) -> numpy.ndarray:
+        """
+        The pixels in the given colour space, read-only, converted on first request and cached.
+        """
+
+        if space == self._space:
+            return self._array
+
+        converted = self._converted.get(space)
+        if converted is None:
+            converted = self._converted[space] = read_only(convert(self._array, self._space, space))
+        return converted
+
+    def to_pil(self) -> Image.Image:
+        if self._space == "GRAY":
+            return Image.fromarray(self._array)
+        return Image.fromarray(self.get("RGBA" if self._space in ("RGBA", "BGRA") else "RGB"))
+
+    def crop(self, x0: int, y0: int, x1: int, y1: int) -> "Frame":
+        """
+        A Frame of a rectangle of this one, sharing its pixels.
+        """
+        return Frame(self._array[y0:y1, x0:x1], self._space)
+
+    @property
+    def Array(self) -> numpy.ndarray:
+        return self._array
+
+    @property
+    def Space(self) -> str:
+        return self._space
+
+    @property
+    def Shape(self) -> tuple:
+        return self._array.shape
+
+    def __repr__(self) -> str:
+        return f"Frame {self._space} {self._array.shape}"
+
+
+def decode(buffer: numpy.ndarray) -> Frame:
+    """
+    Decodes an encoded image (PNG, JPEG, WebP, ...) straight into a Frame, in the BGR order OpenCV decodes to.
+    """
+
+    array = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED)
+    if array is None:
+        opr.error_pretty(ValueError, "OPR Frame", "Could not decode image!", "HUMAN ERROR")
+        raise ValueError("could not decode image")
+
+    if array.dtype != numpy.uint8:
+        # 16-bit PNGs and TIFFs, scaled down to what every engine expects
+        array = (array >> 8).astype(numpy.uint8) if array.dtype == numpy.uint16 else cv2.normalize(array, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
+    if array.ndim == 2:
+        return Frame(array, "GRAY")
+    return Frame(array, "BGRA" if array.shape[2] == 4 else "BGR")
+
+
+def as_frame(source, space: str = None) -> Frame:
+    """
+    Normalizes any supported input into a Frame, copying only when the input format makes it unavoidable.
+
+    Parameters
+    ----------
+    source : Frame | numpy.ndarray | Image.Image | bytes | bytearray | memoryview | str | os.PathLike
+        A Frame (returned as is), a numpy array (wrapped without copying), a PIL image (its pixels are read once),
+        encoded image bytes (decoded once), or a path: .npy files are memory-mapped, any other image file is
+        memory-mapped and decoded from the mapping.
+    space : str, optional
+        The colour space of a numpy array or .npy file, by default None which infers RGB, RGBA or GRAY.
+
+    Returns
+    -------
+    Frame
+        The input with its colour space.
+    """
+
+    if isinstance(source, Frame):
+        return source
+
+    if isinstance(source, numpy.ndarray):
+        return Frame(source, space)
+
+    if isinstance(source, Image.Image):
+        image = native_mode(source)
+        return Frame(numpy.asarray(image), {"L": "GRAY"}.get(image.mode, image.mode))
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode(numpy.frombuffer(source, dtype=numpy.uint8))
+
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.lower().endswith(".npy"):
+            return Frame(numpy.load(path, mmap_mode="r"), space)
+        return decode(numpy.memmap(path, dtype=numpy.uint8, mode="r"))
+
+    opr.error_pretty(TypeError, "OPR Frame", f"Unsupported input! {type(source).__name__}", "HUMAN ERROR")
+    raise TypeError(f"Unsupported input {type(source).__name__}")
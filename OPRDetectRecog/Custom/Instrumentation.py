@@ -0,0 +1,279 @@
+from abc import ABC, abstractmethod
+from typing import Callable, TextIO
+import functools
+import threading
+import bisect
+import json
+import time
+import math
+
+
+class MetricSink(ABC):
+    """
+    Receives every metric recorded while instrumentation is enabled.
+
+    kind is either "histogram" (timings and per-frame sizes) or "counter" (running totals).
+    """
+
+    @abstractmethod
+    def record(self, kind: str, name: str, labels: dict[str, str], value: float) -> None:
+        pass
+
+
+
+class HistogramSink(MetricSink):
+    """
+    Keeps every value in memory, for percentiles in tests, notebooks and benchmarks.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values.setdefault(key, []).append(value)
+
+    def values(self, name: str, **labels) -> list[float]:
+        return list(self._values.get((name, tuple(sorted(labels.items()))), []))
+
+    def summary(self) -> dict:
+        """
+        Count, total and p50/p90/p99 for every (metric, labels) pair recorded so far.
+        """
+
+        with self._lock:
+            items = [(key, sorted(values)) for key, values in self._values.items()]
+
+        summary = {}
+        for (name, labels), values in items:
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            summary[f"{name}{{{label_text}}}"] = {
+                "count": len(values),
+                "sum": sum(values),
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p99": percentile(values, 99),
+            }
+        return summary
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+
+class JsonLinesSink(MetricSink):
+    """
+    Writes one JSON object per recorded value to a file or stream.
+    """
+
+    def __init__(self, target: str | TextIO):
+        self._stream = open(target, "a", encoding="utf-8") if isinstance(target, str) else target
+        self._owned = isinstance(target, str)
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, labels, value):
+        line = json.dumps({"ts": time.time(), "kind": kind, "name": name, "labels": labels, "value": value})
+        with self._lock:
+            self._stream.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._stream.flush()
+            if self._owned:
+                self._stream.close()
+
+
+
+class PrometheusSink(MetricSink):
+    """
+    Aggregates counters and bucketed histograms and renders them in the Prometheus text exposition format.
+    """
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, size_buckets: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000)):
+        self._buckets = tuple(buckets)
+        self._size_buckets = tuple(size_buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            if kind == "counter":
+                self._counters[key] = self._counters.get(key, 0) + value
+                return
+
+            buckets = self._buckets if name.endswith("_seconds") else self._size_buckets
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                histogram[1][index] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def render(self) -> str:
+        lines = []
+
+        with self._lock:
+            for name in sorted({key[0] for key in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+
+            for name in sorted({key[0] for key in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), (buckets, counts, total, count) in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets, counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return math.nan
+    index = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+
+class Instrumentation:
+    """
+    The switchboard every Detector and Recognizer reports to.
+
+    Disabled by default, in which case an instrumented call costs a single attribute check. Once enabled with
+    one or more sinks, every detect, detect_and_crop, crop_boxes, crop_rotated_box, recognize and recognize_batch
+    call reports:
+
+    opr_stage_seconds{stage, engine}    histogram of how long the call took
+    opr_calls_total{stage, engine}      counter of calls
+    opr_boxes_per_frame{engine}         histogram of boxes found by detect
+    opr_crop_pixels_total{engine}       counter of cropped pixels
+    opr_recognized_crops_total{engine}  counter of crops sent through a recognizer
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._sinks = []
+
+    def enable(self, *sinks: MetricSink) -> None:
+        self._sinks = list(sinks) or [HistogramSink()]
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self._sinks = []
+
+    def record(self, kind: str, name: str, labels: dict[str, str], value: float) -> None:
+        for sink in self._sinks:
+            sink.record(kind, name, labels, value)
+
+    def span(self, stage: str, engine: str) -> "Span":
+        return Span(self, stage, engine)
+
+    @property
+    def Sinks(self) -> list[MetricSink]:
+        return list(self._sinks)
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+
+class Span:
+    """
+    Times a block of code under a stage name, for instrumenting code outside the plugin methods.
+    """
+
+    __slots__ = ("_instrumentation", "_stage", "_engine", "_start")
+
+    def __init__(self, instrumentation: Instrumentation, stage: str, engine: str):
+        self._instrumentation = instrumentation
+        self._stage = stage
+        self._engine = engine
+        self._start = 0.0
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._instrumentation.enabled:
+            labels = {"stage": self._stage, "engine": self._engine}
+            self._instrumentation.record("histogram", "opr_stage_seconds", labels, time.perf_counter() - self._start)
+            self._instrumentation.record("counter", "opr_calls_total", labels, 1)
+
+
+def instrumented(stage: str, extra: Callable = None) -> Callable:
+    """
+    Wraps a plugin method so that, while INSTRUMENTATION is enabled, its duration and call count are recorded under
+    stage, and extra(instrumentation, engine, args, result) can record stage-specific metrics.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        if getattr(fn, "__instrumented__", False):
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            instrumentation = INSTRUMENTATION
+            if not instrumentation.enabled:
+                return fn(self, *args, **kwargs)
+
+            start = time.perf_counter()
+            result = fn(self, *args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            engine = self._name or type(self).__name__
+            labels = {"stage": stage, "engine": engine}
+            instrumentation.record("histogram", "opr_stage_seconds", labels, elapsed)
+            instrumentation.record("counter", "opr_calls_total", labels, 1)
+
+            if extra is not None:
+                extra(instrumentation, engine, args, result)
+
+            return result
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    return decorate
+
+
+def instrument_subclass(cls: type, stages: dict[str, Callable]) -> None:
+    """
+    Wraps the methods named in stages that cls defines itself, called from the base classes' __init_subclass__.
+    """
+
+    for stage, extra in stages.items():
+        method = cls.__dict__.get(stage)
+        if method is not None and callable(method):
+            setattr(cls, stage, instrumented(stage, extra)(method))
@@ -16,6 +16,21 @@ class LinguistResult:
         else:
             return QuadBox(bbox)
 
+    def to_dict(self) -> dict:
+        return {
+            "points": self._QuadBox.Points,
+            "angle": float(self._QuadBox.Angle),
+            "original": self._original,
+            "translated": self._translated,
+            "confidence": None if self._confidence is None else float(self._confidence),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LinguistResult":
+        # points are already padded, so they must not be padded again
+        bbox = QuadBox(data["points"], data.get("angle"), padding=0)
+        return cls(bbox, data["original"], data.get("translated"), data["confidence"])
+
 
     @property
     def QuadBox(self) -> QuadBox:
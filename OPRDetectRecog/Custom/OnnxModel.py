@@ -0,0 +1,66 @@
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OperaPowerRelay import opr
+import os
+
+
+def find_file(path: str, names: tuple[str, ...], extension: str) -> str | None:
+    """
+    path itself if it is a file, otherwise the first of names found in the directory path, or failing that the
+    directory's only file with the given extension. None if there is no such file.
+    """
+
+    if path is None:
+        return None
+
+    if os.path.isfile(path):
+        return path
+
+    if not os.path.isdir(path):
+        return None
+
+    for name in names:
+        candidate = os.path.join(path, name)
+        if os.path.isfile(candidate):
+            return candidate
+
+    matches = [name for name in os.listdir(path) if name.lower().endswith(extension)]
+    return os.path.join(path, matches[0]) if len(matches) == 1 else None
+
+
+def create_session(model: str, plugin: str, execution: ExecutionConfig = None):
+    """
+    Loads an exported model into an onnxruntime session, with every graph optimization enabled.
+
+    Parameters
+    ----------
+    model : str
+        The .onnx file.
+    plugin : str
+        The name of the plugin loading it, for messages.
+    execution : ExecutionConfig, optional
+        The providers, threads and memory arena to run with, by default ExecutionConfig() which takes an
+        accelerator when onnxruntime has one and the CPU otherwise.
+
+    Returns
+    -------
+    onnxruntime.InferenceSession
+        The session, or None if model does not exist.
+    """
+
+    if model is None or not os.path.isfile(model):
+        opr.error_pretty(FileNotFoundError, f"OPR OnnxModel | {plugin}", f"No .onnx model found! {model}", "HUMAN ERROR")
+        return None
+
+    import onnxruntime
+
+    execution = execution or ExecutionConfig()
+    return onnxruntime.InferenceSession(model, execution.onnx_session_options(), providers=execution.onnx_providers(plugin))
+
+
+def input_shape(session) -> tuple[str, list[int | None]]:
+    """
+    The name and shape of a session's first input, with the dynamic dimensions as None.
+    """
+
+    first = session.get_inputs()[0]
+    return first.name, [dim if isinstance(dim, int) and dim > 0 else None for dim in first.shape]
@@ -0,0 +1,87 @@
+import numpy
+import cv2
+
+
+def grayscale(pixels: numpy.ndarray) -> numpy.ndarray:
+    """
+    A grayscale copy of an RGB, RGBA or grayscale crop. Empty crops, which CropEngine returns for degenerate boxes,
+    come back as empty 2D arrays instead of reaching OpenCV.
+    """
+
+    pixels = numpy.asarray(pixels)
+    if pixels.size == 0:
+        return numpy.empty(pixels.shape[:2], dtype=numpy.uint8)
+
+    if pixels.ndim == 3:
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2GRAY if pixels.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    return pixels.copy()
+
+
+def shrink(pixels: numpy.ndarray, max_height: int) -> numpy.ndarray:
+    """
+    pixels scaled down, keeping the aspect ratio, to at most max_height rows along the line's short side.
+    """
+
+    height, width = pixels.shape[:2]
+    short = min(height, width)
+    if short <= max_height or pixels.size == 0:
+        return pixels
+
+    scale = max_height / short
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+
+
+def align(previous: numpy.ndarray, current: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    previous and current as horizontal lines of the same shape: transposed if previous is a vertical line, current
+    scaled to previous's line height, and both cut to their common length around their centres, since boxes of the
+    same text differ mostly in how much padding they got.
+    """
+
+    if previous.shape[0] > previous.shape[1]:
+        previous, current = previous.T, current.T
+
+    height = previous.shape[0]
+    if current.shape[0] != height:
+        length = max(1, int(round(current.shape[1] * height / current.shape[0])))
+        current = cv2.resize(numpy.ascontiguousarray(current), (length, height), interpolation=cv2.INTER_AREA)
+
+    length = min(previous.shape[1], current.shape[1])
+    previous_start = (previous.shape[1] - length) // 2
+    current_start = (current.shape[1] - length) // 2
+    return previous[:, previous_start:previous_start + length], current[:, current_start:current_start + length]
+
+
+def local_change(previous: numpy.ndarray, current: numpy.ndarray, pixel_threshold: int = 48) -> float:
+    """
+    The largest fraction of changed pixels in any window of the line, each window half as wide as the line is
+    high, so about one character.
+
+    Averaging over the whole crop dilutes a changed character by the length of the line, a different digit in
+    "Gold: 1,234,567" changes under 2% of it. One window holds that character alone, while compression noise
+    stays spread thinly over every window. Vertical lines (taller than wide) are windowed along their height.
+
+    Parameters
+    ----------
+    previous, current : numpy.ndarray
+        Grayscale crops, aligned with align if their shapes differ.
+    pixel_threshold : int, optional
+        How much a pixel must change to count as changed, by default 48.
+
+    Returns
+    -------
+    float
+        0.0 for identical crops up to 1.0, and 1.0 when exactly one of them is empty.
+    """
+
+    if previous.size == 0 or current.size == 0:
+        return float(previous.size != current.size)
+
+    previous, current = align(previous, current)
+    changed = cv2.absdiff(numpy.ascontiguousarray(previous), numpy.ascontiguousarray(current)) > pixel_threshold
+
+    height, width = changed.shape
+    window = max(1, min((height + 1) // 2, width))
+    sums = numpy.concatenate(([0], numpy.cumsum(changed.sum(axis=0))))
+    return float((sums[window:] - sums[:-window]).max() / (window * height))
@@ -3,6 +3,8 @@ from OperaPowerRelay import opr
 import numpy
 
 
+# direction each corner moves in when padding, in order of top-left, top-right, bottom-right, bottom-left
+PADDING_SIGNS = numpy.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=numpy.float32)
 
 
 class QuadBox:
@@ -60,6 +62,8 @@ class QuadBox:
         The right point of the box, calculated from the top-right and bottom-right points.
     """
     
+    __slots__ = ("_data", "_angle")
+
     def __init__(self, 
             points: list[tuple[float, float]],
             angle: float | None = None,
@@ -69,25 +73,26 @@ class QuadBox:
                 opr.error_pretty(ValueError, "OpheliaVisorR | QuadBox", f"Invalid points! {points}", "HUMAN ERROR")
                 raise ValueError("QuadBox must have 4 points")        
 
+            self._data = numpy.array(points, dtype=numpy.float32).reshape(4, 2)
+
             if padding > 0:
-                self._points = [p for p in points]
-                self._points[0] = (points[0][0] - padding, points[0][1] - padding)
-                self._points[1] = (points[1][0] + padding, points[1][1] - padding)
-                self._points[2] = (points[2][0] + padding, points[2][1] + padding)
-                self._points[3] = (points[3][0] - padding, points[3][1] + padding)
-
-                self._angle = self.calculate_angle() if angle is None else angle
-                return
-            
-            self._points = points
+                self._data += padding * PADDING_SIGNS
+
+            self._data.flags.writeable = False
             self._angle = self.calculate_angle() if angle is None else angle
 
-    def calculate_angle(self) -> float:
-        p0 = self.to_numpy[0]
-        p1 = self.to_numpy[1]
+    @classmethod
+    def view(cls, data: numpy.ndarray, angle: float) -> "QuadBox":
+        """
+        Creates a QuadBox that shares its points with a 4x2 row of a QuadBoxArray instead of copying them.
+        """
+        box = cls.__new__(cls)
+        box._data = data
+        box._angle = angle
+        return box
 
-        delta_x = p1[0] - p0[0]
-        delta_y = p1[1] - p0[1]
+    def calculate_angle(self) -> float:
+        delta_x, delta_y = (self._data[1] - self._data[0]).tolist()
 
         angle_rad = math.atan2(delta_y, delta_x)
         return math.degrees(angle_rad)
@@ -95,41 +100,44 @@ class QuadBox:
 
     @property
     def Points(self) -> list[tuple[float, float]]:
-        return self._points
+        return [tuple(p) for p in self._data.tolist()]
     
     @property
     def to_numpy(self) -> numpy.ndarray:
-        return numpy.array(self._points, dtype=numpy.float32)
+        """
+        The 4x2 float32 points of the box. This is a read-only view, not a copy.
+        """
+        return self._data
     
     @property
     def to_tuple(self) -> tuple[tuple[float, float], tuple[float, float], tuple[float, float], tuple[float, float], float]:
-        
-        return (self._points[0], self._points[1], self._points[2], self._points[3], self._angle)
+        points = self.Points
+        return (points[0], points[1], points[2], points[3], self._angle)
 
 
     @property
     def Width(self) -> float:
-        return float(numpy.linalg.norm(self.to_numpy[0] - self.to_numpy[1]))
+        return float(numpy.linalg.norm(self._data[0] - self._data[1]))
 
     @property
     def Height(self) -> float:
-        return float(numpy.linalg.norm(self.to_numpy[0] - self.to_numpy[3]))
+        return float(numpy.linalg.norm(self._data[0] - self._data[3]))
     
     @property
     def TopLeft(self) -> tuple[float, float]:
-        return self._points[0]
+        return tuple(self._data[0].tolist())
 
     @property
     def TopRight(self) -> tuple[float, float]:
-        return self._points[1]
+        return tuple(self._data[1].tolist())
     
     @property
     def BottomRight(self) -> tuple[float, float]:
-        return self._points[2]
+        return tuple(self._data[2].tolist())
     
     @property
     def BottomLeft(self) -> tuple[float, float]:
-        return self._points[3]
+        return tuple(self._data[3].tolist())
     
     @property
     def Top(self) -> tuple[float, float]:
@@ -163,8 +171,7 @@ class QuadBox:
     
     @property
     def CenterStrict(self) -> tuple[float, float]:
-        x = sum(p[0] for p in self._points) /4
-        y = sum(p[1] for p in self._points) /4
+        x, y = self._data.mean(axis=0).tolist()
         return x, y
 
 
@@ -174,13 +181,10 @@ class QuadBox:
     
     @property
     def AreaStrict(self) -> float:
-        x = self.to_numpy[:, 0]
-        y = self.to_numpy[:, 1]
-
-        x = numpy.append(x, x[0])
-        y = numpy.append(y, y[0])
+        x = self._data[:, 0]
+        y = self._data[:, 1]
 
-        return 0.5 * numpy.abs(numpy.dot(x[:-1], y[1:]) - numpy.dot(x[1:], y[:-1]))
+        return float(0.5 * numpy.abs(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(numpy.roll(x, -1), y)))
 
     @property
     def Angle(self) -> float:
@@ -189,4 +193,199 @@ class QuadBox:
 
 
     def __repr__(self) -> str:
-        return f"QuadBox: {self.to_tuple}"
\ No newline at end of file
+        return f"QuadBox: {self.to_tuple}"
+
+
+
+class QuadBoxArray:
+    """
+    A QuadBoxArray holds every QuadBox of a frame in a single Nx4x2 float32 array, so that geometry is computed
+    for all boxes at once instead of box by box.
+
+    Indexing with an integer returns a QuadBox view that shares its points with the array, slicing or indexing
+    with a mask or index array returns a new QuadBoxArray. Iterating yields QuadBox views, so a QuadBoxArray can be
+    used anywhere a list[QuadBox] was expected.
+
+    Parameters
+    ----------
+    points : numpy.ndarray | list
+        The points of every box, shaped Nx4x2, each box in order of top-left, top-right, bottom-right, bottom-left.
+    angles : numpy.ndarray | list | None, optional
+        The angle of rotation of every box, by default None which will be calculated from the points.
+    padding : int, optional
+        The amount of padding to be added to every box, by default 5.
+
+    Properties
+    ----------
+    Points : numpy.ndarray
+        The Nx4x2 points of the boxes.
+    Bounds : numpy.ndarray
+        The Nx4 axis-aligned bounding rectangles of the boxes, as x0, y0, x1, y1.
+    Angles : numpy.ndarray
+        The angle of rotation of each box, in degrees.
+    Widths, Heights, Areas, AreasStrict : numpy.ndarray
+        Same as the QuadBox properties of the same name, one value per box.
+    Centers, CentersStrict, Tops, Bottoms, Lefts, Rights : numpy.ndarray
+        Same as the QuadBox properties of the same name, one Nx2 row of points per box.
+    """
+
+    __slots__ = ("_points", "_angles")
+
+    def __init__(self,
+            points: numpy.ndarray | list,
+            angles: numpy.ndarray | list | None = None,
+            padding: int = 5):
+
+        data = numpy.array(points, dtype=numpy.float32)
+
+        if data.size == 0:
+            data = data.reshape(0, 4, 2)
+
+        if data.ndim != 3 or data.shape[1:] != (4, 2):
+            opr.error_pretty(ValueError, "OpheliaVisorR | QuadBoxArray", f"Invalid points shape! {data.shape}", "HUMAN ERROR")
+            raise ValueError("QuadBoxArray points must be shaped Nx4x2")
+
+        if padding > 0:
+            data += padding * PADDING_SIGNS
+
+        data.flags.writeable = False
+        self._points = data
+
+        if angles is None:
+            self._angles = self.calculate_angles(data)
+        else:
+            self._angles = numpy.asarray(angles, dtype=numpy.float32).reshape(len(data))
+
+    @classmethod
+    def wrap(cls, points: numpy.ndarray, angles: numpy.ndarray) -> "QuadBoxArray":
+        """
+        Wraps already padded Nx4x2 float32 points and their angles without copying or validating them.
+        """
+        boxes = cls.__new__(cls)
+        boxes._points = points
+        boxes._angles = angles
+        return boxes
+
+    @classmethod
+    def from_paddle(cls, raw: list | None, padding: int = 5) -> "QuadBoxArray":
+        """
+        Builds a QuadBoxArray straight from PaddleOCR's detection output for a single image, which is None
+        when nothing was found.
+        """
+        if raw is None or len(raw) == 0:
+            return cls(numpy.empty((0, 4, 2), dtype=numpy.float32), padding=0)
+        return cls(raw, padding=padding)
+
+    @classmethod
+    def from_boxes(cls, boxes: list[QuadBox]) -> "QuadBoxArray":
+        """
+        Stacks already padded QuadBoxes into a QuadBoxArray, keeping their angles.
+        """
+        if len(boxes) == 0:
+            return cls(numpy.empty((0, 4, 2), dtype=numpy.float32), padding=0)
+        return cls(numpy.stack([box.to_numpy for box in boxes]), [box.Angle for box in boxes], padding=0)
+
+    @classmethod
+    def concatenate(cls, arrays: list["QuadBoxArray"]) -> "QuadBoxArray":
+        """
+        Joins several QuadBoxArrays into one, in order.
+        """
+        arrays = [array for array in arrays if len(array)]
+        if not arrays:
+            return cls(numpy.empty((0, 4, 2), dtype=numpy.float32), padding=0)
+
+        points = numpy.concatenate([array.Points for array in arrays])
+        points.flags.writeable = False
+        return cls.wrap(points, numpy.concatenate([array.Angles for array in arrays]))
+
+    def translate(self, dx: float, dy: float) -> "QuadBoxArray":
+        """
+        Returns a copy of the boxes moved by (dx, dy), e.g. from a sub-image back into frame coordinates.
+        """
+        points = self._points + numpy.array([dx, dy], dtype=numpy.float32)
+        points.flags.writeable = False
+        return QuadBoxArray.wrap(points, self._angles)
+
+    @staticmethod
+    def calculate_angles(points: numpy.ndarray) -> numpy.ndarray:
+        delta = points[:, 1] - points[:, 0]
+        return numpy.degrees(numpy.arctan2(delta[:, 1], delta[:, 0])).astype(numpy.float32)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __getitem__(self, index) -> "QuadBox | QuadBoxArray":
+        if isinstance(index, (int, numpy.integer)):
+            return QuadBox.view(self._points[index], float(self._angles[index]))
+
+        return QuadBoxArray.wrap(self._points[index], self._angles[index])
+
+    def __iter__(self):
+        for data, angle in zip(self._points, self._angles.tolist()):
+            yield QuadBox.view(data, angle)
+
+    def to_list(self) -> list[QuadBox]:
+        return list(self)
+
+
+    @property
+    def Points(self) -> numpy.ndarray:
+        return self._points
+
+    @property
+    def Angles(self) -> numpy.ndarray:
+        return self._angles
+
+    @property
+    def Bounds(self) -> numpy.ndarray:
+        """
+        The axis-aligned bounding rectangle of every box, as an Nx4 array of x0, y0, x1, y1.
+        """
+        return numpy.concatenate([self._points.min(axis=1), self._points.max(axis=1)], axis=1)
+
+    @property
+    def Widths(self) -> numpy.ndarray:
+        return numpy.linalg.norm(self._points[:, 0] - self._points[:, 1], axis=1)
+
+    @property
+    def Heights(self) -> numpy.ndarray:
+        return numpy.linalg.norm(self._points[:, 0] - self._points[:, 3], axis=1)
+
+    @property
+    def Tops(self) -> numpy.ndarray:
+        return (self._points[:, 0] + self._points[:, 1]) / 2
+
+    @property
+    def Bottoms(self) -> numpy.ndarray:
+        return (self._points[:, 3] + self._points[:, 2]) / 2
+
+    @property
+    def Lefts(self) -> numpy.ndarray:
+        return (self._points[:, 0] + self._points[:, 3]) / 2
+
+    @property
+    def Rights(self) -> numpy.ndarray:
+        return (self._points[:, 1] + self._points[:, 2]) / 2
+
+    @property
+    def Centers(self) -> numpy.ndarray:
+        return (self.Tops + self.Bottoms) / 2
+
+    @property
+    def CentersStrict(self) -> numpy.ndarray:
+        return self._points.mean(axis=1)
+
+    @property
+    def Areas(self) -> numpy.ndarray:
+        return self.Widths * self.Heights
+
+    @property
+    def AreasStrict(self) -> numpy.ndarray:
+        x = self._points[:, :, 0]
+        y = self._points[:, :, 1]
+
+        return 0.5 * numpy.abs(numpy.sum(x * numpy.roll(y, -1, axis=1) - numpy.roll(x, -1, axis=1) * y, axis=1))
+
+
+    def __repr__(self) -> str:
+        return f"QuadBoxArray: {len(self)} boxes"
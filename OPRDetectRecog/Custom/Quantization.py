@@ -0,0 +1,113 @@
+from OperaPowerRelay import opr
+from typing import Callable
+import pickle
+import time
+import os
+import re
+
+
+CACHE_ENV = "OPR_QUANTIZED_CACHE"
+
+
+def cache_dir() -> str:
+    """
+    Where quantized weights are kept, $OPR_QUANTIZED_CACHE or ~/.cache/OPRDetectRecog/quantized.
+    """
+    return os.environ.get(CACHE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "OPRDetectRecog", "quantized")
+
+
+def cache_path(key: str) -> str:
+    import torch
+
+    # weights quantized by one torch release are not guaranteed to load in another
+    name = re.sub(r"[^\w.-]+", "_", f"{key}-torch{torch.__version__}")
+    return os.path.join(cache_dir(), f"{name}.pt")
+
+
+def quantize_module(module, key: str, cache: bool = True):
+    """
+    Applies dynamic int8 quantization to a torch module's Linear and recurrent layers: their weights are stored as
+    int8 and activations are quantized on the fly, which speeds up the fp32 matmuls that dominate transformer and
+    CRNN inference on the CPU, at a small cost in accuracy. Only works on the CPU.
+
+    The whole quantized module is pickled under key the first time, and later loads unpickle it and hand it back
+    without running quantize_dynamic, module then only serves as the fallback. A cached file that no longer
+    unpickles, e.g. after an engine upgrade, is replaced.
+
+    Parameters
+    ----------
+    module : torch.nn.Module
+        The fp32 module, on the CPU.
+    key : str
+        Names the model and its configuration in the cache.
+    cache : bool, optional
+        Whether to read and write the cache, by default True.
+
+    Returns
+    -------
+    torch.nn.Module
+        The quantized module, in eval mode.
+    """
+
+    import torch
+
+    path = cache_path(key) if cache else None
+
+    if path is not None and os.path.isfile(path):
+        try:
+            # the pickled module holds its own packed int8 weights, so there is nothing left to quantize
+            cached = torch.load(path, map_location="cpu", weights_only=False)
+            if isinstance(cached, torch.nn.Module):
+                return cached.eval()
+            opr.print_from("OPR Quantization", f"Cached file for {key} is not a module, quantizing again")
+        except (RuntimeError, KeyError, EOFError, AttributeError, ImportError, pickle.UnpicklingError) as e:
+            opr.print_from("OPR Quantization", f"Stale quantized module for {key}, quantizing again: {e}")
+
+    module = module.eval()
+    quantized = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}, dtype=torch.qint8)
+
+    if path is None:
+        return quantized
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # written under another name first so a reader never sees half a file
+        partial = f"{path}.{os.getpid()}.tmp"
+        torch.save(quantized, partial)
+        os.replace(partial, path)
+    except (OSError, pickle.PicklingError, AttributeError, TypeError) as e:
+        opr.print_from("OPR Quantization", f"Could not cache quantized module for {key}: {e}")
+
+    return quantized
+
+
+def time_call(fn: Callable, repeats: int = 3) -> float:
+    """
+    The fastest of repeats calls to fn, in seconds.
+    """
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare_speed(fn: Callable, quantize: Callable[[], None], name: str, repeats: int = 3) -> tuple[float, float]:
+    """
+    Times fn, runs quantize, then times fn again and reports the speed-up.
+
+    Returns
+    -------
+    tuple[float, float]
+        The fp32 and int8 seconds per call.
+    """
+
+    fp32 = time_call(fn, repeats)
+    quantize()
+    int8 = time_call(fn, repeats)
+
+    opr.print_from(f"OPR Quantization | {name}", f"int8 {int8 * 1000:.1f} ms vs fp32 {fp32 * 1000:.1f} ms ({fp32 / max(int8, 1e-9):.2f}x)")
+    return fp32, int8
@@ -0,0 +1,160 @@
+from multiprocessing import shared_memory
+from OperaPowerRelay import opr
+import threading
+import queue
+import time
+import numpy
+
+
+# segments this process has attached to, by name, so every frame after the first is a plain numpy view
+_ATTACHED = {}
+
+
+class FrameRef:
+    """
+    Where a frame lives in a SharedRing. This is all that crosses the process boundary for a frame.
+    """
+
+    __slots__ = ("name", "slot", "offset", "shape", "dtype")
+
+    def __init__(self, name: str, slot: int, offset: int, shape: tuple, dtype: str):
+        self.name = name
+        self.slot = slot
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return (self.name, self.slot, self.offset, self.shape, self.dtype)
+
+    def __setstate__(self, state):
+        self.name, self.slot, self.offset, self.shape, self.dtype = state
+
+    def __repr__(self) -> str:
+        return f"FrameRef {self.name}[{self.slot}] {self.shape} {self.dtype}"
+
+
+def attach(ref: FrameRef) -> numpy.ndarray:
+    """
+    Returns a read-only numpy view of the referenced frame, attaching to its segment on first use.
+    """
+
+    segment = _ATTACHED.get(ref.name)
+    if segment is None:
+        try:
+            segment = shared_memory.SharedMemory(name=ref.name, track=False)
+        except TypeError:
+            # before Python 3.13 attaching registers the segment with this process's resource tracker. Workers
+            # started by multiprocessing (fork, spawn or forkserver) are already connected to the owner's tracker,
+            # which holds the owner's registration of the same name, so unregistering there would drop it and
+            # make the owner's unlink fail. Only a tracker started by this attach has to forget the segment, or it
+            # would unlink it when this process exits while the owner still uses it.
+            from multiprocessing import resource_tracker
+            shared_tracker = resource_tracker._resource_tracker._fd is not None
+            segment = shared_memory.SharedMemory(name=ref.name)
+            if not shared_tracker:
+                resource_tracker.unregister(segment._name, "shared_memory")
+        _ATTACHED[ref.name] = segment
+
+    view = numpy.ndarray(ref.shape, dtype=ref.dtype, buffer=segment.buf, offset=ref.offset)
+    view.flags.writeable = False
+    return view
+
+
+
+class SharedRing:
+    """
+    A fixed number of equally sized frame slots in one shared memory segment, owned by the process that creates it.
+
+    The owner copies a frame into a free slot with write and hands the FrameRef to worker processes, which read it
+    in place with attach. A slot stays taken until the owner releases it, and write blocks while every slot is taken,
+    which bounds both memory and the number of frames in flight. Closing the ring wakes any write still waiting.
+
+    Parameters
+    ----------
+    slots : int
+        How many frames can be in flight at once.
+    slot_bytes : int
+        The largest frame a slot holds, in bytes.
+
+    Properties
+    ----------
+    Name : str
+        The shared memory segment's name.
+    SlotBytes : int
+        The size of one slot.
+    FreeSlots : int
+        How many slots are not taken right now.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self._segment = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._slot_bytes = slot_bytes
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+        # copies and close take turns, so the segment is never closed under a copy
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, frame: numpy.ndarray, timeout: float = None) -> FrameRef:
+        """
+        Copies frame into a free slot, waiting up to timeout seconds for one, and returns its FrameRef. Raises
+        queue.Empty on a timeout and RuntimeError once the ring is closed.
+        """
+
+        frame = numpy.asarray(frame)
+        if frame.nbytes > self._slot_bytes:
+            opr.error_pretty(ValueError, "OPR SharedRing", f"Frame of {frame.nbytes} bytes doesn't fit a {self._slot_bytes} byte slot!", "HUMAN ERROR")
+            raise ValueError("frame larger than the ring's slot_bytes")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("the SharedRing is closed")
+            try:
+                # short waits, so a writer notices close while every slot is taken
+                wait = 0.1 if deadline is None else min(0.1, max(deadline - time.monotonic(), 0))
+                slot = self._free.get(timeout=wait)
+                break
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+        offset = slot * self._slot_bytes
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("the SharedRing is closed")
+            target = numpy.ndarray(frame.shape, dtype=frame.dtype, buffer=self._segment.buf, offset=offset)
+            numpy.copyto(target, frame)
+            del target
+
+        return FrameRef(self._segment.name, slot, offset, frame.shape, frame.dtype.str)
+
+    def view(self, ref: FrameRef) -> numpy.ndarray:
+        return numpy.ndarray(ref.shape, dtype=ref.dtype, buffer=self._segment.buf, offset=ref.offset)
+
+    def release(self, ref: FrameRef) -> None:
+        self._free.put(ref.slot)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._segment.close()
+        self._segment.unlink()
+
+    @property
+    def Name(self) -> str:
+        return self._segment.name
+
+    @property
+    def SlotBytes(self) -> int:
+        return self._slot_bytes
+
+    @property
+    def FreeSlots(self) -> int:
+        return self._free.qsize()
@@ -0,0 +1,51 @@
+from concurrent.futures import Future
+from typing import Callable
+import threading
+import numpy
+import cv2
+
+
+def dummy_frame(width: int = 640, height: int = 480, channels: int = 4) -> numpy.ndarray:
+    """
+    A white frame with a few lines of black text, enough to drive a detector through its whole path
+    (pre-processing, inference, box extraction) when warming it up.
+    """
+
+    frame = numpy.full((height, width, channels), 255, dtype=numpy.uint8)
+    color = (0,) * min(channels, 3) + (255,) * max(channels - 3, 0)
+
+    for row, text in enumerate(("OPR Detect Recog", "warm up 0123456789", "ABCDEFGHIJKLMNOP")):
+        cv2.putText(frame, text, (20, 60 + row * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 2, cv2.LINE_AA)
+
+    return frame
+
+
+def dummy_line(width: int = 256, height: int = 48, channels: int = 3) -> numpy.ndarray:
+    """
+    A single cropped text line, shaped like what Detector.detect_and_crop hands to a recognizer: an RGB crop by
+    default, the same as the crops of an ordinary RGB or BGR frame.
+    """
+
+    line = numpy.full((height, width, channels), 255, dtype=numpy.uint8)
+    color = (0,) * min(channels, 3) + (255,) * max(channels - 3, 0)
+    cv2.putText(line, "warm up 123", (8, int(height * 0.7)), cv2.FONT_HERSHEY_SIMPLEX, height / 40, color, 2, cv2.LINE_AA)
+
+    return line
+
+
+def run_in_background(target: Callable, name: str) -> Future:
+    """
+    Runs target on a daemon thread and returns a Future that resolves to its return value (or exception).
+    """
+
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run() -> None:
+        try:
+            future.set_result(target())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
@@ -0,0 +1,230 @@
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.OnnxModel import create_session, find_file, input_shape
+from OPRDetectRecog.Interfaces.Detector import Detector
+import numpy
+import cv2
+
+
+# ImageNet statistics the DB models are trained with, applied to BGR pixels the way PaddleOCR does
+MEAN = numpy.array([0.485, 0.456, 0.406], dtype=numpy.float32)
+STD = numpy.array([0.229, 0.224, 0.225], dtype=numpy.float32)
+
+
+class onnx_db_detector(Detector):
+    """
+    Runs an exported DB (Differentiable Binarization) text detection model, such as PaddleOCR's det model converted
+    with paddle2onnx, through onnxruntime, on the CPU unless the ExecutionConfig finds an accelerator provider. Pre
+    and post-processing are done here with numpy and OpenCV, so neither PaddleOCR nor Paddle has to be installed.
+
+    Parameters
+    ----------
+    language : str, optional
+        Kept for the interface, DB detection does not depend on the script.
+    path : str, optional
+        The .onnx model, or a directory holding det.onnx, inference.onnx or a single .onnx file.
+    limit_side_len : int, optional
+        The longer side frames are shrunk to before detection, by default 960.
+    thresh : float, optional
+        The probability above which a pixel counts as text, by default 0.3.
+    box_thresh : float, optional
+        The mean probability a region needs to be kept, by default 0.6.
+    unclip_ratio : float, optional
+        How far regions are grown back out, DB predicts shrunk text kernels, by default 1.5.
+    max_candidates : int, optional
+        The most regions looked at per frame, by default 1000.
+    min_size : int, optional
+        The shortest side a region needs, in model pixels, by default 3.
+    """
+
+    def __init__(self, language=None, path=None, limit_side_len: int = 960, thresh: float = 0.3, box_thresh: float = 0.6,
+                 unclip_ratio: float = 1.5, max_candidates: int = 1000, min_size: int = 3):
+        super().__init__(language, path)
+
+        self._name = "onnx_db_detector"
+
+        self._limit_side_len = limit_side_len
+        self._thresh = thresh
+        self._box_thresh = box_thresh
+        self._unclip_ratio = unclip_ratio
+        self._max_candidates = max_candidates
+        self._min_size = min_size
+
+        self._input_name = None
+
+    def initialize(self, language=None, path=None, execution: ExecutionConfig = None) -> bool:
+        try:
+            super().initialize(language, path, execution)
+
+            self._detector = create_session(find_file(path, ("det.onnx", "inference.onnx"), ".onnx"), self._name, self._execution)
+            if self._detector is None:
+                return False
+
+            self._input_name, _ = input_shape(self._detector)
+
+        except KeyError:
+            return False
+        return True
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        languages = {
+            "english": "en",
+            "chinese_simplified": "ch",           # default if omitted
+            "chinese_traditional": "chinese_cht",
+            "japanese": "japan",
+            "korean": "korean",
+            "french": "french",
+            "german": "german",
+            "spanish": "spanish",
+            "portuguese": "portuguese",
+            "italian": "italian",
+            "russian": "russian",
+            "arabic": "arabic",
+            "turkish": "turkish",
+            "thai": "thai",
+            "hindi": "hindi",
+            "vietnamese": "vietnamese",
+            "persian": "persian",
+            "mongolian": "mongolian",
+            "kazakh": "kazakh",
+            "tamil": "tamil",
+            "telugu": "telugu",
+            "marathi": "marathi",
+            "bangla": "bangla",
+            "urdu": "urdu",
+            "romanian": "romanian",
+            "ukrainian": "ukrainian",
+            "greek": "greek",
+            "cyrillic": "cyrillic",               # includes Russian, Bulgarian, etc.
+            "serbian": "serbian",
+            "kannada": "kannada",
+            "malayalam": "malayalam",
+            "lao": "lao",
+            "burmese": "burmese",
+            "khmer": "khmer",
+            "nepali": "nepali",
+            "sinhalese": "sinhalese",
+            "sundanese": "sundanese",
+            "javanese": "javanese",
+            "hebrew": "hebrew",
+            "macedonian": "macedonian"
+        }
+
+        if as_dict:
+            return languages
+
+        return list(languages.keys())
+
+    def resize(self, image: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Shrinks image so its longer side is at most limit_side_len and both sides are multiples of 32, as the DB
+        backbone needs.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            The resized image, and the (x, y) factors that take its coordinates back to image's.
+        """
+
+        height, width = image.shape[:2]
+        scale = min(1.0, self._limit_side_len / max(height, width))
+
+        resized_height = max(32, int(round(height * scale / 32)) * 32)
+        resized_width = max(32, int(round(width * scale / 32)) * 32)
+
+        resized = cv2.resize(image, (resized_width, resized_height))
+        return resized, numpy.array([width / resized_width, height / resized_height], dtype=numpy.float32)
+
+    @staticmethod
+    def normalize(image: numpy.ndarray) -> numpy.ndarray:
+        """
+        HxWx3 uint8 pixels to the 1x3xHxW float32 blob the model takes, (pixel / 255 - mean) / std folded into one
+        multiply and one subtract.
+        """
+
+        blob = image.astype(numpy.float32)
+        blob *= 1.0 / (255.0 * STD)
+        blob -= MEAN / STD
+        return numpy.ascontiguousarray(blob.transpose(2, 0, 1)[numpy.newaxis])
+
+    def boxes_from_bitmap(self, probability: numpy.ndarray) -> numpy.ndarray:
+        """
+        Turns the model's probability map into boxes, in the map's coordinates.
+
+        Every connected text region is scored by its mean probability in one bincount over the whole map, rather
+        than by rasterizing each box on its own. Each kept region's minimum area rectangle is then grown by
+        area * unclip_ratio / perimeter on every side, which for a rectangle is what DB's polygon unclipping
+        amounts to, and its corners are built for all regions at once.
+
+        Returns
+        -------
+        numpy.ndarray
+            (N, 4, 2) float32 corners, in top-left, top-right, bottom-right, bottom-left order.
+        """
+
+        bitmap = (probability > self._thresh).astype(numpy.uint8)
+        contours, _ = cv2.findContours(bitmap, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = contours[:self._max_candidates]
+
+        if not contours:
+            return numpy.empty((0, 4, 2), dtype=numpy.float32)
+
+        count, labels = cv2.connectedComponents(bitmap, connectivity=8)
+        labels = labels.ravel()
+        sums = numpy.bincount(labels, weights=probability.ravel(), minlength=count)
+        scores = sums / numpy.maximum(numpy.bincount(labels, minlength=count), 1)
+
+        # any point of an outer contour lies on its own region
+        starts = numpy.array([contour[0, 0] for contour in contours])
+        region_scores = scores[labels.reshape(bitmap.shape)[starts[:, 1], starts[:, 0]]]
+
+        rects = [cv2.minAreaRect(contour) for contour in contours]
+        centers = numpy.array([rect[0] for rect in rects], dtype=numpy.float32)
+        sizes = numpy.array([rect[1] for rect in rects], dtype=numpy.float32)
+        theta = numpy.radians(numpy.array([rect[2] for rect in rects], dtype=numpy.float32))
+
+        keep = (sizes.min(axis=1) >= self._min_size) & (region_scores >= self._box_thresh)
+        centers, sizes, theta = centers[keep], sizes[keep], theta[keep]
+
+        distance = sizes[:, 0] * sizes[:, 1] * self._unclip_ratio / numpy.maximum(2 * sizes.sum(axis=1), 1e-6)
+        sizes = sizes + 2 * distance[:, numpy.newaxis]
+
+        keep = sizes.min(axis=1) >= self._min_size + 2
+        centers, sizes, theta = centers[keep], sizes[keep], theta[keep]
+
+        cos, sin = numpy.cos(theta), numpy.sin(theta)
+        u = numpy.stack([cos, sin], axis=1) * (sizes[:, 0:1] / 2)
+        v = numpy.stack([-sin, cos], axis=1) * (sizes[:, 1:2] / 2)
+
+        # u runs along the more horizontal side pointing right, v along the other pointing down
+        swap = (numpy.abs(u[:, 0]) < numpy.abs(v[:, 0]))[:, numpy.newaxis]
+        u, v = numpy.where(swap, v, u), numpy.where(swap, u, v)
+        u *= numpy.where(u[:, 0] < 0, -1, 1)[:, numpy.newaxis]
+        v *= numpy.where(v[:, 1] < 0, -1, 1)[:, numpy.newaxis]
+
+        return numpy.stack([centers - u - v, centers + u - v, centers + u + v, centers - u + v], axis=1).astype(numpy.float32)
+
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
+        image = as_frame(frame).get("BGR")
+        height, width = image.shape[:2]
+
+        resized, ratio = self.resize(image)
+        probability = self._detector.run(None, {self._input_name: self.normalize(resized)})[0][0, 0]
+
+        points = self.boxes_from_bitmap(probability) * ratio
+        points[..., 0] = numpy.clip(points[..., 0], 0, width - 1)
+        points[..., 1] = numpy.clip(points[..., 1], 0, height - 1)
+
+        return QuadBoxArray(points)
+
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        boxes = self.detect(fr)
+
+        return self.crop_boxes(fr, boxes)
+
+
+def get_detector() -> Detector:
+    return onnx_db_detector()
@@ -1,4 +1,7 @@
-from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
 from OPRDetectRecog.Interfaces.Detector import Detector
 import numpy
 import os
@@ -11,9 +14,9 @@ class paddleocr_detector(Detector):
         
         self._name = "paddleocr_detector"
         
-    def initialize(self, language=None, path = None) -> bool:
+    def initialize(self, language=None, path = None, execution: ExecutionConfig = None) -> bool:
         try:
-            super().initialize(language, path)
+            super().initialize(language, path, execution)
             
             from paddleocr import PaddleOCR
 
@@ -21,7 +24,8 @@ class paddleocr_detector(Detector):
             """
             Notes! 
 
-            You should probably play around with these parameters. These are just the ones that work the best on my machine. However, use_angle_cls is a must for detection
+            You should probably play around with these parameters. These are just the ones that work the best on my machine. However, use_angle_cls is a must for detection.
+            Device and threads come from the ExecutionConfig, which falls back to the CPU when Paddle has no GPU to use.
             """
 
             if path is not None and os.path.exists(path):
@@ -30,7 +34,7 @@ class paddleocr_detector(Detector):
                     lang=self._language,
                     use_angle_cls=True, 
                     rec_model_dir=path, 
-                    use_gpu = True
+                    **self._execution.paddle_options(self._name)
                 )
 
             else:
@@ -38,8 +42,7 @@ class paddleocr_detector(Detector):
                     show_log=False,
                     lang=self._language,
                     use_angle_cls=True, 
-                    providers = ['DmlExecutionProvider'], 
-                    use_gpu = True
+                    **self._execution.paddle_options(self._name)
                 )
 
         except KeyError:
@@ -95,39 +98,19 @@ class paddleocr_detector(Detector):
 
         return list(paddle_langs.keys())
     
-    def detect(self, frame: numpy.ndarray) -> list[QuadBox]:
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
 
-        img = self._detector.ocr(frame, rec=False, cls=True, det=True)
+        # PaddleOCR treats arrays as BGR, like cv2.imread gives them
+        img = self._detector.ocr(as_frame(frame).get("BGR"), rec=False, cls=True, det=True)
 
-        processed_results = []
-        
-        for i in img[0]:
-            bbox = [i[0], i[1], i[2], i[3]]     
-
-            result = QuadBox(bbox)
-
-            processed_results.append(result)
-
-        return processed_results
+        return QuadBoxArray.from_paddle(img[0])
     
 
-    def detect_and_crop(self, frame):
-        fr = numpy.array(frame)
-        img = self._detector.ocr(fr, rec=False, cls=True, det=True)
-
-        cropped_results = []
-
-        for i in img[0]:
-            bbox = [i[0], i[1], i[2], i[3]]
-            
-            result = QuadBox(bbox)
-
-            warped, pil_image = self.crop_rotated_box(fr, result.Points)
-
-
-            cropped_results.append((result, warped, pil_image))
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        boxes = self.detect(fr)
 
-        return cropped_results
+        return self.crop_boxes(fr, boxes)
     
 def get_detector() -> Detector:
     return paddleocr_detector()
\ No newline at end of file
@@ -0,0 +1,72 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.BoxGrouping import BoxGroups, group_boxes
+import numpy
+
+
+class GroupingDetector(Detector):
+    """
+    Wraps a detector so that fragments of the same line, or of the same paragraph or speech bubble, come out as a
+    single box, and each one is cropped and recognized once instead of piece by piece.
+
+    detect returns the merged boxes, so GroupingDetector drops into any code that takes a Detector. detect_groups
+    also returns which detected boxes every merged box contains, for callers that need to map text back.
+
+    Parameters
+    ----------
+    detector : Detector
+        The initialized detector whose boxes are grouped.
+    mode : str, optional
+        "line" or "block", see group_boxes, by default "line".
+    **options
+        Thresholds passed on to group_boxes, e.g. direction, max_gap or max_angle.
+    """
+
+    def __init__(self, detector: Detector, mode: str = "line", **options):
+        super().__init__(detector._language, detector._path)
+
+        self._inner = detector
+        # its own engine label, so instrumentation doesn't count the wrapped detector's calls twice
+        self._name = f"grouping:{detector.Name}"
+        self._crop_engine = detector.Cropper
+
+        self._mode = mode
+        self._options = options
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        return self._inner.get_supported_languages(as_dict)
+
+    def initialize(self, language: str = None, path: str = None, execution: ExecutionConfig = None) -> bool:
+        result = self._inner.initialize(language, path, execution)
+        self._execution = self._inner.Execution
+        return result
+
+    def detect_groups(self, frame: numpy.ndarray) -> BoxGroups:
+        """
+        Detects with the wrapped detector and groups the result.
+
+        Returns
+        -------
+        BoxGroups
+            The merged boxes in reading order, the boxes the wrapped detector found, and which of them each merged
+            box contains.
+        """
+        return group_boxes(self._inner.detect(frame), self._mode, **self._options)
+
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
+        return self.detect_groups(frame).Boxes
+
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        return self.crop_boxes(fr, self.detect(fr))
+
+    @property
+    def Detector(self) -> Detector:
+        return self._inner
+
+    @property
+    def Mode(self) -> str:
+        return self._mode
@@ -0,0 +1,237 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import Frame, as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.BoxGrouping import connected_components
+import numpy
+import cv2
+
+
+class IncrementalDetector(Detector):
+    """
+    Wraps a detector for video and screen capture, where consecutive frames are mostly identical.
+
+    Each frame is compared with the previous one block by block. Only the blocks that changed, grown by a margin so
+    text crossing a block edge isn't cut, and grown again to cover every previous box they touch, are sent to the
+    wrapped detector. Boxes found there replace the previous boxes inside those regions, and every other box from
+    the previous frame is kept as is. A frame that didn't change at all costs a single diff; a frame where most of
+    the screen changed falls back to full detection.
+
+    Parameters
+    ----------
+    detector : Detector
+        The initialized detector to run on the changed regions.
+    block_size : int, optional
+        The side of the square blocks frames are compared in, in pixels, by default 32.
+    pixel_threshold : int, optional
+        How much a channel must change for a pixel to count as changed, which ignores capture noise, by default 12.
+    margin : int, optional
+        How far changed regions are grown before detection, in pixels, by default 24.
+    full_frame_ratio : float, optional
+        Above this fraction of changed blocks, the whole frame is detected instead, by default 0.5.
+
+    Properties
+    ----------
+    DirtyRatio : float
+        The fraction of blocks that changed in the last frame.
+    FullDetections, PartialDetections, SkippedDetections : int
+        How many frames were fully detected, partially detected, and served entirely from the previous frame.
+    """
+
+    def __init__(self, detector: Detector, block_size: int = 32, pixel_threshold: int = 12, margin: int = 24, full_frame_ratio: float = 0.5):
+        super().__init__(detector._language, detector._path)
+
+        self._inner = detector
+        # its own engine label, so instrumentation doesn't count the wrapped detector's calls twice
+        self._name = f"incremental:{detector.Name}"
+        self._crop_engine = detector.Cropper
+
+        self._block_size = block_size
+        self._pixel_threshold = pixel_threshold
+        self._margin_blocks = -(-margin // block_size)
+        self._full_frame_ratio = full_frame_ratio
+
+        self._previous_frame = None
+        self._previous_boxes = None
+        self._dirty_ratio = 1.0
+        self._full = 0
+        self._partial = 0
+        self._skipped = 0
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        return self._inner.get_supported_languages(as_dict)
+
+    def initialize(self, language: str = None, path: str = None, execution: ExecutionConfig = None) -> bool:
+        self.reset()
+        result = self._inner.initialize(language, path, execution)
+        self._execution = self._inner.Execution
+        return result
+
+    def reset(self) -> None:
+        """
+        Forgets the previous frame, so the next one is fully detected.
+        """
+        self._previous_frame = None
+        self._previous_boxes = None
+
+    def dirty_blocks(self, frame: numpy.ndarray) -> numpy.ndarray:
+        """
+        Compares frame with the previous frame and returns a boolean grid with one cell per block.
+        """
+
+        diff = cv2.absdiff(frame, self._previous_frame)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+
+        block = self._block_size
+        height, width = diff.shape
+        rows, columns = -(-height // block), -(-width // block)
+
+        changed = numpy.zeros((rows * block, columns * block), dtype=bool)
+        changed[:height, :width] = diff > self._pixel_threshold
+
+        return changed.reshape(rows, block, columns, block).any(axis=(1, 3))
+
+    def dirty_regions(self, dirty: numpy.ndarray, height: int, width: int) -> list[tuple[int, int, int, int]]:
+        """
+        Grows the dirty blocks by the margin and merges touching ones into pixel rectangles (x0, y0, x1, y1).
+        """
+
+        size = 2 * self._margin_blocks + 1
+        grown = cv2.dilate(dirty.astype(numpy.uint8), numpy.ones((size, size), dtype=numpy.uint8))
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+
+        block = self._block_size
+        regions = []
+        for x, y, w, h, _ in stats[1:count]:
+            regions.append((int(x * block), int(y * block), int(min((x + w) * block, width)), int(min((y + h) * block, height))))
+
+        return regions
+
+    @staticmethod
+    def overlapping(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+        """
+        Which (x0, y0, x1, y1) rectangles of a overlap which of b, as an len(a) x len(b) boolean matrix.
+        """
+        return ((a[:, None, 0] < b[None, :, 2]) & (a[:, None, 2] > b[None, :, 0]) &
+                (a[:, None, 1] < b[None, :, 3]) & (a[:, None, 3] > b[None, :, 1]))
+
+    def cover_boxes(self, regions: list[tuple[int, int, int, int]], height: int, width: int) -> list[tuple[int, int, int, int]]:
+        """
+        Grows every region to the union of itself and the previous boxes it overlaps, merging regions that come to
+        overlap, until nothing changes. Otherwise an unchanged long line reaching into a small changed area would be
+        re-detected from only the part inside the region and come back truncated, or not at all.
+        """
+
+        bounds = self._previous_boxes.Bounds
+        rects = numpy.array(regions, dtype=numpy.float32)
+
+        while True:
+            touched = self.overlapping(bounds, rects)
+
+            grown = rects.copy()
+            grown[:, 0] = numpy.minimum(rects[:, 0], numpy.where(touched, bounds[:, 0:1], numpy.inf).min(axis=0, initial=numpy.inf))
+            grown[:, 1] = numpy.minimum(rects[:, 1], numpy.where(touched, bounds[:, 1:2], numpy.inf).min(axis=0, initial=numpy.inf))
+            grown[:, 2] = numpy.maximum(rects[:, 2], numpy.where(touched, bounds[:, 2:3], -numpy.inf).max(axis=0, initial=-numpy.inf))
+            grown[:, 3] = numpy.maximum(rects[:, 3], numpy.where(touched, bounds[:, 3:4], -numpy.inf).max(axis=0, initial=-numpy.inf))
+
+            # regions that now overlap are detected as one, so nothing is found twice
+            i, j = numpy.nonzero(numpy.triu(self.overlapping(grown, grown), k=1))
+            labels = connected_components(len(grown), i, j)
+            _, labels = numpy.unique(labels, return_inverse=True)
+
+            merged = numpy.empty((labels.max() + 1, 4), dtype=numpy.float32)
+            merged[:, :2] = numpy.inf
+            merged[:, 2:] = -numpy.inf
+            numpy.minimum.at(merged[:, 0], labels, grown[:, 0])
+            numpy.minimum.at(merged[:, 1], labels, grown[:, 1])
+            numpy.maximum.at(merged[:, 2], labels, grown[:, 2])
+            numpy.maximum.at(merged[:, 3], labels, grown[:, 3])
+
+            if merged.shape == rects.shape and numpy.array_equal(merged, rects):
+                break
+            rects = merged
+
+        x0 = numpy.clip(numpy.floor(rects[:, 0]), 0, width).astype(int)
+        y0 = numpy.clip(numpy.floor(rects[:, 1]), 0, height).astype(int)
+        x1 = numpy.clip(numpy.ceil(rects[:, 2]), 0, width).astype(int)
+        y1 = numpy.clip(numpy.ceil(rects[:, 3]), 0, height).astype(int)
+        return [tuple(map(int, rect)) for rect in zip(x0, y0, x1, y1)]
+
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
+        fr = as_frame(frame)
+        pixels = fr.Array
+
+        if self._previous_frame is None or self._previous_frame.shape != pixels.shape:
+            return self.detect_full(fr)
+
+        dirty = self.dirty_blocks(pixels)
+        self._dirty_ratio = float(dirty.mean())
+
+        if not dirty.any():
+            self._skipped += 1
+            return self._previous_boxes
+
+        if self._dirty_ratio > self._full_frame_ratio:
+            return self.detect_full(fr)
+
+        height, width = pixels.shape[:2]
+        regions = self.dirty_regions(dirty, height, width)
+        if len(self._previous_boxes):
+            regions = self.cover_boxes(regions, height, width)
+
+        found = [self._inner.detect(Frame(numpy.ascontiguousarray(pixels[y0:y1, x0:x1]), fr.Space)).translate(x0, y0) for x0, y0, x1, y1 in regions]
+
+        # previous boxes touching a re-detected region, now wholly inside it, are replaced by whatever was found there
+        rects = numpy.array(regions, dtype=numpy.float32)
+        overlaps = self.overlapping(self._previous_boxes.Bounds, rects).any(axis=1)
+
+        boxes = QuadBoxArray.concatenate([self._previous_boxes[~overlaps]] + found)
+
+        self._partial += 1
+        self.remember(pixels, boxes)
+        return boxes
+
+    def detect_full(self, frame: Frame) -> QuadBoxArray:
+        self._dirty_ratio = 1.0
+        self._full += 1
+
+        boxes = self._inner.detect(frame)
+        self.remember(frame.Array, boxes)
+        return boxes
+
+    def remember(self, frame: numpy.ndarray, boxes: QuadBoxArray) -> None:
+        # capture loops often reuse their frame buffer, so keep a copy
+        if self._previous_frame is not None and self._previous_frame.shape == frame.shape:
+            numpy.copyto(self._previous_frame, frame)
+        else:
+            self._previous_frame = frame.copy()
+        self._previous_boxes = boxes
+
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        boxes = self.detect(fr)
+
+        return self.crop_boxes(fr, boxes)
+
+    @property
+    def Detector(self) -> Detector:
+        return self._inner
+
+    @property
+    def DirtyRatio(self) -> float:
+        return self._dirty_ratio
+
+    @property
+    def FullDetections(self) -> int:
+        return self._full
+
+    @property
+    def PartialDetections(self) -> int:
+        return self._partial
+
+    @property
+    def SkippedDetections(self) -> int:
+        return self._skipped
@@ -1,10 +1,32 @@
 from abc import ABC, abstractmethod
 import cv2
 import numpy 
-from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CropEngine, CroppedBox, to_pil
+from OPRDetectRecog.Custom.Frame import Frame, as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.Warmup import dummy_frame, run_in_background
+from OPRDetectRecog.Custom.Instrumentation import Instrumentation, instrumented, instrument_subclass
+from OperaPowerRelay import opr
+from concurrent.futures import Future
+import threading
+import time
 from PIL import Image
 
 
+def record_boxes(instrumentation: Instrumentation, engine: str, args: tuple, result: QuadBoxArray) -> None:
+    instrumentation.record("histogram", "opr_boxes_per_frame", {"engine": engine}, len(result))
+
+
+def record_crop_pixels(instrumentation: Instrumentation, engine: str, args: tuple, result: list[CroppedBox]) -> None:
+    pixels = sum(crop.Array.shape[0] * crop.Array.shape[1] for crop in result)
+    instrumentation.record("counter", "opr_crop_pixels_total", {"engine": engine}, pixels)
+
+
+def record_rotated_crop_pixels(instrumentation: Instrumentation, engine: str, args: tuple, result: tuple) -> None:
+    instrumentation.record("counter", "opr_crop_pixels_total", {"engine": engine}, result[0].shape[0] * result[0].shape[1])
+
+
 class Detector(ABC):
     """
     Detector Interface
@@ -27,10 +49,16 @@ class Detector(ABC):
 
     Methods
     -------
-    detect(frame: numpy.ndarray) -> list[QuadBox]
-        Detects objects or text within a given frame and returns a list of detected results.
-    detect_and_crop(frame: numpy.ndarray) -> list[tuple[QuadBox, numpy.ndarray, Image.Image]]
+    detect(frame: numpy.ndarray) -> QuadBoxArray
+        Detects objects or text within a given frame and returns all detected boxes in a single QuadBoxArray.
+    detect_and_crop(frame: numpy.ndarray) -> list[CroppedBox]
         Detects objects or text within a given frame, crops the detected regions, and returns a list of cropped results.
+    crop_boxes(image: Frame | numpy.ndarray, boxes: QuadBoxArray) -> list[CroppedBox]
+        Crops every box of a frame at once through the detector's CropEngine.
+
+    Frames may be given as anything Frame.as_frame accepts: PIL images, numpy arrays (taken as RGB order),
+    Frames with an explicit colour space, encoded bytes or paths. Plugins call as_frame once and ask the Frame for
+    the colour space their engine wants, so an input is copied or converted at most once.
 
     """
     def __init__(self, language: str = None, path: str = None):
@@ -38,22 +66,102 @@ class Detector(ABC):
         self._path = path or None
         self._name = None
         self._detector = None
+        self._crop_engine = CropEngine()
+        self._execution = ExecutionConfig()
+        self._ready = threading.Event()
+        self._loaded = False
+        self._timings = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # time every plugin's detection methods, this is a no-op while instrumentation is disabled
+        instrument_subclass(cls, {"detect": record_boxes, "detect_and_crop": None})
 
     @abstractmethod
     def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
         pass
     
-    def initialize(self, language: str=None, path: str = None) -> bool:
+    def initialize(self, language: str=None, path: str = None, execution: ExecutionConfig = None) -> bool:
         if not language:
             language = "chinese_simplified"    
         self._language = self.get_supported_languages(as_dict=True)[language]
         self._path = path
+        self.configure(execution)
+
+    def configure(self, execution: ExecutionConfig = None) -> None:
+        """
+        Keeps execution, by default ExecutionConfig() which picks the best device, for the plugin to translate into
+        its engine's settings, and applies its process-wide parts.
+        """
+        self._execution = execution or ExecutionConfig()
+        self._execution.apply()
+
+    def initialize_async(self, language: str = None, path: str = None, warmup: bool = True, execution: ExecutionConfig = None) -> Future:
+        """
+        Initializes the detector on a background thread, so the caller can keep going while the model loads.
+
+        Parameters
+        ----------
+        language : str, optional
+            Passed on to initialize.
+        path : str, optional
+            Passed on to initialize.
+        warmup : bool, optional
+            Whether to run a dummy detection once the model is loaded, so that one-time costs like graph building
+            and kernel selection are paid before the first real frame, by default True.
+        execution : ExecutionConfig, optional
+            Passed on to initialize.
+
+        Returns
+        -------
+        Future
+            Resolves to initialize's result once the detector (and its warm-up) is done. Ready and
+            wait_until_ready can be used instead.
+        """
+
+        self._ready.clear()
+        self._loaded = False
+
+        def load() -> bool:
+            # the event only says loading is over, _loaded whether it worked, so waiters never hang on a failure
+            try:
+                start = time.perf_counter()
+                result = self.initialize(language, path, execution=execution)
+                self._timings["load"] = time.perf_counter() - start
+
+                if warmup and result:
+                    self.warmup()
+
+                self._loaded = bool(result)
+                return result
+            finally:
+                self._ready.set()
+                opr.print_from(f"OPR Detector | {self._name}", ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self._timings.items()))
+
+        return run_in_background(load, f"OPRDetectRecog-init-{self._name}")
+
+    def warmup(self, frame: numpy.ndarray = None) -> float:
+        """
+        Runs one detection on a generated dummy frame (or the given one) and returns how long it took.
+        """
+        start = time.perf_counter()
+        self.detect_and_crop(dummy_frame() if frame is None else frame)
+        self._timings["warmup"] = time.perf_counter() - start
+        return self._timings["warmup"]
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """
+        Waits for initialize_async to finish and returns whether the plugin loaded, False on a timeout, a failed
+        initialize or an exception.
+        """
+        return self._ready.wait(timeout) and self._loaded
 
 
     @abstractmethod
-    def detect(self, frame: numpy.ndarray) -> list[QuadBox]:
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
         """
-        Detects objects or text within a given frame and returns a list of detected results.
+        Detects objects or text within a given frame and returns all detected results.
 
         Parameters
         ----------
@@ -62,14 +170,14 @@ class Detector(ABC):
 
         Returns
         -------
-        list[QuadBox]
-            A list of QuadBox instances containing bounding box information.
+        QuadBoxArray
+            Every detected box of the frame, iterating or indexing it yields QuadBox views.
         """
 
         pass
 
     @abstractmethod
-    def detect_and_crop(self, frame: numpy.ndarray) -> list[tuple[QuadBox, numpy.ndarray, Image.Image]]:
+    def detect_and_crop(self, frame: numpy.ndarray) -> list[CroppedBox]:
         """
         Detects objects or text within a given frame, crops the detected regions, and returns a list of cropped results.
 
@@ -80,29 +188,53 @@ class Detector(ABC):
 
         Returns
         -------
-        list[tuple[QuadBox, numpy.ndarray, Image.Image]]
-            A list of tuples containing a QuadBox instance with bounding box information, a numpy array of the cropped image, 
-            and a PIL Image object of the cropped image.
+        list[CroppedBox]
+            One CroppedBox per detected box, holding the QuadBox, the cropped numpy array and, built only when
+            asked for, a PIL Image of the crop. Each one still unpacks like a (QuadBox, numpy.ndarray, Image.Image) tuple.
         """
         pass
 
-    def crop_rotated_box(self, image: numpy.ndarray, box: list[list[float]]) -> tuple[numpy.ndarray, Image.Image]:
+    @instrumented("crop_boxes", record_crop_pixels)
+    def crop_boxes(self, image: Frame | numpy.ndarray, boxes: QuadBoxArray) -> list[CroppedBox]:
+        """
+        Crops every box of a frame at once.
+
+        Nearly axis-aligned boxes come back as zero-copy slices of image and the rest are warped into buffers that
+        are reused across frames, see CropEngine. Use crop_rotated_box for one-off crops that must own their pixels.
+
+        Parameters
+        ----------
+        image : Frame | numpy.ndarray
+            The image to crop from, a bare array being taken as RGB order.
+        boxes : QuadBoxArray
+            The boxes to crop, usually straight from detect.
+
+        Returns
+        -------
+        list[CroppedBox]
+            One CroppedBox per box, in the same order as boxes.
+        """
+        return self._crop_engine.crop(image, boxes)
+
+    @instrumented("crop_rotated_box", record_rotated_crop_pixels)
+    def crop_rotated_box(self, image: Frame | numpy.ndarray, box: list[list[float]]) -> tuple[numpy.ndarray, Image.Image]:
         """
         Crops a rotated box from an image.
 
         Parameters
         ----------
-        image : numpy.ndarray
-            The image to crop from.
+        image : Frame | numpy.ndarray
+            The image to crop from, a bare array being taken as RGB order.
         box : list[list[float]]
             The 4 points of the box in the order of top-left, top-right, bottom-right, bottom-left.
 
         Returns
         -------
         tuple[numpy.ndarray, Image.Image]
-            A tuple containing the cropped numpy array and a PIL Image object.
+            A tuple containing the cropped numpy array, in the image's colour space, and an RGB PIL Image object.
         """
-        pts = numpy.array(box).astype(numpy.float32)
+        frame = as_frame(image)
+        pts = numpy.asarray(box, dtype=numpy.float32)
 
         width = int(max(numpy.linalg.norm(pts[0] - pts[1]), numpy.linalg.norm(pts[2] - pts[3])))
         height = int(max(numpy.linalg.norm(pts[0] - pts[3]), numpy.linalg.norm(pts[1] - pts[2])))
@@ -110,12 +242,33 @@ class Detector(ABC):
         dst = numpy.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=numpy.float32)
         M = cv2.getPerspectiveTransform(pts, dst)
 
-        warped = cv2.warpPerspective(image, M, (width, height))
+        warped = cv2.warpPerspective(frame.Array, M, (width, height))
+
+        # the frame's own colour space decides the conversion, RGB input used to be channel-swapped here
+        pil_image = to_pil(warped, frame.Space)
 
-        pil_image = Image.fromarray(cv2.cvtColor(warped, cv2.COLOR_BGR2RGB)).convert("RGB")
-        
         return warped, pil_image
     
+    @property
+    def Ready(self) -> bool:
+        return self._ready.is_set() and self._loaded
+
+    @property
+    def StartupTimings(self) -> dict[str, float]:
+        return dict(self._timings)
+
+    @property
+    def Cropper(self) -> CropEngine:
+        return self._crop_engine
+
+    @Cropper.setter
+    def Cropper(self, engine: CropEngine) -> None:
+        self._crop_engine = engine
+
+    @property
+    def Execution(self) -> ExecutionConfig:
+        return self._execution
+
     @property
     def Name(self) -> str:
         return self._name
\ No newline at end of file
@@ -3,27 +3,138 @@ from abc import ABC, abstractmethod
 from PIL import Image
 from OPRDetectRecog.Custom.Quadbox import QuadBox
 from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.CropEngine import to_pil
+from OPRDetectRecog.Custom.Frame import RGB_ORDER, as_frame, convert
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.Warmup import dummy_line, run_in_background
+from OPRDetectRecog.Custom.Instrumentation import Instrumentation, instrumented, instrument_subclass
+from concurrent.futures import Future
+import threading
+import numpy
+import time
+
+def record_crop(instrumentation: Instrumentation, engine: str, args: tuple, result: list[LinguistResult]) -> None:
+    instrumentation.record("counter", "opr_recognized_crops_total", {"engine": engine}, 1)
+
+
+def record_crops(instrumentation: Instrumentation, engine: str, args: tuple, result: list[list[LinguistResult]]) -> None:
+    instrumentation.record("counter", "opr_recognized_crops_total", {"engine": engine}, len(args[0]))
+
 
 class Recognizer(ABC):
     
-    def __init__(self, language: str=None, tolerance: float=None, path: str=None):
+    def __init__(self, language: str=None, tolerance: float=None, path: str=None, max_batch_size: int=None):
         self._language = language or None
         self._tolerance = tolerance or None
         self._path = path or None
         self._name = None
         self._recognizer = None
+        self._max_batch_size = max_batch_size or 16
+        self._execution = ExecutionConfig()
+
+        # which form of a CroppedBox the recognizer consumes, "pil" or "numpy", so only that one gets built
+        self._input_format = "pil"
+
+        self._ready = threading.Event()
+        self._loaded = False
+        self._timings = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # time every plugin's recognition methods, this is a no-op while instrumentation is disabled
+        instrument_subclass(cls, {"recognize": record_crop, "recognize_batch": record_crops})
 
 
     @abstractmethod
     def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
         pass
 
-    def initialize(self, language: str = None, tolerance: float=None, path: str=None) -> bool:
+    def initialize(self, language: str = None, tolerance: float=None, path: str=None, execution: ExecutionConfig = None) -> bool:
         if not language:
             language = "chinese_simplified"    
         self._language = self.get_supported_languages(as_dict=True)[language] 
         self._tolerance = tolerance or None
         self._path = path or None
+        self.configure(execution)
+
+    def configure(self, execution: ExecutionConfig = None) -> None:
+        """
+        Keeps execution, by default ExecutionConfig() which picks the best device, for the plugin to translate into
+        its engine's settings, and applies its process-wide parts.
+        """
+        self._execution = execution or ExecutionConfig()
+        self._execution.apply()
+
+    def initialize_async(self, language: str = None, tolerance: float = None, path: str = None, warmup: bool = True, execution: ExecutionConfig = None) -> Future:
+        """
+        Initializes the recognizer on a background thread, so the caller can keep going while the model loads.
+
+        Parameters
+        ----------
+        language : str, optional
+            Passed on to initialize.
+        tolerance : float, optional
+            Passed on to initialize.
+        path : str, optional
+            Passed on to initialize.
+        warmup : bool, optional
+            Whether to recognize a dummy text line once the model is loaded, so that lazy weight loading and
+            kernel selection are paid before the first real request, by default True.
+        execution : ExecutionConfig, optional
+            Passed on to initialize.
+
+        Returns
+        -------
+        Future
+            Resolves to initialize's result once the recognizer (and its warm-up) is done. Ready and
+            wait_until_ready can be used instead.
+        """
+
+        self._ready.clear()
+        self._loaded = False
+
+        def load() -> bool:
+            # the event only says loading is over, _loaded whether it worked, so waiters never hang on a failure
+            try:
+                start = time.perf_counter()
+                result = self.initialize(language, tolerance=tolerance, path=path, execution=execution)
+                self._timings["load"] = time.perf_counter() - start
+
+                if warmup and result:
+                    self.warmup()
+
+                self._loaded = bool(result)
+                return result
+            finally:
+                self._ready.set()
+                opr.print_from(f"OPR Recognizer | {self._name}", ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self._timings.items()))
+
+        return run_in_background(load, f"OPRDetectRecog-init-{self._name}")
+
+    def warmup(self, line: numpy.ndarray = None) -> float:
+        """
+        Recognizes a full batch of generated dummy text lines (or the given one) and returns how long it took.
+        """
+        line = as_frame(dummy_line() if line is None else line)
+        height, width = line.Shape[:2]
+
+        # the same layout and mode real crops arrive in, see CroppedBox.get
+        frame = convert(line.Array, line.Space, RGB_ORDER[line.Space]) if self._input_format == "numpy" else to_pil(line.Array, line.Space)
+
+        bbox = QuadBox([(0, 0), (width, 0), (width, height), (0, height)], padding=0)
+
+        start = time.perf_counter()
+        self.recognize_batch([frame] * self._max_batch_size, [bbox] * self._max_batch_size)
+        self._timings["warmup"] = time.perf_counter() - start
+        return self._timings["warmup"]
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """
+        Waits for initialize_async to finish and returns whether the plugin loaded, False on a timeout, a failed
+        initialize or an exception.
+        """
+        return self._ready.wait(timeout) and self._loaded
 
 
     @abstractmethod 
@@ -54,6 +165,68 @@ class Recognizer(ABC):
 
         pass
 
+    @instrumented("recognize_batch")
+    def recognize_batch(self, frames: list[Image.Image], bboxes: list[QuadBox]) -> list[list[LinguistResult]]:
+        """
+        Recognizes text within many cropped frames at once.
+
+        Recognizers that can run batched inference should override this, the default
+        falls back to calling recognize once per frame. Frames are sent to the model in
+        chunks of at most MaxBatchSize.
+
+        Parameters
+        ----------
+        frames : list[Image.Image]
+            The cropped image frames to process, usually from Detector.detect_and_crop.
+        bboxes : list[QuadBox]
+            The bounding boxes matching each frame, in the same order.
+
+        Returns
+        -------
+        list[list[LinguistResult]]
+            One list of LinguistResult objects per input frame, in input order.
+        """
+
+        self.validate_batch(frames, bboxes)
+        return [self.recognize(frame, bbox) for frame, bbox in zip(frames, bboxes)]
+
+    def validate_batch(self, frames: list, bboxes: list[QuadBox]) -> None:
+        if len(frames) != len(bboxes):
+            opr.error_pretty(ValueError, f"OPR Recognizer | {self._name}", f"Got {len(frames)} frames but {len(bboxes)} boxes!", "HUMAN ERROR")
+            raise ValueError("recognize_batch needs one QuadBox per frame")
+
+    def batch_slices(self, count: int) -> list[slice]:
+        """
+        Splits count items into consecutive slices no larger than MaxBatchSize.
+        """
+        return [slice(start, min(start + self._max_batch_size, count)) for start in range(0, count, self._max_batch_size)]
+
+
+    @property
+    def Ready(self) -> bool:
+        return self._ready.is_set() and self._loaded
+
+    @property
+    def StartupTimings(self) -> dict[str, float]:
+        return dict(self._timings)
+
+    @property
+    def InputFormat(self) -> str:
+        return self._input_format
+
+    @property
+    def MaxBatchSize(self) -> int:
+        return self._max_batch_size
+
+    @MaxBatchSize.setter
+    def MaxBatchSize(self, value: int) -> None:
+        if value < 1:
+            raise ValueError("MaxBatchSize must be at least 1")
+        self._max_batch_size = int(value)
+
+    @property
+    def Execution(self) -> ExecutionConfig:
+        return self._execution
 
     @property
     def Name(self) -> str:
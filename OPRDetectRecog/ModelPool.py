@@ -0,0 +1,257 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Registry import PluginRegistry, DETECTORS, RECOGNIZERS
+from OperaPowerRelay import opr
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable
+import threading
+import time
+import sys
+import gc
+import os
+
+
+def current_rss() -> int:
+    """
+    The resident set size of this process in bytes, or 0 when it can't be read.
+    """
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+class PoolEntry:
+
+    __slots__ = ("plugin", "size", "load_time", "hits")
+
+    def __init__(self, plugin: Detector | Recognizer, size: int, load_time: float):
+        self.plugin = plugin
+        self.size = size
+        self.load_time = load_time
+        self.hits = 0
+
+
+
+class ModelPool:
+    """
+    Keeps several initialized detectors and recognizers resident, keyed by (engine, language, model path), so that
+    switching back to a language that was already loaded is a dictionary lookup instead of a model reload.
+
+    Every plugin instance owns exactly one initialized engine, so instead of re-initializing a shared instance the
+    pool hands out a separate instance per key. When the estimated memory of all resident engines goes over the
+    budget, the least recently used ones are dropped.
+
+    The memory of an engine is estimated as the growth of the process RSS while it was initialized, unless a
+    size_estimator is given.
+
+    Parameters
+    ----------
+    budget_bytes : int | None, optional
+        The most memory the resident engines may use, by default None for no limit.
+    max_entries : int | None, optional
+        The most engines kept resident at once, by default None for no limit.
+    size_estimator : Callable[[Detector | Recognizer], int] | None, optional
+        Returns the size in bytes of an initialized plugin, by default the RSS growth during initialize.
+
+    Properties
+    ----------
+    Hits, Misses, Evictions : int
+        Counters for lookups served from the pool, lookups that had to load an engine, and engines dropped.
+    ResidentBytes : int
+        The estimated memory of every resident engine.
+    """
+
+    def __init__(self, budget_bytes: int = None, max_entries: int = None, size_estimator: Callable = None):
+        self._budget_bytes = budget_bytes
+        self._max_entries = max_entries
+        self._size_estimator = size_estimator
+
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def detector(self, name: str, language: str = None, path: str = None) -> Detector:
+        return self.get(DETECTORS, name, language, path)
+
+    def recognizer(self, name: str, language: str = None, path: str = None, tolerance: float = None) -> Recognizer:
+        return self.get(RECOGNIZERS, name, language, path, tolerance=tolerance)
+
+    def get(self, registry: PluginRegistry, name: str, language: str = None, path: str = None, **kwargs) -> Detector | Recognizer:
+        """
+        Returns an initialized plugin for (name, language, path), loading it only if it isn't resident.
+
+        Loads happen outside the pool's lock, so lookups of resident engines never wait on another language loading,
+        and concurrent callers asking for the same key wait for that one load instead of starting their own.
+
+        Parameters
+        ----------
+        registry : PluginRegistry
+            Where the plugin comes from, DETECTORS or RECOGNIZERS.
+        name : str
+            The plugin name, e.g. "paddleocr_detector".
+        language : str, optional
+            The language to initialize the plugin with.
+        path : str, optional
+            The model path to initialize the plugin with.
+
+        Returns
+        -------
+        Detector | Recognizer
+            The initialized plugin.
+        """
+
+        key = self.key(name, language, path, **kwargs)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self._hits += 1
+                return entry.plugin
+
+            # somebody else is already loading this key, wait for their engine instead of loading a second one
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if not owner:
+            return loading.result()
+
+        # loads run outside the lock so lookups of resident engines never wait on them
+        try:
+            plugin, size, load_time = self.load(registry, name, language, path, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = PoolEntry(plugin, size, load_time)
+            self._loading.pop(key, None)
+            self.evict(keep=key)
+
+        loading.set_result(plugin)
+        return plugin
+
+    @staticmethod
+    def key(name: str, language: str = None, path: str = None, **kwargs) -> tuple:
+        return (name, language, path) + tuple(sorted((k, v) for k, v in kwargs.items() if v is not None))
+
+    def load(self, registry: PluginRegistry, name: str, language: str = None, path: str = None, **kwargs) -> tuple:
+        """
+        Creates and initializes a plugin, returning it with its estimated size and how long it took. With several
+        loads running at once, the RSS growth of one includes part of the others.
+        """
+
+        before = current_rss()
+        start = time.perf_counter()
+
+        plugin = registry.create(name)
+        init_kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        if not plugin.initialize(language, path=path, **init_kwargs):
+            opr.print_from("OPR ModelPool", f"{name} failed to initialize with {language}, defaulting...")
+            plugin.initialize(None, path=path, **init_kwargs)
+
+        load_time = time.perf_counter() - start
+        size = self._size_estimator(plugin) if self._size_estimator else max(0, current_rss() - before)
+
+        return plugin, size, load_time
+
+    def evict(self, keep: tuple = None) -> None:
+        """
+        Drops least recently used engines until the pool fits its budget, never dropping keep.
+        """
+
+        with self._lock:
+            dropped = False
+
+            while self.over_budget():
+                victim = next((key for key in self._entries if key != keep), None)
+                if victim is None:
+                    break
+
+                entry = self._entries.pop(victim)
+                opr.print_from("OPR ModelPool", f"Evicting {victim} ({entry.size / 2**20:.0f} MiB, {entry.hits} hits)")
+                self._evictions += 1
+                dropped = True
+
+            if dropped:
+                self.release_memory()
+
+    def over_budget(self) -> bool:
+        if self._max_entries is not None and len(self._entries) > self._max_entries:
+            return True
+        return self._budget_bytes is not None and self.ResidentBytes > self._budget_bytes
+
+    @staticmethod
+    def release_memory() -> None:
+        gc.collect()
+
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def remove(self, name: str, language: str = None, path: str = None, **kwargs) -> bool:
+        with self._lock:
+            removed = self._entries.pop(self.key(name, language, path, **kwargs), None) is not None
+            if removed:
+                self.release_memory()
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.release_memory()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "resident": len(self._entries),
+                "resident_bytes": self.ResidentBytes,
+                "entries": [{"key": key, "bytes": entry.size, "load_time": entry.load_time, "hits": entry.hits}
+                            for key, entry in self._entries.items()],
+            }
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def Hits(self) -> int:
+        return self._hits
+
+    @property
+    def Misses(self) -> int:
+        return self._misses
+
+    @property
+    def Evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def ResidentBytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
@@ -1,19 +1,21 @@
 from OPRDetectRecog.Interfaces.Detector import Detector
 from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Registry import DETECTORS, RECOGNIZERS
+from OPRDetectRecog.Sources import iter_pages
 from OperaPowerRelay import opr
-from PIL import Image
 
-import os, importlib.util
-from pathlib import Path
+import os
 
 def load_detectors(specific_detector: str = None) -> Detector | dict[str, Detector]:
 
 
     """
-    Loads detector modules in the "Detectors" directory and returns their instances.
+    Loads detector modules from the detector registry and returns their instances.
 
-    If a specific detector is specified, it will be returned as a Detector instance.
-    Otherwise, a dictionary of all detectors will be returned.
+    If a specific detector is specified, only that plugin is imported and it will be returned as a new Detector instance.
+    Otherwise, every detector is imported and a dictionary of all detectors will be returned. Modules are cached by
+    the registry, so repeated calls don't re-execute them. Use Registry.DETECTORS directly to list plugins without
+    importing them.
 
     Parameters
     ----------
@@ -26,39 +28,24 @@ def load_detectors(specific_detector: str = None) -> Detector | dict[str, Detect
         A Detector instance or a dictionary of Detector instances, depending on the input.
     """
 
-    detectors_path = Path(__file__).resolve().parent / "Detectors"
+    if specific_detector is None:
+        return DETECTORS.load_all()
 
-    detectors = {}
+    if specific_detector not in DETECTORS.manifest():
+        return {}
 
-    for file_name in os.listdir(detectors_path):
-        if not file_name.endswith(".py"):
-            continue
-
-        detector_name = file_name[:-3]
-        detector_path = os.path.join(detectors_path, file_name)
-
-
-        spec = importlib.util.spec_from_file_location(detector_name, detector_path)
-
-        det = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(det)
-
-        if specific_detector is None and hasattr(det, "get_detector"):
-            detectors[detector_name] = det.get_detector()
-
-        if detector_name == specific_detector:
-            return det.get_detector()
-
-    return detectors
+    return DETECTORS.create(specific_detector)
 
 
 def load_recognizers(specific_recognizer: str = None) -> Recognizer | dict[str, Recognizer]:
 
     """
-    Loads recognizer modules in the "Recognizers" directory and returns their instances.
+    Loads recognizer modules from the recognizer registry and returns their instances.
 
-    If a specific recognizer is specified, it will be returned as a Recognizer instance.
-    Otherwise, a dictionary of all recognizers will be returned.
+    If a specific recognizer is specified, only that plugin is imported and it will be returned as a new Recognizer instance.
+    Otherwise, every recognizer is imported and a dictionary of all recognizers will be returned. Modules are cached by
+    the registry, so repeated calls don't re-execute them. Use Registry.RECOGNIZERS directly to list plugins without
+    importing them.
 
     Parameters
     ----------
@@ -71,30 +58,13 @@ def load_recognizers(specific_recognizer: str = None) -> Recognizer | dict[str,
         A Recognizer instance or a dictionary of Recognizer instances, depending on the input.
     """
     
-    recognizers_path = Path(__file__).resolve().parent / "Recognizers"
-
-    recognizers = {}
-
-    for file_name in os.listdir(recognizers_path):
-        if not file_name.endswith(".py"):
-            continue
+    if specific_recognizer is None:
+        return RECOGNIZERS.load_all()
 
-        recognizer_name = file_name[:-3]
-        recognizer_path = os.path.join(recognizers_path, file_name)
+    if specific_recognizer not in RECOGNIZERS.manifest():
+        return {}
 
-
-        spec = importlib.util.spec_from_file_location(recognizer_name, recognizer_path)
-
-        rec = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(rec)
-
-        if specific_recognizer is None and hasattr(rec, "get_recognizer"):
-            recognizers[recognizer_name] = rec.get_recognizer()
-
-        if recognizer_name == specific_recognizer:
-            return rec.get_recognizer()
-
-    return recognizers
+    return RECOGNIZERS.create(specific_recognizer)
 
 
 
@@ -113,14 +83,16 @@ def main(p: str = None) -> None:
 
         Detectors initialize using the language and path (same case, but language is, for the most part, a requirement here, at least for the single detector we currently use)
 
-        Detector uses an image and converts it to a numpy array first before processing. From a single image it returns a list of its results, the point is to detect multiple text objects in an image. The result is a list of QuadBox objects, numpy array, and pil images, to ensure that its compatible with any recognizer. Make sure to pass the quadbox to the recognizer to package it into a linguist result object
+        Detector uses an image and converts it to a numpy array first before processing. From a single image it returns a list of its results, the point is to detect multiple text objects in an image. The result is a list of CroppedBox objects holding the QuadBox and the crop, which hands out either a numpy array or a pil image depending on the recognizer's InputFormat, so only the form that is actually used gets built. Make sure to pass the quadbox to the recognizer to package it into a linguist result object
 
-        Recognizer can use either an image or a numpy array depending on the recognizer you're using. It works one by one, line by line since working with a whole list might not work for certain use cases, might change that in the future #TODO
+        Recognizer can use either an image or a numpy array depending on the recognizer you're using. recognize works one by one, line by line, while recognize_batch takes every crop of the image at once and runs them through the model MaxBatchSize at a time, which is what this demo uses
         It returns the results as a list of LinguistResult objects, the purpose is to get the recognized text and the confidence level, along with the bounding box of where, in the original image, did the text originally appear from.
 
         From here, you're free to use the results however you want.
 
         NOTE: I am currently using a AMD GPU so I do not have CUDA, therefore I cannot properly test the performance and speeds of the detectors and recognizers. From my experience, paddleocr_detector + mangaocr_recognizer is the quickest and most accurate combo, with paddleocr_detector + easyocr_recognizer being slightly worse. Paddleocr_detector+recognizer is easily the fastest and least accurate for my machine. Willing to test more if someone would generously gift me a RTX 3080 or something :) <3
+
+        For numbers instead of impressions, benchmarks/bench_framework.py times every stage offline with stand-in engines, add --real to include the engines installed on your machine
     
     """
 
@@ -128,18 +100,18 @@ def main(p: str = None) -> None:
     print("OPR Detect Recog v1.0.0 demo")
 
 
-    recognizers = load_recognizers()
-    detectors = load_detectors()
+    recognizer_names = RECOGNIZERS.names()
+    detector_names = DETECTORS.names()
 
 
     while True:
-        opr.list_choices(detectors.keys(), "Select a Detector")
+        opr.list_choices(detector_names, "Select a Detector")
 
         index_detector = opr.input_from("OPR Detector", "Select a Detector", 1)
         
         try:
-            detector_name = list(detectors.keys())[int(index_detector) -1] 
-            detector = detectors[detector_name]
+            detector_name = detector_names[int(index_detector) -1] 
+            detector = DETECTORS.create(detector_name)
 
             opr.print_from("OPR Detector", f"Selected Detector {detector.Name}")
             break
@@ -149,13 +121,13 @@ def main(p: str = None) -> None:
             continue
 
     while True:
-        opr.list_choices(recognizers.keys(), "Select a Recognizer")
+        opr.list_choices(recognizer_names, "Select a Recognizer")
 
         index_recognizer = opr.input_from("OPR Recognizer", "Select a Recognizer", 1)
         
         try:
-            recognizer_name = list(recognizers.keys())[int(index_recognizer) -1] 
-            recognizer = recognizers[recognizer_name]
+            recognizer_name = recognizer_names[int(index_recognizer) -1] 
+            recognizer = RECOGNIZERS.create(recognizer_name)
 
             opr.print_from("OPR Recognizer", f"Selected Recognizer {recognizer.Name}")
             break
@@ -197,27 +169,28 @@ def main(p: str = None) -> None:
     
     while True:
         try:
-            img_path = opr.input_from("OPR DetectRecog", "Enter the path to the image")
+            img_path = opr.input_from("OPR DetectRecog", "Enter the path to the image, folder or zip archive")
             img_spath = opr.clean_path(img_path)
 
             if not os.path.exists(img_spath):
                 opr.print_from("OPR DetectRecog", "Image path is invalid, please try again!")
                 continue
 
-            img = Image.open(img_spath).convert('RGBA')
-        
-            detection_results = detector.detect_and_crop(img)
-            recognition_results = []
-            
-
-            for bbox, _, image in detection_results:
-                result = recognizer.recognize(image, bbox)
-                for r in result:
-                    recognition_results.append(r)
-
-            opr.print_from("OPR DetectRecog", f"Finished!")
-            for result in recognition_results:
-                opr.print_from("OPR DetectRecog", f"{result.Text} at {result.QuadBox} with {result.Confidence} Confidence")
+            # pages are decoded one ahead, so multi-page TIFFs, folders and chapter archives never sit in memory whole
+            for page in iter_pages(img_spath, prefetch_depth=1):
+                detection_results = detector.detect_and_crop(page.Image)
+                recognition_results = []
+                
+                bboxes = [crop.QuadBox for crop in detection_results]
+                images = [crop.get(recognizer.InputFormat) for crop in detection_results]
+
+                for result in recognizer.recognize_batch(images, bboxes):
+                    for r in result:
+                        recognition_results.append(r)
+
+                opr.print_from("OPR DetectRecog", f"Finished {page.Name} #{page.Index}!")
+                for result in recognition_results:
+                    opr.print_from("OPR DetectRecog", f"{result.Original} at {result.QuadBox} with {result.Confidence} Confidence")
 
         except KeyboardInterrupt:
             opr.print_from("OPR DetectRecog", "Goodbye!", 2)
@@ -0,0 +1,287 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.CropEngine import CropEngine, CroppedBox
+from OPRDetectRecog.Sources import Page, iter_pages
+from OperaPowerRelay import opr
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Iterable, Iterator
+from collections import deque
+import threading
+import queue
+
+
+_END = object()
+
+# plugins owned by a worker process, filled in by _init_worker
+_WORKER_PLUGINS = {}
+
+
+def _init_worker(detector_name: str, recognizer_name: str, language: str, init_kwargs: dict) -> None:
+    from OPRDetectRecog.Registry import DETECTORS, RECOGNIZERS
+
+    if detector_name is not None:
+        _WORKER_PLUGINS["detector"] = DETECTORS.get(detector_name, language, **init_kwargs.get("detector", {}))
+
+    if recognizer_name is not None:
+        _WORKER_PLUGINS["recognizer"] = RECOGNIZERS.get(recognizer_name, language, **init_kwargs.get("recognizer", {}))
+
+
+def _detect_in_worker(frame) -> list[CroppedBox]:
+    # crops are pickled on the way back, which copies them out of the worker's arena anyway
+    return _WORKER_PLUGINS["detector"].detect_and_crop(frame)
+
+
+def _recognize_in_worker(crops: list[CroppedBox]) -> list[LinguistResult]:
+    return recognize_crops(_WORKER_PLUGINS["recognizer"], crops)
+
+
+def recognize_crops(recognizer: Recognizer, crops: list[CroppedBox]) -> list[LinguistResult]:
+    """
+    Runs a frame's crops through recognizer.recognize_batch and flattens the results.
+    """
+    frames = [crop.get(recognizer.InputFormat) for crop in crops]
+    bboxes = [crop.QuadBox for crop in crops]
+
+    return [result for results in recognizer.recognize_batch(frames, bboxes) for result in results]
+
+
+
+class DetectRecogPipeline:
+    """
+    Runs detection and cropping on one pool and recognition on another, connected by bounded queues, so that
+    image N+1 is being detected while image N's crops are being recognized.
+
+    Results always come out in input order. The queues give backpressure: once they are full, reading from the
+    input iterable pauses until the recognizer catches up, which keeps memory bounded on long streams.
+
+    In "thread" mode the given detector and recognizer instances are shared by the worker threads (the engines
+    release the GIL while running inference), so keep detect_workers and recognize_workers at 1 unless the
+    plugins are thread-safe. In "process" mode every worker process loads and initializes its own copy of the
+    plugins, see from_plugins.
+
+    Parameters
+    ----------
+    detector : Detector | None
+        An initialized detector. None only in process mode.
+    recognizer : Recognizer | None
+        An initialized recognizer. None only in process mode.
+    detect_queue_size : int, optional
+        How many detected frames may wait for recognition, by default 4.
+    recognize_queue_size : int, optional
+        How many recognized frames may wait to be consumed, by default 4.
+    detect_workers : int, optional
+        Number of detection workers, by default 1.
+    recognize_workers : int, optional
+        Number of recognition workers, by default 1.
+
+    Methods
+    -------
+    run(frames: Iterable) -> Iterator[list[LinguistResult]]
+        Streams frames through the pipeline and yields one list of LinguistResult per frame, in order.
+    run_source(source, prefetch_depth: int = 2, mode: str = None) -> Iterator[tuple[Page, list[LinguistResult]]]
+        Same as run, for every page of a directory, archive, multi-frame image or byte stream.
+    close() -> None
+        Shuts down the worker pools.
+    """
+
+    def __init__(self,
+            detector: Detector | None,
+            recognizer: Recognizer | None,
+            detect_queue_size: int = 4,
+            recognize_queue_size: int = 4,
+            detect_workers: int = 1,
+            recognize_workers: int = 1):
+
+        self._detector = detector
+        self._recognizer = recognizer
+        self._detect_queue_size = detect_queue_size
+        self._recognize_queue_size = recognize_queue_size
+
+        if detector is not None:
+            # crops of a frame stay alive until recognized, so the crop engine needs one arena for every frame
+            # that can be in flight between the two stages
+            in_flight = detect_queue_size + recognize_queue_size + detect_workers + 2
+            detector.Cropper = CropEngine(detector.Cropper.AngleThreshold, arenas=in_flight)
+
+        self._detect_pool = self.create_pool(detect_workers)
+        self._recognize_pool = self.create_pool(recognize_workers)
+
+    @classmethod
+    def from_plugins(cls,
+            detector_name: str,
+            recognizer_name: str,
+            language: str = None,
+            detector_kwargs: dict = None,
+            recognizer_kwargs: dict = None,
+            detect_queue_size: int = 4,
+            recognize_queue_size: int = 4,
+            detect_workers: int = 1,
+            recognize_workers: int = 1) -> "DetectRecogPipeline":
+        """
+        Builds a pipeline whose stages run on process pools. Each worker process loads the named plugins and
+        initializes them with language and the matching kwargs once, then keeps them for its whole lifetime.
+        """
+
+        pipeline = cls.__new__(cls)
+        pipeline._detector = None
+        pipeline._recognizer = None
+        pipeline._detect_queue_size = detect_queue_size
+        pipeline._recognize_queue_size = recognize_queue_size
+
+        pipeline._detect_pool = ProcessPoolExecutor(detect_workers, initializer=_init_worker,
+                                                    initargs=(detector_name, None, language, {"detector": detector_kwargs or {}}))
+        pipeline._recognize_pool = ProcessPoolExecutor(recognize_workers, initializer=_init_worker,
+                                                       initargs=(None, recognizer_name, language, {"recognizer": recognizer_kwargs or {}}))
+        return pipeline
+
+    @staticmethod
+    def create_pool(workers: int) -> Executor:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="OPRDetectRecog")
+
+    def submit_detect(self, frame) -> Future:
+        if self._detector is None:
+            return self._detect_pool.submit(_detect_in_worker, frame)
+        return self._detect_pool.submit(self._detector.detect_and_crop, frame)
+
+    def submit_recognize(self, crops: list[CroppedBox]) -> Future:
+        if self._recognizer is None:
+            return self._recognize_pool.submit(_recognize_in_worker, crops)
+        return self._recognize_pool.submit(recognize_crops, self._recognizer, crops)
+
+    def discard(self, detected: Future) -> None:
+        """
+        Called by run for every submit_detect future it drops because the consumer stopped early.
+        """
+        detected.cancel()
+
+    def run(self, frames: Iterable) -> Iterator[list[LinguistResult]]:
+        """
+        Streams frames through detection and recognition.
+
+        Parameters
+        ----------
+        frames : Iterable
+            The images to process, anything the detector's detect_and_crop accepts (PIL images or numpy arrays).
+
+        Yields
+        ------
+        list[LinguistResult]
+            The recognized text of each frame, in the same order as frames.
+        """
+
+        detected = queue.Queue(maxsize=self._detect_queue_size)
+        recognized = queue.Queue(maxsize=self._recognize_queue_size)
+        stop = threading.Event()
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END
+
+        def drain(q: queue.Queue) -> None:
+            while True:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    return
+                if isinstance(item, Future) and q is detected:
+                    self.discard(item)
+
+        def feed() -> None:
+            try:
+                for frame in frames:
+                    future = self.submit_detect(frame)
+                    if not put(detected, future):
+                        self.discard(future)
+                        return
+            except BaseException as e:
+                put(detected, e)
+                return
+            finally:
+                # a put that went through just as the consumer stopped would miss the drain in run
+                if stop.is_set():
+                    drain(detected)
+            put(detected, _END)
+
+        def chain() -> None:
+            while True:
+                item = get(detected)
+                if item is _END or isinstance(item, BaseException):
+                    put(recognized, item)
+                    return
+
+                try:
+                    crops = item.result()
+                except BaseException as e:
+                    put(recognized, e)
+                    return
+
+                if not put(recognized, self.submit_recognize(crops)):
+                    return
+
+        feeder = threading.Thread(target=feed, name="OPRDetectRecog-feed", daemon=True)
+        chainer = threading.Thread(target=chain, name="OPRDetectRecog-chain", daemon=True)
+        feeder.start()
+        chainer.start()
+
+        try:
+            while True:
+                item = recognized.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    opr.print_from("OPR DetectRecogPipeline", f"Pipeline stopped: {item}")
+                    raise item
+                yield item.result()
+        finally:
+            stop.set()
+
+            # unblock the helper threads if the consumer stopped early
+            drain(detected)
+            drain(recognized)
+
+    def run_source(self, source, prefetch_depth: int = 2, mode: str = None) -> Iterator[tuple[Page, list[LinguistResult]]]:
+        """
+        Streams every page of a document source through the pipeline, see Sources.open_source for what source can be.
+
+        Pages are decoded prefetch_depth ahead on their own thread, so decoding overlaps inference, and only the
+        pages in flight are held in memory, so whole chapters run in bounded memory.
+
+        Yields
+        ------
+        tuple[Page, list[LinguistResult]]
+            Each page with its recognized text, in source order.
+        """
+
+        in_flight = deque()
+
+        def frames() -> Iterator:
+            for page in iter_pages(source, prefetch_depth, mode):
+                in_flight.append(page)
+                yield page.Image
+
+        for results in self.run(frames()):
+            yield in_flight.popleft(), results
+
+    def close(self) -> None:
+        self._detect_pool.shutdown(wait=True, cancel_futures=True)
+        self._recognize_pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "DetectRecogPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
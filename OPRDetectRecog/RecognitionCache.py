@@ -0,0 +1,325 @@
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.PixelDiff import grayscale, local_change, shrink
+from collections import OrderedDict
+from PIL import Image
+import threading
+import hashlib
+import numpy
+import cv2
+
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def content_hash(pixels: numpy.ndarray) -> bytes:
+    """
+    A fast 128-bit hash of the crop's pixels, shape and dtype. Uses xxhash when it is installed.
+    """
+
+    pixels = numpy.ascontiguousarray(pixels)
+    digest = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+    digest.update(f"{pixels.shape}{pixels.dtype}".encode())
+    digest.update(pixels.data)
+    return digest.digest()
+
+
+def difference_hash(pixels: numpy.ndarray, hash_size: int = 8, margin: int = 4) -> int:
+    """
+    A perceptual (difference) hash: the crop is shrunk to hash_size+1 x hash_size grayscale pixels and every bit
+    says whether a pixel is brighter than its right neighbour by more than margin grey levels. Without the margin
+    the near-equal pixels of flat background flip with every re-encoding, with it JPEG noise leaves the hash
+    unchanged or changes only a few bits. Empty crops all hash to 0.
+    """
+
+    pixels = grayscale(pixels)
+    if pixels.size == 0:
+        return 0
+
+    small = cv2.resize(pixels, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).astype(numpy.int16)
+    bits = (small[:, 1:] > small[:, :-1] + margin).ravel()
+    return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+
+class CacheEntry:
+
+    __slots__ = ("results", "size", "thumbnail")
+
+    def __init__(self, results: list[tuple[str, str, float]], size: int, thumbnail: numpy.ndarray | None):
+        self.results = results
+        self.size = size
+        self.thumbnail = thumbnail
+
+
+
+class CachedRecognizer(Recognizer):
+    """
+    A content-addressed cache in front of another Recognizer, for workloads that crop the same text over and over
+    (menus, HUD labels, repeated SFX).
+
+    Crops are keyed by a hash of their pixels plus the recognizer's name, language and model path. Hits skip the
+    model entirely and return the cached LinguistResults re-bound to the new QuadBox. The cache is an LRU bounded
+    by the estimated bytes of what it stores.
+
+    In perceptual mode crops are keyed by a difference hash instead, so that the same text re-encoded with a bit
+    of compression noise still hits. Cached hashes within max_distance bits, of crops in the same or a neighbouring
+    8 pixel size bucket, are candidates. They are found through a multi-index: the hash is split into
+    max_distance + 1 bands, any hash that close agrees with it on at least one whole band, so only the entries
+    sharing a band are compared instead of every entry.
+
+    A hash that small can't tell "Hello" from "Jello", so a candidate only counts as a hit once a grayscale
+    thumbnail kept with it passes a pixel check: no character-sized window of the two may differ by more than
+    changed_fraction, see PixelDiff.local_change.
+
+    Parameters
+    ----------
+    recognizer : Recognizer
+        The initialized recognizer to put the cache in front of.
+    max_bytes : int, optional
+        The most memory the cached results may use, by default 32 MiB.
+    perceptual : bool, optional
+        Key crops by perceptual hash instead of exact pixels, by default False.
+    hash_size : int, optional
+        Side of the perceptual hash grid, hash_size**2 bits, by default 8.
+    max_distance : int, optional
+        The most bits two perceptual hashes may differ by and still be a candidate, by default 4.
+    pixel_threshold : int, optional
+        How much a thumbnail pixel must change to count as changed in the perceptual pixel check, by default 48.
+    changed_fraction : float, optional
+        The fraction of changed pixels in any window above which a perceptual candidate is a miss, by default 0.03.
+    thumbnail_height : int, optional
+        The short side perceptual thumbnails are shrunk to, by default 32.
+
+    Properties
+    ----------
+    Hits, Misses, Evictions : int
+        Counters for crops served from the cache, crops sent to the recognizer, and entries dropped.
+    Bytes : int
+        The estimated memory of every cached entry.
+    """
+
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self,
+            recognizer: Recognizer,
+            max_bytes: int = 32 * 2**20,
+            perceptual: bool = False,
+            hash_size: int = 8,
+            max_distance: int = 4,
+            pixel_threshold: int = 48,
+            changed_fraction: float = 0.03,
+            thumbnail_height: int = 32):
+
+        super().__init__(recognizer._language, recognizer._tolerance, recognizer._path, recognizer.MaxBatchSize)
+
+        self._recognizer = recognizer
+        # its own engine label, so instrumentation doesn't count the wrapped recognizer's crops twice
+        self._name = f"cached:{recognizer.Name}"
+        self._input_format = recognizer.InputFormat
+
+        self._max_bytes = max_bytes
+        self._perceptual = perceptual
+        self._hash_size = hash_size
+        self._max_distance = max_distance
+        self._pixel_threshold = pixel_threshold
+        self._changed_fraction = changed_fraction
+        self._thumbnail_height = thumbnail_height
+
+        self._entries = OrderedDict()
+        self._bands = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        return self._recognizer.get_supported_languages(as_dict)
+
+    def initialize(self, language: str = None, tolerance: float = None, path: str = None, execution: ExecutionConfig = None) -> bool:
+        result = self._recognizer.initialize(language, tolerance=tolerance, path=path, execution=execution)
+        self._language, self._tolerance, self._path = self._recognizer._language, self._recognizer._tolerance, self._recognizer._path
+        self._execution = self._recognizer.Execution
+        self.clear()
+        return result
+
+    def key(self, frame: Image.Image | numpy.ndarray) -> tuple:
+        pixels = numpy.asarray(frame)
+        engine = (self._name, self._language, self._path)
+
+        if not self._perceptual:
+            return engine + (content_hash(pixels),)
+
+        # perceptual hashes ignore size, so keep crops of clearly different sizes apart
+        height, width = pixels.shape[:2]
+        return engine + (width // 8, height // 8, difference_hash(pixels, self._hash_size))
+
+    def thumbnail(self, frame: Image.Image | numpy.ndarray) -> numpy.ndarray:
+        """
+        The small grayscale copy of a crop that perceptual candidates are confirmed against.
+        """
+        return shrink(grayscale(numpy.asarray(frame)), self._thumbnail_height)
+
+    def confirmed(self, entry: CacheEntry, thumbnail: numpy.ndarray) -> bool:
+        return local_change(entry.thumbnail, thumbnail, self._pixel_threshold) <= self._changed_fraction
+
+    def band_keys(self, key: tuple) -> list[tuple]:
+        """
+        The multi-index buckets of a perceptual key: its engine and one band of its hash each.
+        """
+
+        bits = self._hash_size ** 2
+        count = min(self._max_distance + 1, bits)
+        bounds = [bits * i // count for i in range(count + 1)]
+        engine, phash = key[:-3], key[-1]
+
+        return [engine + (i, (phash >> start) & ((1 << (end - start)) - 1)) for i, (start, end) in enumerate(zip(bounds, bounds[1:]))]
+
+    def lookup(self, key: tuple, thumbnail: numpy.ndarray = None) -> CacheEntry | None:
+        if not self._perceptual:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+        width, height, phash = key[-3:]
+        candidates = []
+
+        for other_key in set().union(*(self._bands.get(band, ()) for band in self.band_keys(key))):
+            if abs(other_key[-3] - width) > 1 or abs(other_key[-2] - height) > 1:
+                continue
+
+            distance = bin(other_key[-1] ^ phash).count("1")
+            if distance <= self._max_distance:
+                candidates.append((distance, other_key))
+
+        # closest hash first, even an identical key still has to pass the pixel check
+        for _, other_key in sorted(candidates, key=lambda candidate: candidate[0]):
+            entry = self._entries[other_key]
+            if self.confirmed(entry, thumbnail):
+                self._entries.move_to_end(other_key)
+                return entry
+
+        return None
+
+    def drop(self, key: tuple) -> CacheEntry | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        self._bytes -= entry.size
+        if self._perceptual:
+            for band in self.band_keys(key):
+                members = self._bands[band]
+                members.discard(key)
+                if not members:
+                    del self._bands[band]
+        return entry
+
+    def store(self, key: tuple, results: list[LinguistResult], thumbnail: numpy.ndarray = None) -> None:
+        values = [(r.Original, r.Translated, r.Confidence) for r in results]
+        size = self.ENTRY_OVERHEAD + sum(len((original or "").encode()) + len((translated or "").encode()) for original, translated, _ in values)
+        size += thumbnail.nbytes if thumbnail is not None else 0
+
+        if size > self._max_bytes:
+            return
+
+        self.drop(key)
+
+        self._entries[key] = CacheEntry(values, size, thumbnail)
+        self._bytes += size
+
+        if self._perceptual:
+            for band in self.band_keys(key):
+                self._bands.setdefault(band, set()).add(key)
+
+        while self._bytes > self._max_bytes:
+            self.drop(next(iter(self._entries)))
+            self._evictions += 1
+
+    @staticmethod
+    def rebind(entry: CacheEntry, bbox: QuadBox) -> list[LinguistResult]:
+        return [LinguistResult(bbox, original, translated, confidence) for original, translated, confidence in entry.results]
+
+    def recognize(self, frame, bbox) -> list[LinguistResult]:
+        # straight to serve, going through recognize_batch would record the crop a second time
+        return self.serve([frame], [bbox])[0]
+
+    def recognize_batch(self, frames, bboxes) -> list[list[LinguistResult]]:
+        self.validate_batch(frames, bboxes)
+        return self.serve(frames, bboxes)
+
+    def serve(self, frames: list, bboxes: list[QuadBox]) -> list[list[LinguistResult]]:
+
+        """
+        Serves what it can from the cache and sends only the missing crops to the wrapped recognizer, in one batch.
+        """
+
+        keys = [self.key(frame) for frame in frames]
+        thumbnails = [self.thumbnail(frame) for frame in frames] if self._perceptual else [None] * len(frames)
+        results = [None] * len(frames)
+        missing = []
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                entry = self.lookup(key, thumbnails[index])
+                if entry is None:
+                    missing.append(index)
+                else:
+                    results[index] = self.rebind(entry, bboxes[index])
+
+            self._hits += len(frames) - len(missing)
+            self._misses += len(missing)
+
+        if missing:
+            recognized = self._recognizer.recognize_batch([frames[i] for i in missing], [bboxes[i] for i in missing])
+
+            with self._lock:
+                for index, result in zip(missing, recognized):
+                    results[index] = result
+                    self.store(keys[index], result, thumbnails[index])
+
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else 0.0,
+            "evictions": self._evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    @property
+    def Recognizer(self) -> Recognizer:
+        return self._recognizer
+
+    @property
+    def Hits(self) -> int:
+        return self._hits
+
+    @property
+    def Misses(self) -> int:
+        return self._misses
+
+    @property
+    def Evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def Bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,267 @@
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.OnnxModel import create_session, find_file, input_shape
+from OperaPowerRelay import opr
+from PIL import Image
+import numpy
+import math
+import cv2
+import os
+
+
+class onnx_crnn_recognizer(Recognizer):
+    """
+    Runs an exported CRNN/SVTR text line recognition model with a CTC head, such as PaddleOCR's rec model converted
+    with paddle2onnx, through onnxruntime, on the CPU unless the ExecutionConfig finds an accelerator provider.
+    Resizing, normalization and CTC decoding are done here with numpy and OpenCV, so neither PaddleOCR nor Paddle
+    has to be installed.
+
+    Parameters
+    ----------
+    language : str, optional
+        Picks the character dictionary, <language>_dict.txt, when path is a directory holding several.
+    tolerance : float, optional
+        Kept for the interface.
+    path : str, optional
+        The .onnx model, or a directory holding rec.onnx, inference.onnx or a single .onnx file, and the model's
+        character dictionary.
+    max_batch_size : int, optional
+        The most crops run through the model at once, by default 16.
+    dict_path : str, optional
+        The character dictionary, one character per line, by default found next to the model.
+    image_height : int, optional
+        The height crops are resized to when the model does not fix it, by default 48 as for PP-OCRv3 and later.
+    use_space_char : bool, optional
+        Whether the model's last class is a space, by default True as PaddleOCR exports them.
+    """
+
+    def __init__(self, language=None, tolerance = None, path = None, max_batch_size = None, dict_path: str = None,
+                 image_height: int = 48, use_space_char: bool = True):
+        super().__init__(language, tolerance, path, max_batch_size)
+        self._input_format = 'numpy'
+
+        self._name = 'onnx_crnn_recognizer'
+
+        self._dict_path = dict_path
+        self._image_height = image_height
+        self._use_space_char = use_space_char
+
+        self._input_name = None
+        self._fixed_width = None
+        self._characters = None
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        languages = {
+            "english": "en",
+            "chinese_simplified": "ch",           # default if omitted
+            "chinese_traditional": "chinese_cht",
+            "japanese": "japan",
+            "korean": "korean",
+            "french": "french",
+            "german": "german",
+            "spanish": "spanish",
+            "portuguese": "portuguese",
+            "italian": "italian",
+            "russian": "russian",
+            "arabic": "arabic",
+            "turkish": "turkish",
+            "thai": "thai",
+            "hindi": "hindi",
+            "vietnamese": "vietnamese",
+            "persian": "persian",
+            "mongolian": "mongolian",
+            "kazakh": "kazakh",
+            "tamil": "tamil",
+            "telugu": "telugu",
+            "marathi": "marathi",
+            "bangla": "bangla",
+            "urdu": "urdu",
+            "romanian": "romanian",
+            "ukrainian": "ukrainian",
+            "greek": "greek",
+            "cyrillic": "cyrillic",               # includes Russian, Bulgarian, etc.
+            "serbian": "serbian",
+            "kannada": "kannada",
+            "malayalam": "malayalam",
+            "lao": "lao",
+            "burmese": "burmese",
+            "khmer": "khmer",
+            "nepali": "nepali",
+            "sinhalese": "sinhalese",
+            "sundanese": "sundanese",
+            "javanese": "javanese",
+            "hebrew": "hebrew",
+            "macedonian": "macedonian"
+        }
+
+        if as_dict:
+            return languages
+
+        return list(languages.keys())
+
+    def initialize(self, language, tolerance = None, path = None, execution: ExecutionConfig = None) -> bool:
+        try:
+            super().initialize(language, tolerance, path, execution)
+
+            model = find_file(path, ("rec.onnx", "inference.onnx"), ".onnx")
+            self._recognizer = create_session(model, self._name, self._execution)
+            if self._recognizer is None:
+                return False
+
+            characters = self.load_characters(os.path.dirname(model))
+            if characters is None:
+                return False
+
+            self._input_name, shape = input_shape(self._recognizer)
+            self._image_height = shape[2] or self._image_height
+            self._fixed_width = shape[3]
+
+            # class 0 is the CTC blank
+            self._characters = numpy.array(["", *characters, *([" "] if self._use_space_char else [])], dtype=object)
+
+        except KeyError:
+            return False
+        return True
+
+    def load_characters(self, directory: str) -> list[str] | None:
+        names = (f"{self._language}_dict.txt", "dict.txt", "ppocr_keys_v1.txt")
+        dict_path = self._dict_path or find_file(directory, names, ".txt")
+
+        if dict_path is None or not os.path.isfile(dict_path):
+            opr.error_pretty(FileNotFoundError, f"OPR Recognizer | {self._name}", f"No character dictionary found next to the model! {directory}", "HUMAN ERROR")
+            return None
+
+        with open(dict_path, encoding="utf-8") as file:
+            return [line.rstrip("\r\n") for line in file]
+
+    def recognize(self, frame, bbox) -> list[LinguistResult]:
+        return self.recognize_batch([frame], [bbox])[0]
+
+    def recognize_batch(self, frames, bboxes) -> list[list[LinguistResult]]:
+
+        """
+        Sorts the crops by aspect ratio so each batch is padded to about the same width, runs them through the model
+        MaxBatchSize at a time and CTC-decodes every batch at once.
+        """
+
+        self.validate_batch(frames, bboxes)
+
+        if not frames: return []
+
+        crops = [self.to_bgr(frame) for frame in frames]
+        ratios = numpy.array([crop.shape[1] / max(crop.shape[0], 1) for crop in crops], dtype=numpy.float32)
+
+        # empty crops, which CropEngine returns for degenerate boxes, are never sent and come back without results
+        present = numpy.flatnonzero([crop.size > 0 for crop in crops])
+        order = present[numpy.argsort(ratios[present], kind="stable")]
+
+        texts = [""] * len(crops)
+        confidences = numpy.zeros(len(crops), dtype=numpy.float32)
+
+        for part in self.batch_slices(len(order)):
+            indices = order[part]
+            batch = self.pack([crops[i] for i in indices], float(ratios[indices].max()))
+
+            probabilities = self._recognizer.run(None, {self._input_name: batch})[0]
+            decoded, scores = self.decode(probabilities)
+
+            for i, text, score in zip(indices, decoded, scores):
+                texts[i] = text
+                confidences[i] = score
+
+        recognition_results = []
+        for bbox, text, confidence in zip(bboxes, texts, confidences):
+            text = text.strip()
+            recognition_results.append([LinguistResult(bbox, text, None, float(confidence))] if text else [])
+
+        return recognition_results
+
+    def pack(self, crops: list[numpy.ndarray], max_ratio: float) -> numpy.ndarray:
+        """
+        Resizes crops to the model's height keeping their aspect ratio, pads them on the right to the widest one and
+        normalizes the whole batch to [-1, 1] at once, padding included as 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            The Nx3xHxW float32 batch.
+        """
+
+        height = self._image_height
+        width = self._fixed_width or max(int(math.ceil(height * max_ratio)), 1)
+
+        pixels = numpy.zeros((len(crops), height, width, 3), dtype=numpy.uint8)
+        widths = numpy.empty(len(crops), dtype=numpy.int64)
+
+        for k, crop in enumerate(crops):
+            resized_width = min(width, max(int(math.ceil(height * crop.shape[1] / max(crop.shape[0], 1))), 1))
+            pixels[k, :, :resized_width] = cv2.resize(crop, (resized_width, height))
+            widths[k] = resized_width
+
+        batch = pixels.astype(numpy.float32)
+        batch *= 2.0 / 255.0
+        batch -= 1.0
+        batch *= (numpy.arange(width) < widths[:, numpy.newaxis])[:, numpy.newaxis, :, numpy.newaxis]
+
+        return numpy.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def decode(self, probabilities: numpy.ndarray) -> tuple[list[str], numpy.ndarray]:
+        """
+        Greedy CTC decoding of a whole batch: the best class per time step, repeats collapsed and blanks dropped,
+        all as array operations. Only joining each line's characters into a string is done per line.
+
+        Parameters
+        ----------
+        probabilities : numpy.ndarray
+            The model's NxTxC output, softmaxed here if the model ends in logits.
+
+        Returns
+        -------
+        tuple[list[str], numpy.ndarray]
+            The text of every line, and its mean probability over the characters kept.
+        """
+
+        if probabilities.min() < 0 or probabilities.max() > 1:
+            probabilities = numpy.exp(probabilities - probabilities.max(axis=2, keepdims=True))
+            probabilities /= probabilities.sum(axis=2, keepdims=True)
+
+        best = probabilities.argmax(axis=2)
+        confidence = probabilities.max(axis=2)
+
+        keep = best != 0
+        keep[:, 1:] &= best[:, 1:] != best[:, :-1]
+
+        counts = keep.sum(axis=1)
+        scores = numpy.where(counts > 0, (confidence * keep).sum(axis=1) / numpy.maximum(counts, 1), 0.0)
+
+        characters = self._characters[numpy.minimum(best, len(self._characters) - 1)]
+        texts = ["".join(row[mask]) for row, mask in zip(characters, keep)]
+
+        return texts, scores
+
+    @staticmethod
+    def to_bgr(frame: Image.Image | numpy.ndarray) -> numpy.ndarray:
+
+        if isinstance(frame, Image.Image):
+            frame = numpy.asarray(frame.convert("RGB"))
+
+        if frame.size == 0:
+            return numpy.empty((0, 0, 3), dtype=numpy.uint8)
+
+        # the exported models expect BGR, same as PaddleOCR feeds them
+        if frame.ndim == 2:
+            bgr = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        else:
+            bgr = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR if frame.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+
+        # vertical lines are read turned on their side, as PaddleOCR does
+        height, width = bgr.shape[:2]
+        if height >= 1.5 * width:
+            bgr = numpy.ascontiguousarray(numpy.rot90(bgr))
+
+        return bgr
+
+
+def get_recognizer() -> Recognizer:
+    return onnx_crnn_recognizer()
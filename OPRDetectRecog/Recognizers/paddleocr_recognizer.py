@@ -1,15 +1,24 @@
 from OPRDetectRecog.Interfaces.Recognizer import Recognizer
 from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from PIL import Image
 import numpy
+import cv2
 
 
 class paddleocr_recognizer(Recognizer):
 
-    def __init__(self, language=None, tolerance = None, path = None):
-        super().__init__(language, tolerance, path)
+    def __init__(self, language=None, tolerance = None, path = None, max_batch_size = None, cls_angle_threshold = 45.0):
+        super().__init__(language, tolerance, path, max_batch_size)
+        self._input_format = 'numpy'
         
 
         self._name = 'paddleocr_recognizer'
+
+        # crops whose QuadBox is rotated further than this (in degrees) may come out of the
+        # detector's warp upside down, so only those are sent through the angle classifier
+        self._cls_angle_threshold = cls_angle_threshold
         
     def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
         paddle_langs = {
@@ -60,14 +69,17 @@ class paddleocr_recognizer(Recognizer):
 
         return list(paddle_langs.keys())
 
-    def initialize(self, language, tolerance = None, path = None) -> bool:
+    def initialize(self, language, tolerance = None, path = None, execution: ExecutionConfig = None) -> bool:
         try:
-            super().initialize(language, tolerance, path)
+            super().initialize(language, tolerance, path, execution)
         
             from paddleocr import PaddleOCR 
 
+            # device and threads come from the ExecutionConfig, which falls back to the CPU when Paddle has no GPU to use
+            options = self._execution.paddle_options(self._name)
+
             if path is not None:
-                self._recognizor = PaddleOCR(use_gpu=True, rec_model_dir=path, show_log=False)
+                self._recognizor = PaddleOCR(rec_model_dir=path, show_log=False, rec_batch_num=self._max_batch_size, use_angle_cls=True, **options)
             else:
 
                 """
@@ -75,7 +87,7 @@ class paddleocr_recognizer(Recognizer):
                     Again, should replace these parameters with the ones that work the best on your machine
                 
                 """
-                self._recognizor = PaddleOCR(use_gpu=True, show_log=False, providers = ['DmlExecutionProvider'])
+                self._recognizor = PaddleOCR(show_log=False, rec_batch_num=self._max_batch_size, use_angle_cls=True, **options)
 
         except KeyError:
             return False
@@ -84,23 +96,88 @@ class paddleocr_recognizer(Recognizer):
 
     def recognize(self, frame, bbox) -> list[LinguistResult]:
 
-        fr = numpy.array(frame)
-        results = self._recognizor.ocr(fr, cls=True, rec=True, det=True)
+        """
+        Recognizes a single crop as one text line.
+
+        The crop has already been localized by a detector, so detection is skipped (det=False) and the
+        crop costs a single rec forward, plus a cls forward when its QuadBox is rotated.
+        """
+
+        fr = self.to_bgr(frame)
+        results = self._recognizor.ocr(fr, det=False, rec=True, cls=self.needs_angle_cls(bbox))
 
         recognition_results = []
         
-        print(results)
-        if not results[0]: return recognition_results
+        if not results or not results[0]: return recognition_results
 
-        for i in results[0]:
-            text, confidence = i[1]
+        for text, confidence in results[0]:
+            if not text: continue
 
-            result = LinguistResult(bbox, text.strip(), confidence)
+            result = LinguistResult(bbox, text.strip(), None, float(confidence))
 
             recognition_results.append(result)
 
 
         return recognition_results
+
+    def recognize_batch(self, frames, bboxes) -> list[list[LinguistResult]]:
+
+        """
+        Sends all crops straight to PaddleOCR's text recognizer, which sorts them by aspect ratio
+        and runs them through the rec model rec_batch_num at a time.
+
+        Only the crops whose QuadBox needs it are run through the angle classifier beforehand.
+        """
+
+        self.validate_batch(frames, bboxes)
+
+        if not frames: return []
+
+        crops = [self.to_bgr(frame) for frame in frames]
+        self.classify_rotated(crops, bboxes)
+
+        text_recognizer = self._recognizor.text_recognizer
+        text_recognizer.rec_batch_num = self._max_batch_size
+
+        rec_results, _ = text_recognizer(crops)
+
+        recognition_results = []
+        for bbox, (text, confidence) in zip(bboxes, rec_results):
+            recognition_results.append([LinguistResult(bbox, text.strip(), None, float(confidence))] if text else [])
+
+        return recognition_results
+
+    def needs_angle_cls(self, bbox: QuadBox) -> bool:
+        return abs(bbox.Angle) > self._cls_angle_threshold
+
+    def classify_rotated(self, crops: list[numpy.ndarray], bboxes: list[QuadBox]) -> None:
+
+        """
+        Runs the angle classifier over the rotated crops only and swaps the (possibly flipped) crops back in place.
+        """
+
+        classifier = getattr(self._recognizor, "text_classifier", None)
+        if classifier is None: return
+
+        rotated = [i for i, bbox in enumerate(bboxes) if self.needs_angle_cls(bbox)]
+        if not rotated: return
+
+        fixed, _, _ = classifier([crops[i] for i in rotated])
+        for i, crop in zip(rotated, fixed):
+            crops[i] = crop
+
+    @staticmethod
+    def to_bgr(frame: Image.Image | numpy.ndarray) -> numpy.ndarray:
+
+        # the rec model expects BGR, same as what PaddleOCR.ocr feeds it
+        if isinstance(frame, Image.Image):
+            frame = numpy.asarray(frame.convert("RGB"))
+            return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+        if frame.ndim == 2:
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+        return cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR if frame.shape[2] == 4 else cv2.COLOR_RGB2BGR)
     
 
 def get_recognizer() -> Recognizer:
@@ -0,0 +1,154 @@
+from OperaPowerRelay import opr
+from importlib import metadata
+from pathlib import Path
+import importlib
+import threading
+import pkgutil
+import time
+
+
+class PluginRegistry:
+    """
+    Lazily discovers, imports and caches detector or recognizer plugins.
+
+    Discovery never imports anything: built-in plugins are found by listing the modules of the plugin package, and
+    third-party plugins are read from the package's entry point group (e.g. "oprdetectrecog.detectors", where each
+    entry point names a module with the usual get_detector / get_recognizer factory). A plugin module is imported
+    the first time it is used, under its full package name, so it lands in sys.modules and is never re-executed.
+
+    Parameters
+    ----------
+    package : str
+        The dotted name of the package holding the built-in plugins, e.g. "OPRDetectRecog.Detectors".
+    factory : str
+        The name of the module-level function that returns a new plugin instance, e.g. "get_detector".
+    entry_point_group : str
+        The entry point group third-party plugins register under.
+
+    Properties
+    ----------
+    StartupTimes : dict[str, dict[str, float]]
+        Seconds spent importing and initializing each plugin that has been used so far.
+    """
+
+    def __init__(self, package: str, factory: str, entry_point_group: str):
+        self._package = package
+        self._factory = factory
+        self._entry_point_group = entry_point_group
+
+        self._manifest = None
+        self._modules = {}
+        self._instances = {}
+        self._startup_times = {}
+        self._lock = threading.RLock()
+
+    def manifest(self) -> dict[str, str]:
+        """
+        Maps every known plugin name to the module that implements it, without importing any of them.
+        """
+
+        if self._manifest is not None:
+            return self._manifest
+
+        manifest = {}
+        package_path = Path(__file__).resolve().parent / self._package.rsplit(".", 1)[-1]
+
+        for module in pkgutil.iter_modules([str(package_path)]):
+            if not module.ispkg:
+                manifest[module.name] = f"{self._package}.{module.name}"
+
+        for entry_point in self.entry_points():
+            manifest.setdefault(entry_point.name, entry_point.value.split(":", 1)[0])
+
+        self._manifest = manifest
+        return manifest
+
+    def entry_points(self) -> list:
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            return list(entry_points.select(group=self._entry_point_group))
+        return list(entry_points.get(self._entry_point_group, []))
+
+    def names(self) -> list[str]:
+        return sorted(self.manifest())
+
+    def module(self, name: str):
+        """
+        Imports the plugin module on first use and returns the cached module afterwards.
+        """
+
+        with self._lock:
+            if name in self._modules:
+                return self._modules[name]
+
+            if name not in self.manifest():
+                opr.error_pretty(KeyError, f"OPR DetectRecog | {self._package}", f"No plugin named {name}! Known plugins: {self.names()}", "HUMAN ERROR")
+                raise KeyError(name)
+
+            start = time.perf_counter()
+            module = importlib.import_module(self.manifest()[name])
+            self._startup_times.setdefault(name, {})["import"] = time.perf_counter() - start
+
+            self._modules[name] = module
+            return module
+
+    def create(self, name: str):
+        """
+        Returns a new, uninitialized plugin instance.
+        """
+        return getattr(self.module(name), self._factory)()
+
+    def get(self, name: str, language: str = None, **kwargs):
+        """
+        Returns an initialized plugin instance, creating and initializing it only the first time these exact
+        arguments are asked for. If initialization with language fails, the plugin falls back to its default
+        language like the demo does.
+        """
+
+        key = (name, language, tuple(sorted(kwargs.items())))
+
+        with self._lock:
+            if key in self._instances:
+                return self._instances[key]
+
+            instance = self.create(name)
+
+            start = time.perf_counter()
+            if not instance.initialize(language, **kwargs):
+                instance.initialize(None, **kwargs)
+            self._startup_times.setdefault(name, {})["initialize"] = time.perf_counter() - start
+
+            self._instances[key] = instance
+            return instance
+
+    def load_all(self) -> dict:
+        """
+        Imports every plugin and returns a new instance of each, for callers that really want all of them.
+        """
+
+        plugins = {}
+        for name in self.names():
+            module = self.module(name)
+            if hasattr(module, self._factory):
+                plugins[name] = getattr(module, self._factory)()
+        return plugins
+
+    def clear(self) -> None:
+        """
+        Drops the cached instances, the imported modules stay in sys.modules.
+        """
+        with self._lock:
+            self._instances.clear()
+
+    def report(self) -> None:
+        for name, times in self._startup_times.items():
+            parts = ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in times.items())
+            opr.print_from(f"OPR DetectRecog | {self._package}", f"{name}: {parts}")
+
+    @property
+    def StartupTimes(self) -> dict[str, dict[str, float]]:
+        return {name: dict(times) for name, times in self._startup_times.items()}
+
+
+DETECTORS = PluginRegistry("OPRDetectRecog.Detectors", "get_detector", "oprdetectrecog.detectors")
+RECOGNIZERS = PluginRegistry("OPRDetectRecog.Recognizers", "get_recognizer", "oprdetectrecog.recognizers")
@@ -0,0 +1,356 @@
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Pipeline import recognize_crops
+from OPRDetectRecog.Custom.Instrumentation import INSTRUMENTATION, PrometheusSink
+from OPRDetectRecog.Custom.Frame import Frame, as_frame
+from OperaPowerRelay import opr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from PIL import Image
+import http.client
+import argparse
+import threading
+import socket
+import json
+import time
+import io
+import os
+
+
+class DetectRecogServer:
+    """
+    A long-running server that keeps an initialized detector and recognizer warm, so clients stop paying the
+    model load on every run.
+
+    The models are loaded and warmed up with a dummy inference on a background thread as soon as the server starts,
+    so /health answers right away and /ready flips to 200 once the first request can be served at full speed.
+
+    Endpoints
+    ---------
+    GET /health
+        Always 200 while the process is up.
+    GET /ready
+        200 once the detector and recognizer are initialized, 503 before that.
+    POST /recognize
+        The body is an encoded image (anything PIL can open). Returns a JSON list of LinguistResult.to_dict(), 400
+        for a request without a readable image and 500 when the models fail on it.
+    GET /metrics
+        Prometheus text format of the per-stage instrumentation, when the server was started with metrics=True.
+
+    Parameters
+    ----------
+    detector_name : str
+        The detector plugin to load, e.g. "paddleocr_detector".
+    recognizer_name : str
+        The recognizer plugin to load, e.g. "mangaocr_recognizer".
+    language : str, optional
+        The language both plugins are initialized with.
+    host : str, optional
+        The address to listen on when serving HTTP over TCP, by default "127.0.0.1".
+    port : int, optional
+        The port to listen on when serving HTTP over TCP, by default 8765.
+    unix_socket : str | None, optional
+        Serve on this Unix socket path instead of a TCP port.
+    metrics : bool, optional
+        Enable instrumentation and expose it on /metrics, by default False.
+    """
+
+    def __init__(self,
+            detector_name: str,
+            recognizer_name: str,
+            language: str = None,
+            host: str = "127.0.0.1",
+            port: int = 8765,
+            unix_socket: str = None,
+            metrics: bool = False):
+
+        self._detector_name = detector_name
+        self._recognizer_name = recognizer_name
+        self._language = language
+        self._host = host
+        self._port = port
+        self._unix_socket = unix_socket
+
+        self._detector = None
+        self._recognizer = None
+        self._ready = threading.Event()
+        self._load_error = None
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._metrics = None
+
+        if metrics:
+            self._metrics = PrometheusSink()
+            INSTRUMENTATION.enable(self._metrics, *INSTRUMENTATION.Sinks)
+
+    def load(self) -> None:
+        from OPRDetectRecog.Registry import DETECTORS, RECOGNIZERS
+
+        try:
+            start = time.perf_counter()
+
+            detector = DETECTORS.get(self._detector_name, self._language)
+            recognizer = RECOGNIZERS.get(self._recognizer_name, self._language)
+
+            # prime both engines so the first real request doesn't pay for graph building and lazy loading
+            detector.warmup()
+            recognizer.warmup()
+
+            self._detector, self._recognizer = detector, recognizer
+            self._ready.set()
+            opr.print_from("OPR DetectRecog Server", f"Models ready in {time.perf_counter() - start:.2f}s")
+            DETECTORS.report()
+            RECOGNIZERS.report()
+            opr.print_from("OPR DetectRecog Server", f"Warm-up took {detector.StartupTimings['warmup']:.2f}s + {recognizer.StartupTimings['warmup']:.2f}s")
+
+        except Exception as e:
+            self._load_error = e
+            opr.print_from("OPR DetectRecog Server", f"Failed to load models: {e}")
+
+    def recognize(self, data: bytes | Frame) -> list[LinguistResult]:
+        # decoded once, straight to a BGR Frame, which is also what PaddleOCR wants
+        img = as_frame(data)
+
+        # the engines are not thread-safe, connections are accepted concurrently but inference is serialized
+        with self._lock:
+            crops = self._detector.detect_and_crop(img)
+            return recognize_crops(self._recognizer, crops)
+
+    def serve_forever(self) -> None:
+        threading.Thread(target=self.load, name="OPRDetectRecog-load", daemon=True).start()
+
+        handler = self.create_handler()
+
+        if self._unix_socket:
+            if os.path.exists(self._unix_socket):
+                os.unlink(self._unix_socket)
+            self._httpd = ThreadingUnixHTTPServer(self._unix_socket, handler)
+            where = self._unix_socket
+        else:
+            self._httpd = ThreadingHTTPServer((self._host, self._port), handler)
+            where = f"http://{self._host}:{self._httpd.server_address[1]}"
+
+        opr.print_from("OPR DetectRecog Server", f"Listening on {where}")
+
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            if self._unix_socket and os.path.exists(self._unix_socket):
+                os.unlink(self._unix_socket)
+
+    def shutdown(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+
+    def create_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path == "/health":
+                    return self.reply(200, {"status": "ok"})
+
+                if self.path == "/ready":
+                    if server._ready.is_set():
+                        return self.reply(200, {"ready": True})
+                    return self.reply(503, {"ready": False, "error": None if server._load_error is None else str(server._load_error)})
+
+                if self.path == "/metrics" and server._metrics is not None:
+                    payload = server._metrics.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                self.reply(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/recognize":
+                    return self.reply(404, {"error": f"Unknown path {self.path}"})
+
+                if not server._ready.wait(timeout=0):
+                    return self.reply(503, {"error": "Models are still loading"})
+
+                # everything wrong with the request itself is a 400, only failures of the models are a 500
+                try:
+                    length = int(self.headers.get("Content-Length", ""))
+                except ValueError:
+                    return self.reply(400, {"error": "Missing or malformed Content-Length"})
+
+                if length <= 0:
+                    return self.reply(400, {"error": "Empty body, expected an encoded image"})
+
+                data = self.rfile.read(length)
+                if len(data) != length:
+                    return self.reply(400, {"error": f"Expected {length} bytes, got {len(data)}"})
+
+                try:
+                    frame = as_frame(data)
+                except Exception as e:
+                    return self.reply(400, {"error": f"Could not decode image: {e}"})
+
+                try:
+                    results = server.recognize(frame)
+                except Exception as e:
+                    opr.print_from("OPR DetectRecog Server", f"Recognition failed: {e}")
+                    return self.reply(500, {"error": str(e)})
+
+                self.reply(200, [result.to_dict() for result in results])
+
+            def reply(self, status: int, body) -> None:
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def address_string(self) -> str:
+                # unix socket peers have no (host, port) address
+                return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+    @property
+    def Ready(self) -> bool:
+        return self._ready.is_set()
+
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+
+class DetectRecogClient:
+    """
+    Thin client for a DetectRecogServer.
+
+    Parameters
+    ----------
+    host : str, optional
+        The server address, by default "127.0.0.1".
+    port : int, optional
+        The server port, by default 8765.
+    unix_socket : str | None, optional
+        Talk to the server over this Unix socket instead.
+    timeout : float, optional
+        Socket timeout in seconds, by default 60.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_socket: str = None, timeout: float = 60.0):
+        self._host = host
+        self._port = port
+        self._unix_socket = unix_socket
+        self._timeout = timeout
+
+    def connection(self) -> http.client.HTTPConnection:
+        if self._unix_socket:
+            return UnixHTTPConnection(self._unix_socket, timeout=self._timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def request(self, method: str, path: str, body: bytes = None) -> tuple[int, object]:
+        conn = self.connection()
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/octet-stream"} if body else {})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read() or b"null")
+        finally:
+            conn.close()
+
+    def health(self) -> bool:
+        try:
+            return self.request("GET", "/health")[0] == 200
+        except OSError:
+            return False
+
+    def ready(self) -> bool:
+        try:
+            return self.request("GET", "/ready")[0] == 200
+        except OSError:
+            return False
+
+    def wait_until_ready(self, timeout: float = 300.0, interval: float = 0.2) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready():
+                return True
+            time.sleep(interval)
+        return False
+
+    def recognize(self, image: bytes | str | Image.Image) -> list[LinguistResult]:
+        """
+        Sends an image to the server and returns the recognized text.
+
+        Parameters
+        ----------
+        image : bytes | str | Image.Image
+            Encoded image bytes, a path to an image file, or a PIL image (sent as PNG).
+
+        Returns
+        -------
+        list[LinguistResult]
+            The server's results, rebuilt as LinguistResult objects.
+        """
+
+        if isinstance(image, Image.Image):
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            image = buffer.getvalue()
+        elif isinstance(image, str):
+            with open(image, "rb") as f:
+                image = f.read()
+
+        status, body = self.request("POST", "/recognize", image)
+        if status != 200:
+            raise RuntimeError(f"OPR DetectRecog Server returned {status}: {body}")
+
+        return [LinguistResult.from_dict(result) for result in body]
+
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Keep an OPR DetectRecog detector and recognizer warm behind a local socket")
+    parser.add_argument("--detector", default="paddleocr_detector")
+    parser.add_argument("--recognizer", default="mangaocr_recognizer")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--metrics", action="store_true", help="expose per-stage timings on /metrics")
+    args = parser.parse_args(argv)
+
+    server = DetectRecogServer(args.detector, args.recognizer, args.language, args.host, args.port, args.unix_socket, args.metrics)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        opr.print_from("OPR DetectRecog Server", "Goodbye!", 2)
+
+
+if __name__ == "__main__":
+    main()
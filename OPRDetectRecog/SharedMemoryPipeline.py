@@ -0,0 +1,166 @@
+from OPRDetectRecog.Pipeline import DetectRecogPipeline, _WORKER_PLUGINS, _init_worker
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CropEngine
+from OPRDetectRecog.Custom.SharedRing import FrameRef, SharedRing, attach
+from OPRDetectRecog.Custom.Frame import Frame, as_frame
+from concurrent.futures import Future, ProcessPoolExecutor
+import threading
+import numpy
+
+
+# every recognize worker crops its frames itself, one at a time
+_WORKER_CROPPER = CropEngine(arenas=1)
+
+
+def _detect_shared(ref: FrameRef, space: str) -> tuple[numpy.ndarray, numpy.ndarray]:
+    boxes = _WORKER_PLUGINS["detector"].detect(Frame(attach(ref), space))
+    return numpy.ascontiguousarray(boxes.Points), numpy.ascontiguousarray(boxes.Angles)
+
+
+def _recognize_shared(ref: FrameRef, space: str, points: numpy.ndarray, angles: numpy.ndarray) -> list[tuple]:
+    recognizer = _WORKER_PLUGINS["recognizer"]
+    crops = _WORKER_CROPPER.crop(Frame(attach(ref), space), QuadBoxArray.wrap(points, angles))
+
+    frames = [crop.get(recognizer.InputFormat) for crop in crops]
+    recognized = recognizer.recognize_batch(frames, [crop.QuadBox for crop in crops])
+
+    # the boxes are already on the owner's side, so only text, confidence and box index go back
+    return [(index, r.Original, r.Translated, r.Confidence) for index, results in enumerate(recognized) for r in results]
+
+
+
+class SharedMemoryPipeline(DetectRecogPipeline):
+    """
+    A process pool DetectRecogPipeline that moves frames through shared memory instead of pickling them.
+
+    Each frame is copied once into a slot of a SharedRing. Detection workers read it in place and send back only
+    the box coordinates. Recognition workers read the same slot, crop it themselves and send back one compact
+    (box index, text, translation, confidence) record per result, which the owner binds to its QuadBoxes. Neither
+    frames nor crops are ever pickled, so adding workers scales with the cores instead of with serialization.
+
+    The slot is released once the frame is recognized, or dropped when the consumer stops early; while every slot
+    is taken, reading the input pauses. Inputs go through as_frame as they come in, so anything a Detector accepts
+    is fine, and their colour space travels with the FrameRef. A frame too large for a slot, such as one huge scan
+    in a stream of screenshots, takes DetectRecogPipeline's pickling path instead.
+
+    Parameters
+    ----------
+    detector_name, recognizer_name : str
+        Plugin names, loaded and initialized once per worker process through the registries.
+    language : str, optional
+        Passed to both plugins' initialize, by default None.
+    detector_kwargs, recognizer_kwargs : dict, optional
+        Extra initialize arguments for each plugin.
+    detect_queue_size, recognize_queue_size, detect_workers, recognize_workers : int, optional
+        As in DetectRecogPipeline.
+    slot_bytes : int, optional
+        The largest frame the ring holds, by default None which sizes the ring from the first frame, so shared
+        memory is only taken for frames that are actually streamed.
+    """
+
+    def __init__(self,
+            detector_name: str,
+            recognizer_name: str,
+            language: str = None,
+            detector_kwargs: dict = None,
+            recognizer_kwargs: dict = None,
+            detect_queue_size: int = 4,
+            recognize_queue_size: int = 4,
+            detect_workers: int = 1,
+            recognize_workers: int = 1,
+            slot_bytes: int = None):
+
+        self._detector = None
+        self._recognizer = None
+        self._detect_queue_size = detect_queue_size
+        self._recognize_queue_size = recognize_queue_size
+
+        self._detect_pool = ProcessPoolExecutor(detect_workers, initializer=_init_worker,
+                                                initargs=(detector_name, None, language, {"detector": detector_kwargs or {}}))
+        self._recognize_pool = ProcessPoolExecutor(recognize_workers, initializer=_init_worker,
+                                                   initargs=(None, recognizer_name, language, {"recognizer": recognizer_kwargs or {}}))
+
+        # one slot for every frame that can be between the input and the consumer
+        self._slots = detect_queue_size + recognize_queue_size + detect_workers + recognize_workers + 2
+        self._ring = SharedRing(self._slots, slot_bytes) if slot_bytes else None
+        self._ring_lock = threading.Lock()
+
+    def ring_for(self, frame: numpy.ndarray) -> SharedRing | None:
+        """
+        The ring frame goes through, created on the first frame with slots of its size rounded up to whole MiB, or
+        None if frame does not fit a slot.
+        """
+
+        with self._ring_lock:
+            if self._ring is None:
+                self._ring = SharedRing(self._slots, -(-max(frame.nbytes, 1) // 2**20) * 2**20)
+
+        return self._ring if frame.nbytes <= self._ring.SlotBytes else None
+
+    def submit_detect(self, frame) -> Future:
+        fr = as_frame(frame)
+
+        ring = self.ring_for(fr.Array)
+        if ring is None:
+            return super().submit_detect(fr)
+
+        ref = ring.write(fr.Array)
+        detected = self._detect_pool.submit(_detect_shared, ref, fr.Space)
+
+        located = Future()
+
+        def done(future: Future) -> None:
+            try:
+                points, angles = future.result()
+            except BaseException as e:
+                self._ring.release(ref)
+                located.set_exception(e)
+                return
+            located.set_result((ref, fr.Space, points, angles))
+
+        detected.add_done_callback(done)
+        return located
+
+    def submit_recognize(self, located: tuple | list) -> Future:
+        if not isinstance(located, tuple):
+            # crops from the pickling path
+            return super().submit_recognize(located)
+
+        ref, space, points, angles = located
+        recognized = self._recognize_pool.submit(_recognize_shared, ref, space, points, angles)
+
+        boxes = QuadBoxArray.wrap(points, angles)
+        results = Future()
+
+        def done(future: Future) -> None:
+            self._ring.release(ref)
+            try:
+                records = future.result()
+            except BaseException as e:
+                results.set_exception(e)
+                return
+            results.set_result([LinguistResult(boxes[index], original, translated, confidence) for index, original, translated, confidence in records])
+
+        recognized.add_done_callback(done)
+        return results
+
+    def discard(self, detected: Future) -> None:
+        # the frame will never be recognized, so its slot is freed as soon as detection is over
+        def release(future: Future) -> None:
+            if future.cancelled() or future.exception() is not None:
+                return
+            located = future.result()
+            if isinstance(located, tuple):
+                self._ring.release(located[0])
+
+        detected.add_done_callback(release)
+
+    def close(self) -> None:
+        super().close()
+        if self._ring is not None:
+            self._ring.close()
+
+    @property
+    def Ring(self) -> SharedRing | None:
+        return self._ring
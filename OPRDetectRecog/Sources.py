@@ -0,0 +1,226 @@
+from typing import BinaryIO, Iterable, Iterator
+from OPRDetectRecog.Custom.Frame import native_mode
+from OperaPowerRelay import opr
+from PIL import Image, ImageSequence
+import threading
+import zipfile
+import queue
+import io
+import os
+import re
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+ARCHIVE_EXTENSIONS = (".zip", ".cbz")
+
+_END = object()
+
+
+class Page:
+    """
+    One decoded frame from a source, with where it came from.
+
+    Properties
+    ----------
+    Image : Image.Image
+        The decoded frame.
+    Name : str
+        The file, archive member or stream it came from.
+    Index : int
+        The frame's number within Name, 0 for single-frame images.
+    """
+
+    __slots__ = ("_image", "_name", "_index")
+
+    def __init__(self, image: Image.Image, name: str, index: int = 0):
+        self._image = image
+        self._name = name
+        self._index = index
+
+    @property
+    def Image(self) -> Image.Image:
+        return self._image
+
+    @property
+    def Name(self) -> str:
+        return self._name
+
+    @property
+    def Index(self) -> int:
+        return self._index
+
+    def __repr__(self) -> str:
+        return f"Page {self._name}#{self._index} {self._image.size}"
+
+
+def natural_key(name: str) -> list:
+    """
+    Sorts page2.png before page10.png.
+    """
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def iter_image(image: Image.Image, name: str, mode: str = None) -> Iterator[Page]:
+    """
+    Yields every frame of an opened image, so multi-frame TIFFs and GIFs come out page by page. Each frame is
+    decoded only when it is reached. With mode None, frames keep their own mode when numpy can take it as is (L, RGB,
+    RGBA), so an RGB page isn't blown up to RGBA just to be converted back later.
+    """
+
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        # the sequence reuses one image object, so every page gets its own pixels
+        page = frame.convert(mode) if mode else native_mode(frame)
+        yield Page(page.copy() if page is frame else page, name, index)
+
+
+def iter_file(path: str, mode: str = None) -> Iterator[Page]:
+    with Image.open(path) as image:
+        yield from iter_image(image, path, mode)
+
+
+def iter_directory(path: str, mode: str = None, recursive: bool = False) -> Iterator[Page]:
+    """
+    Yields the pages of every image in a directory, in natural file name order.
+    """
+
+    if recursive:
+        paths = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    else:
+        paths = [os.path.join(path, name) for name in os.listdir(path)]
+
+    for file in sorted((p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS)), key=natural_key):
+        yield from iter_file(file, mode)
+
+
+def iter_archive(path: str, mode: str = None) -> Iterator[Page]:
+    """
+    Yields the pages of every image in a zip or cbz archive, in natural member name order. Members are read one at
+    a time, so only the page being decoded is held in memory.
+    """
+
+    with zipfile.ZipFile(path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)]
+
+        for info in sorted(members, key=lambda info: natural_key(info.filename)):
+            with Image.open(io.BytesIO(archive.read(info))) as image:
+                yield from iter_image(image, f"{path}/{info.filename}", mode)
+
+
+def iter_bytes(data: bytes | bytearray | memoryview | BinaryIO, name: str = "<bytes>", mode: str = None) -> Iterator[Page]:
+    """
+    Yields the pages of one encoded image held in memory or readable from a binary stream.
+    """
+
+    stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+    with Image.open(stream) as image:
+        yield from iter_image(image, name, mode)
+
+
+def open_source(source, mode: str = None, recursive: bool = False) -> Iterator[Page]:
+    """
+    Lazily yields the pages of source, whatever it is.
+
+    Parameters
+    ----------
+    source : str | os.PathLike | bytes | BinaryIO | Image.Image | Iterable
+        A directory of images, a zip/cbz archive, an image file (every frame of a multi-frame TIFF or GIF), encoded
+        image bytes, a binary stream, an opened PIL image, or an iterable of any of these, e.g. a generator
+        of bytes arriving over a socket.
+    mode : str, optional
+        The PIL mode every page is converted to, by default None which keeps L, RGB and RGBA pages as they are.
+    recursive : bool, optional
+        Whether directories are walked recursively, by default False.
+
+    Yields
+    ------
+    Page
+        Every page, decoded only when it is reached.
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+
+        if os.path.isdir(path):
+            yield from iter_directory(path, mode, recursive)
+        elif path.lower().endswith(ARCHIVE_EXTENSIONS):
+            yield from iter_archive(path, mode)
+        elif os.path.isfile(path):
+            yield from iter_file(path, mode)
+        else:
+            opr.error_pretty(FileNotFoundError, "OPR Sources", f"Source not found! {path}", "HUMAN ERROR")
+            raise FileNotFoundError(path)
+
+    elif isinstance(source, Image.Image):
+        yield from iter_image(source, getattr(source, "filename", "") or "<image>", mode)
+
+    elif isinstance(source, (bytes, bytearray, memoryview)) or hasattr(source, "read"):
+        yield from iter_bytes(source, getattr(source, "name", "<bytes>"), mode)
+
+    elif isinstance(source, Iterable):
+        for item in source:
+            yield from open_source(item, mode, recursive)
+
+    else:
+        opr.error_pretty(TypeError, "OPR Sources", f"Unsupported source! {type(source).__name__}", "HUMAN ERROR")
+        raise TypeError(f"Unsupported source {type(source).__name__}")
+
+
+def prefetch(items: Iterable, depth: int = 2) -> Iterator:
+    """
+    Runs items on a background thread, at most depth items ahead of the consumer, so decoding the next pages
+    overlaps whatever is done with the current one. depth 0 iterates in the caller's thread instead.
+    """
+
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+        put(_END)
+
+    producer = threading.Thread(target=produce, name="OPRDetectRecog-prefetch", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+        # unblock the producer if the consumer stopped early
+        while True:
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                break
+
+
+def iter_pages(source, prefetch_depth: int = 2, mode: str = None, recursive: bool = False) -> Iterator[Page]:
+    """
+    open_source, decoded prefetch_depth pages ahead on a background thread.
+    """
+    return prefetch(open_source(source, mode, recursive), prefetch_depth)
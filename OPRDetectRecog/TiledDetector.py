@@ -0,0 +1,212 @@
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import Frame, as_frame
+from OPRDetectRecog.Custom.ExecutionConfig import ExecutionConfig
+from OPRDetectRecog.Custom.BoxIndex import BoxIndex, rect_areas
+from OPRDetectRecog.Custom.BoxGrouping import connected_components, merge
+from concurrent.futures import ThreadPoolExecutor
+from OperaPowerRelay import opr
+import queue
+import numpy
+
+
+def tile_starts(length: int, tile: int, overlap: int) -> list[int]:
+    """
+    Where tiles of size tile start along an axis of the given length, overlapping by at least overlap, the last one
+    flush with the end.
+    """
+
+    if length <= tile:
+        return [0]
+
+    step = tile - overlap
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+
+class TiledDetector(Detector):
+    """
+    Wraps a detector for very large images, such as long webtoon strips and high resolution scans.
+
+    Instead of letting the engine shrink the whole frame (PaddleOCR limits the side it detects on to 960 pixels by
+    default, so small text vanishes), the frame is cut into overlapping tiles that are detected at full resolution
+    and their boxes moved back into frame coordinates. Tiles are only cut out when a worker picks them up, so no more
+    than one tile per worker exists at a time.
+
+    Along the seams, a box touching a tile's inner edge is dropped when it fits in the overlap, since the
+    neighbouring tile then holds all of it. Of what is left, boxes from different tiles are merged when one covers
+    more than min_containment of the other, so whole duplicates collapse into one box, or when they are two pieces
+    of a line too long for the overlap: both touch the seam between neighbouring tiles, cross the whole overlap
+    band, and line up across it with a similar height.
+
+    Parameters
+    ----------
+    detector : Detector | list[Detector]
+        The initialized detector, or several initialized copies of it to detect tiles on in parallel. Plugins are
+        not assumed to be thread-safe, so each copy only ever runs one tile at a time.
+    tile_size : int, optional
+        The side of a tile in pixels, by default 960 to match PaddleOCR's detection size.
+    overlap : int, optional
+        How much neighbouring tiles overlap, which should exceed the tallest expected line, by default 128.
+    min_containment : float, optional
+        How much of the smaller of two boxes from different tiles must be covered for them to be merged, by default 0.6.
+    """
+
+    def __init__(self, detector: Detector | list[Detector], tile_size: int = 960, overlap: int = 128, min_containment: float = 0.6):
+        detectors = list(detector) if isinstance(detector, (list, tuple)) else [detector]
+
+        if not detectors or overlap < 0 or overlap >= tile_size:
+            opr.error_pretty(ValueError, "OpheliaVisorR | TiledDetector", f"Invalid tiling! tile {tile_size}, overlap {overlap}", "HUMAN ERROR")
+            raise ValueError("TiledDetector needs a detector and 0 <= overlap < tile_size")
+
+        super().__init__(detectors[0]._language, detectors[0]._path)
+
+        self._inner = detectors
+        # its own engine label, so instrumentation doesn't count the wrapped detectors' calls twice
+        self._name = f"tiled:{detectors[0].Name}"
+        self._crop_engine = detectors[0].Cropper
+
+        self._tile_size = tile_size
+        self._overlap = overlap
+        self._min_containment = min_containment
+
+        self._free = queue.Queue()
+        for copy in detectors:
+            self._free.put(copy)
+        self._pool = ThreadPoolExecutor(max_workers=len(detectors), thread_name_prefix="OPRDetectRecog-tile")
+
+    def get_supported_languages(self, as_dict: bool = False) -> list[str] | dict[str, str]:
+        return self._inner[0].get_supported_languages(as_dict)
+
+    def initialize(self, language: str = None, path: str = None, execution: ExecutionConfig = None) -> bool:
+        result = all([copy.initialize(language, path, execution) for copy in self._inner])
+        self._execution = self._inner[0].Execution
+        return result
+
+    def tiles(self, height: int, width: int) -> list[tuple[int, int, int, int]]:
+        """
+        The tiles of a frame, as (x0, y0, x1, y1) rectangles.
+        """
+        size = self._tile_size
+        return [(x, y, min(x + size, width), min(y + size, height))
+                for y in tile_starts(height, size, self._overlap)
+                for x in tile_starts(width, size, self._overlap)]
+
+    def detect_tile(self, frame: Frame, tile: tuple[int, int, int, int]) -> QuadBoxArray:
+        x0, y0, x1, y1 = tile
+        detector = self._free.get()
+        try:
+            return detector.detect(Frame(numpy.ascontiguousarray(frame.Array[y0:y1, x0:x1]), frame.Space)).translate(x0, y0)
+        finally:
+            self._free.put(detector)
+
+    def detect(self, frame: numpy.ndarray) -> QuadBoxArray:
+        fr = as_frame(frame)
+        height, width = fr.Shape[:2]
+        tiles = self.tiles(height, width)
+
+        if len(tiles) == 1:
+            return self.detect_tile(fr, tiles[0])
+
+        found = list(self._pool.map(lambda tile: self.detect_tile(fr, tile), tiles))
+        return self.stitch(found, tiles, height, width)
+
+    def stitch(self, found: list[QuadBoxArray], tiles: list[tuple[int, int, int, int]], height: int, width: int) -> QuadBoxArray:
+        """
+        Joins the boxes of every tile, dropping and merging the duplicates along the seams.
+        """
+
+        boxes = QuadBoxArray.concatenate(found)
+        if len(boxes) == 0:
+            return boxes
+
+        origin = numpy.repeat(numpy.arange(len(tiles)), [len(f) for f in found])
+        rects = numpy.array(tiles, dtype=numpy.float32)[origin]
+        bounds = boxes.Bounds
+
+        # a tile edge is inner unless it is also the frame's edge
+        inner = numpy.stack([rects[:, 0] > 0, rects[:, 1] > 0, rects[:, 2] < width, rects[:, 3] < height], axis=1)
+        touching = numpy.stack([bounds[:, 0] <= rects[:, 0] + 1, bounds[:, 1] <= rects[:, 1] + 1,
+                                bounds[:, 2] >= rects[:, 2] - 1, bounds[:, 3] >= rects[:, 3] - 1], axis=1) & inner
+
+        # the neighbour across a touched edge holds the whole box if it fits in the overlap
+        extent = numpy.stack([bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1]] * 2, axis=1)
+        cut = (touching & (extent < self._overlap)).any(axis=1)
+
+        boxes, origin, bounds = boxes[~cut], origin[~cut], bounds[~cut]
+        rects, touching = rects[~cut], touching[~cut]
+
+        i, j = BoxIndex(boxes, bounds=bounds).candidate_pairs()
+        x0 = numpy.maximum(bounds[i, 0], bounds[j, 0])
+        y0 = numpy.maximum(bounds[i, 1], bounds[j, 1])
+        x1 = numpy.minimum(bounds[i, 2], bounds[j, 2])
+        y1 = numpy.minimum(bounds[i, 3], bounds[j, 3])
+        intersection = numpy.clip(x1 - x0, 0, None) * numpy.clip(y1 - y0, 0, None)
+
+        areas = rect_areas(bounds)
+        smaller = numpy.maximum(numpy.minimum(areas[i], areas[j]), 1e-6)
+        same = (origin[i] != origin[j]) & (intersection / smaller >= self._min_containment)
+        same |= self.seam_pieces(bounds, rects, touching, i, j) | self.seam_pieces(bounds, rects, touching, j, i)
+
+        if not same.any():
+            return boxes
+
+        labels = connected_components(len(boxes), i[same], j[same])
+        merged, _ = merge(boxes, labels, vertical=False)
+        return merged
+
+    @staticmethod
+    def seam_pieces(bounds: numpy.ndarray, rects: numpy.ndarray, touching: numpy.ndarray, a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+        """
+        Which pairs (a, b) are two pieces of one line cut by a seam, with a's tile left of or above b's: a touches
+        its tile's right (bottom) edge and b its tile's left (top) edge, both span the band the two tiles share, and
+        across the seam they overlap by at least half the thinner one, which is no more than 1.5 times thinner.
+
+        Their overlap is at most the tile overlap, so containment can't tell such pieces apart from neighbouring
+        lines once both are longer than that.
+        """
+
+        pairs = numpy.zeros(len(a), dtype=bool)
+
+        # axis 0 is a horizontal line cut by a vertical seam, axis 1 a vertical column cut by a horizontal one
+        for along in (0, 1):
+            across = 1 - along
+
+            band_start, band_end = rects[b, along], rects[a, along + 2]
+            neighbours = (rects[a, across] == rects[b, across]) & (band_start < band_end)
+            cut = touching[a, along + 2] & touching[b, along]
+
+            span = numpy.minimum(bounds[a, along + 2], bounds[b, along + 2]) - numpy.maximum(bounds[a, along], bounds[b, along])
+            spans_band = span >= band_end - band_start - 2
+
+            thick_a = bounds[a, across + 2] - bounds[a, across]
+            thick_b = bounds[b, across + 2] - bounds[b, across]
+            thinner = numpy.maximum(numpy.minimum(thick_a, thick_b), 1e-6)
+            shared = numpy.minimum(bounds[a, across + 2], bounds[b, across + 2]) - numpy.maximum(bounds[a, across], bounds[b, across])
+            in_line = (shared >= 0.5 * thinner) & (numpy.maximum(thick_a, thick_b) <= 1.5 * thinner)
+
+            pairs |= neighbours & cut & spans_band & in_line
+
+        return pairs
+
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        return self.crop_boxes(fr, self.detect(fr))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    @property
+    def Detectors(self) -> list[Detector]:
+        return list(self._inner)
+
+    @property
+    def TileSize(self) -> int:
+        return self._tile_size
+
+    @property
+    def Overlap(self) -> int:
+        return self._overlap
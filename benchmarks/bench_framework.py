@@ -0,0 +1,203 @@
+"""
+Offline benchmarks for the framework around the OCR models: QuadBox construction, Detector.detect,
+detect_and_crop, crop_rotated_box and each Recognizer.
+
+Everything runs on synthetic PIL pages and deterministic stand-in engines, so it needs no network and no model
+weights, and the numbers track the Python overhead of OPR DetectRecog itself. Pass --real to also time
+installed engines through the plugin registry.
+
+    python benchmarks/bench_framework.py --repeats 50 --json bench.json
+    python benchmarks/bench_framework.py --compare bench.json
+"""
+
+from pathlib import Path
+import argparse
+import json
+import time
+import sys
+import gc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.Frame import as_frame
+from OPRDetectRecog.ModelPool import current_rss
+from OPRDetectRecog.Pipeline import recognize_crops
+from benchmarks.synthetic import make_text_image
+from benchmarks.standins import StandInPaddleOCR, standin_detector, standin_recognizer, standin_paddleocr_recognizer
+import numpy
+
+
+def peak_rss() -> int:
+    try:
+        import resource
+        # ru_maxrss is in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return current_rss()
+
+
+def measure(name: str, fn, items: int, repeats: int, warmup: int = 2) -> dict:
+    """
+    Times fn repeats times and returns latency percentiles (ms), throughput (items/s) and memory figures.
+    """
+
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    rss_before = current_rss()
+    samples = numpy.empty(repeats)
+
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+
+    p50, p90, p99 = numpy.percentile(samples, [50, 90, 99]) * 1000
+    return {
+        "name": name,
+        "items": items,
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "mean_ms": float(samples.mean() * 1000),
+        "throughput": float(items * repeats / samples.sum()) if samples.sum() else float("inf"),
+        "rss_growth_mb": (current_rss() - rss_before) / 2**20,
+        "peak_rss_mb": peak_rss() / 2**20,
+    }
+
+
+def framework_cases(args) -> list:
+    page = make_text_image(args.width, args.height, seed=args.seed)
+    frame = numpy.asarray(page)
+
+    detector = standin_detector(rotate_every=args.rotate_every, seed=args.seed)
+    raw = StandInPaddleOCR(rotate_every=args.rotate_every, seed=args.seed).ocr(frame, rec=False)[0]
+    raw_array = numpy.asarray(raw, dtype=numpy.float32)
+    boxes = detector.detect(frame)
+    crops = detector.detect_and_crop(page)
+
+    for crop in crops:
+        crop.detach()
+
+    count = len(boxes)
+    cases = [
+        ("quadbox/per_box", lambda: [QuadBox(b) for b in raw], count),
+        ("quadbox/array", lambda: QuadBoxArray(raw_array), count),
+        ("quadbox/array_geometry", lambda: (boxes.Widths, boxes.Heights, boxes.Areas, boxes.AreasStrict, boxes.Centers), count),
+        ("quadbox/per_box_geometry", lambda: [(b.Width, b.Height, b.Area, b.AreaStrict, b.Center) for b in boxes], count),
+        ("detector/detect", lambda: detector.detect(frame), 1),
+        ("detector/detect_and_crop", lambda: detector.detect_and_crop(page), 1),
+        ("input/as_frame_bgr", lambda: as_frame(page).get("BGR"), 1),
+        ("crop/crop_rotated_box", lambda: [detector.crop_rotated_box(frame, b.to_numpy) for b in boxes], count),
+        ("crop/crop_boxes", lambda: detector.crop_boxes(frame, boxes), count),
+        ("crop/crop_boxes_pil", lambda: [c.Image for c in detector.crop_boxes(frame, boxes)], count),
+    ]
+
+    recognizers = [standin_recognizer(max_batch_size=args.batch_size), standin_paddleocr_recognizer(max_batch_size=args.batch_size)]
+    for recognizer in recognizers:
+        frames = [crop.get(recognizer.InputFormat) for crop in crops]
+        bboxes = [crop.QuadBox for crop in crops]
+        cases.append((f"recognizer/{recognizer.Name}/recognize", lambda r=recognizer, f=frames: [r.recognize(x, b) for x, b in zip(f, bboxes)], count))
+        cases.append((f"recognizer/{recognizer.Name}/recognize_batch", lambda r=recognizer, f=frames: r.recognize_batch(f, bboxes), count))
+
+    cases.append(("end_to_end/standin", lambda: recognize_crops(recognizers[0], detector.detect_and_crop(page)), 1))
+
+    if args.real:
+        cases.extend(real_cases(args, page, crops))
+
+    return cases
+
+
+def real_cases(args, page, crops) -> list:
+    from OPRDetectRecog.Registry import DETECTORS, RECOGNIZERS
+
+    cases = []
+    for name in DETECTORS.names():
+        try:
+            detector = DETECTORS.get(name, args.language)
+        except Exception as e:
+            print(f"skipping {name}: {e}")
+            continue
+        cases.append((f"real/{name}/detect_and_crop", lambda d=detector: d.detect_and_crop(page), 1))
+
+    bboxes = [crop.QuadBox for crop in crops]
+    for name in RECOGNIZERS.names():
+        try:
+            recognizer = RECOGNIZERS.get(name, args.language)
+        except Exception as e:
+            print(f"skipping {name}: {e}")
+            continue
+        recognizer.MaxBatchSize = args.batch_size
+        frames = [crop.get(recognizer.InputFormat) for crop in crops]
+        cases.append((f"real/{name}/recognize_batch", lambda r=recognizer, f=frames: r.recognize_batch(f, bboxes), len(crops)))
+
+        # plugins with an int8 mode are timed next to their fp32 path
+        if hasattr(recognizer, "Quantized") and args.quantized:
+            quantized = type(recognizer)(max_batch_size=args.batch_size, quantize=True)
+            if not quantized.initialize(args.language):
+                quantized.initialize(None)
+            cases.append((f"real/{name}/recognize_batch_int8", lambda r=quantized, f=frames: r.recognize_batch(f, bboxes), len(crops)))
+
+    return cases
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    regressions = 0
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None:
+            continue
+
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        flag = "REGRESSION" if change > tolerance else ""
+        regressions += bool(flag)
+        print(f"{result['name']:<55} {before['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms ({change:+7.1%}) {flag}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=1600)
+    parser.add_argument("--rotate-every", type=int, default=5, help="tilt every n-th stand-in box, 0 for none")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this")
+    parser.add_argument("--real", action="store_true", help="also time the installed engines")
+    parser.add_argument("--quantized", action="store_true", help="with --real, also time the int8 mode of recognizers that have one")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--json", default=None, help="write the results to this file")
+    parser.add_argument("--compare", default=None, help="compare p50 latencies against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="p50 slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'case':<55} {'items':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'items/s':>11} {'peak MiB':>9}")
+
+    for name, fn, items in framework_cases(args):
+        if args.filter and args.filter not in name:
+            continue
+
+        result = measure(name, fn, items, args.repeats)
+        results.append(result)
+        print(f"{name:<55} {items:>6} {result['p50_ms']:9.3f} {result['p90_ms']:9.3f} {result['p99_ms']:9.3f} "
+              f"{result['throughput']:11.1f} {result['peak_rss_mb']:9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares the latency of a cold run (fresh interpreter, load and initialize the plugins, process one image) with
+requests against a warm DetectRecogServer that already holds the models.
+
+    python benchmarks/server_latency.py --detector paddleocr_detector --recognizer mangaocr_recognizer --language japanese
+"""
+
+from pathlib import Path
+import subprocess
+import statistics
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import make_text_image
+
+
+def cold(args) -> None:
+    from OPRDetectRecog.OPRDetectRecog import load_detectors, load_recognizers
+    from OPRDetectRecog.Pipeline import recognize_crops
+    from PIL import Image
+
+    detector = load_detectors(args.detector)
+    detector.initialize(args.language)
+    recognizer = load_recognizers(args.recognizer)
+    recognizer.initialize(args.language)
+
+    recognize_crops(recognizer, detector.detect_and_crop(Image.open(args.image).convert('RGBA')))
+
+
+def compare(args) -> None:
+    from OPRDetectRecog.Server import DetectRecogClient
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image = args.image
+        if image is None:
+            image = os.path.join(tmp, "page.png")
+            make_text_image(seed=args.seed).save(image)
+
+        base = [sys.executable, __file__, "--detector", args.detector, "--recognizer", args.recognizer]
+        if args.language:
+            base += ["--language", args.language]
+
+        cold_times = []
+        for _ in range(args.cold_runs):
+            start = time.perf_counter()
+            subprocess.run(base + ["--image", image, "cold"], check=True, cwd=ROOT)
+            cold_times.append(time.perf_counter() - start)
+
+        socket_path = os.path.join(tmp, "server.sock")
+        server_cmd = [sys.executable, "-m", "OPRDetectRecog.Server", "--detector", args.detector,
+                      "--recognizer", args.recognizer, "--unix-socket", socket_path]
+        if args.language:
+            server_cmd += ["--language", args.language]
+
+        start = time.perf_counter()
+        server = subprocess.Popen(server_cmd, cwd=ROOT)
+        try:
+            client = DetectRecogClient(unix_socket=socket_path)
+            if not client.wait_until_ready():
+                raise RuntimeError("Server never became ready")
+            ready_time = time.perf_counter() - start
+
+            warm_times = []
+            for _ in range(args.warm_runs):
+                start = time.perf_counter()
+                client.recognize(image)
+                warm_times.append(time.perf_counter() - start)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"cold CLI      : median {statistics.median(cold_times) * 1000:9.1f} ms over {len(cold_times)} runs")
+    print(f"server ready  : {ready_time * 1000:9.1f} ms after launch")
+    print(f"warm server   : median {statistics.median(warm_times) * 1000:9.1f} ms, "
+          f"max {max(warm_times) * 1000:9.1f} ms over {len(warm_times)} requests")
+    print(f"speedup       : {statistics.median(cold_times) / statistics.median(warm_times):9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detector", default="paddleocr_detector")
+    parser.add_argument("--recognizer", default="mangaocr_recognizer")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--image", default=None, help="defaults to a generated synthetic page")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--warm-runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("mode", nargs="?", default="compare", choices=["compare", "cold"])
+    args = parser.parse_args()
+
+    cold(args) if args.mode == "cold" else compare(args)
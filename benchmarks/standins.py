@@ -0,0 +1,125 @@
+"""
+Deterministic stand-in engines, so the framework around the models can be benchmarked on a CPU-only box
+without downloading any weights.
+
+StandInPaddleOCR mimics the parts of paddleocr.PaddleOCR the plugins use (ocr, text_recognizer, text_classifier),
+which lets the real paddleocr_detector and paddleocr_recognizer code paths run on top of it. standin_recognizer is
+a plain Recognizer plugin that "recognizes" the size of each crop.
+"""
+
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Detectors.paddleocr_detector import paddleocr_detector
+from OPRDetectRecog.Recognizers.paddleocr_recognizer import paddleocr_recognizer
+import numpy
+
+
+class StandInTextRecognizer:
+    """
+    Callable like PaddleOCR's TextRecognizer, with the rec_batch_num attribute paddleocr_recognizer sets on it.
+    """
+
+    def __init__(self, recognize_lines, rec_batch_num: int = 6):
+        self._recognize_lines = recognize_lines
+        self.rec_batch_num = rec_batch_num
+
+    def __call__(self, crops: list[numpy.ndarray]) -> tuple[list[tuple[str, float]], float]:
+        return self._recognize_lines(crops)
+
+
+
+class StandInPaddleOCR:
+    """
+    Returns a fixed, seeded layout of text boxes for any frame, one row every row_height pixels, with every
+    rotate_every-th box tilted by a few degrees so both crop paths are exercised.
+    """
+
+    def __init__(self, row_height: int = 40, box_width: int = 220, rotate_every: int = 5, seed: int = 0):
+        self._row_height = row_height
+        self._box_width = box_width
+        self._rotate_every = rotate_every
+        self._seed = seed
+        self.text_recognizer = StandInTextRecognizer(self.recognize_lines)
+        self.text_classifier = self.classify_lines
+
+    def layout(self, height: int, width: int) -> numpy.ndarray:
+        rng = numpy.random.default_rng(self._seed)
+
+        box_height = self._row_height * 0.6
+        columns = max(1, (width - 20) // (self._box_width + 20))
+        rows = max(1, (height - 20) // self._row_height)
+
+        col, row = numpy.meshgrid(numpy.arange(columns), numpy.arange(rows))
+        x0 = 10 + col.ravel() * (self._box_width + 20) + rng.uniform(0, 5, col.size)
+        y0 = 10 + row.ravel() * self._row_height + rng.uniform(0, 5, col.size)
+
+        angles = numpy.zeros(col.size)
+        if self._rotate_every:
+            angles[::self._rotate_every] = rng.uniform(-8, 8, angles[::self._rotate_every].size)
+
+        corners = numpy.array([[0, 0], [self._box_width, 0], [self._box_width, box_height], [0, box_height]])
+        radians = numpy.radians(angles)
+        cos, sin = numpy.cos(radians)[:, None], numpy.sin(radians)[:, None]
+
+        xs = x0[:, None] + corners[:, 0] * cos - corners[:, 1] * sin
+        ys = y0[:, None] + corners[:, 0] * sin + corners[:, 1] * cos
+
+        boxes = numpy.stack([xs, ys], axis=2)
+        inside = (boxes[:, :, 0].max(axis=1) < width - 6) & (boxes[:, :, 1].max(axis=1) < height - 6) & (boxes.min(axis=(1, 2)) > 6)
+        return boxes[inside]
+
+    def ocr(self, img, det: bool = True, rec: bool = True, cls: bool = True, **kwargs) -> list:
+        img = numpy.asarray(img)
+
+        if det:
+            boxes = self.layout(*img.shape[:2])
+            if len(boxes) == 0:
+                return [None]
+            return [boxes.tolist()]
+
+        return [self.recognize_lines([img])[0]]
+
+    def recognize_lines(self, crops: list[numpy.ndarray]) -> tuple[list[tuple[str, float]], float]:
+        return [(f"{crop.shape[1]}x{crop.shape[0]}", 1.0) for crop in crops], 0.0
+
+    def classify_lines(self, crops: list[numpy.ndarray]) -> tuple[list[numpy.ndarray], list, float]:
+        return crops, [("0", 1.0)] * len(crops), 0.0
+
+
+
+class standin_recognizer(Recognizer):
+
+    def __init__(self, language=None, tolerance = None, path = None, max_batch_size = None):
+        super().__init__(language, tolerance, path, max_batch_size)
+
+        self._name = 'standin_recognizer'
+        self._input_format = 'numpy'
+
+    def get_supported_languages(self, as_dict = False):
+        langs = {"any": "any"}
+        return langs if as_dict else list(langs.keys())
+
+    def initialize(self, language = None, tolerance = None, path = None, execution = None) -> bool:
+        return True
+
+    def recognize(self, frame, bbox) -> list[LinguistResult]:
+        fr = numpy.asarray(frame)
+        return [LinguistResult(bbox, f"{fr.shape[1]}x{fr.shape[0]}", None, 1.0)]
+
+
+def standin_detector(**layout) -> paddleocr_detector:
+    """
+    The real paddleocr_detector plugin running on a StandInPaddleOCR engine.
+    """
+    detector = paddleocr_detector()
+    detector._detector = StandInPaddleOCR(**layout)
+    return detector
+
+
+def standin_paddleocr_recognizer(max_batch_size: int = None) -> paddleocr_recognizer:
+    """
+    The real paddleocr_recognizer plugin running on a StandInPaddleOCR engine.
+    """
+    recognizer = paddleocr_recognizer(max_batch_size=max_batch_size)
+    recognizer._recognizor = StandInPaddleOCR()
+    return recognizer
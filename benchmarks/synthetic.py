@@ -0,0 +1,26 @@
+from PIL import Image, ImageDraw, ImageFont
+import random
+
+
+def make_text_image(width: int = 1200, height: int = 1600, lines: int = 40, seed: int = 0) -> Image.Image:
+    """
+    Draws a page of random ASCII text lines with PIL's built-in font, so benchmarks need no network or assets.
+
+    The same seed always produces the same image.
+    """
+
+    rng = random.Random(seed)
+    img = Image.new("RGBA", (width, height), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    row_height = max(1, height // max(lines, 1))
+
+    for row in range(lines):
+        text = " ".join("".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))) for _ in range(rng.randint(2, 6)))
+        x = rng.randint(10, max(10, width // 4))
+        y = row * row_height + rng.randint(0, max(0, row_height // 4))
+        draw.text((x, y), text, fill=(0, 0, 0, 255), font=font)
+
+    return img
@@ -1,9 +1,15 @@
 from OPRDetectRecog import OPRDetectRecog
+import sys
 
 if __name__ == "__main__":
 
+    # python main.py batch ... runs without prompts, see OPRDetectRecog/Batch.py
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from OPRDetectRecog import Batch
+        Batch.main(sys.argv[2:])
 
-    OPRDetectRecog.main()
+    else:
+        OPRDetectRecog.main()
 
 
-    
\ No newline at end of file
+    
@@ -13,6 +13,7 @@ setup(
         "paddleocr",
         "paddlepaddle",
         "manga-ocr",
+        "onnxruntime",
         "OperaPowerRelay @ git+https://github.com/OperavonderVollmer/OperaPowerRelay@main"
     ],
     python_requires=">=3.7",
@@ -0,0 +1,98 @@
+"""
+Deterministic stand-ins shared by the tests: a detector that boxes every dark blob of a frame, a recognizer that
+numbers its readings, and helpers that draw blobs and text lines, so the expected results are known exactly.
+"""
+
+from OPRDetectRecog.Interfaces.Detector import Detector
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox, QuadBoxArray
+from OPRDetectRecog.Custom.CropEngine import CroppedBox
+from OPRDetectRecog.Custom.Frame import as_frame
+import numpy
+import cv2
+
+
+class blob_detector(Detector):
+    """
+    Boxes every 8-connected dark region as an axis-aligned QuadBox with no padding, and remembers the shape of
+    every frame it was given.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._name = "blob_detector"
+        self.calls = []
+
+    def get_supported_languages(self, as_dict: bool = False):
+        return {"any": "any"} if as_dict else ["any"]
+
+    def detect(self, frame) -> QuadBoxArray:
+        pixels = as_frame(frame).get("GRAY")
+        self.calls.append(pixels.shape)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats((pixels < 128).astype(numpy.uint8), connectivity=8)
+        rects = stats[1:count, :4].astype(numpy.float32)
+
+        x0, y0 = rects[:, 0], rects[:, 1]
+        x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+        points = numpy.stack([numpy.stack([x0, y0], 1), numpy.stack([x1, y0], 1), numpy.stack([x1, y1], 1), numpy.stack([x0, y1], 1)], axis=1)
+
+        return QuadBoxArray(points.reshape(-1, 4, 2), padding=0)
+
+    def detect_and_crop(self, frame) -> list[CroppedBox]:
+        fr = as_frame(frame)
+        return self.crop_boxes(fr, self.detect(fr))
+
+
+class reading_recognizer(Recognizer):
+    """
+    Reads every crop it is sent as "read <n>", so reused results show up as older readings.
+    """
+
+    def __init__(self):
+        super().__init__(max_batch_size=8)
+        self._name = "reading_recognizer"
+        self._input_format = "numpy"
+        self.reads = 0
+
+    def get_supported_languages(self, as_dict: bool = False):
+        return {"any": "any"} if as_dict else ["any"]
+
+    def recognize(self, frame, bbox) -> list[LinguistResult]:
+        return self.recognize_batch([frame], [bbox])[0]
+
+    def recognize_batch(self, frames, bboxes) -> list[list[LinguistResult]]:
+        results = []
+        for bbox in bboxes:
+            results.append([LinguistResult(bbox, f"read {self.reads}", None, 1.0)])
+            self.reads += 1
+        return results
+
+
+def blank(height: int, width: int) -> numpy.ndarray:
+    return numpy.full((height, width, 3), 255, dtype=numpy.uint8)
+
+
+def fill(frame: numpy.ndarray, x0: int, y0: int, x1: int, y1: int, value: int = 0) -> numpy.ndarray:
+    frame[y0:y1, x0:x1] = value
+    return frame
+
+
+def write(frame: numpy.ndarray, text: str, x: int, y: int, scale: float = 0.8) -> numpy.ndarray:
+    """
+    Draws text with its baseline at (x, y), black on the frame.
+    """
+    cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 2, cv2.LINE_AA)
+    return frame
+
+
+def rect(x0: float, y0: float, x1: float, y1: float) -> QuadBox:
+    return QuadBox([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], padding=0)
+
+
+def bounds(boxes) -> list[tuple[int, ...]]:
+    """
+    The boxes' (x0, y0, x1, y1) bounds, rounded and sorted, for order-free comparisons.
+    """
+    return sorted(tuple(int(round(v)) for v in row) for row in numpy.asarray(boxes.Bounds))
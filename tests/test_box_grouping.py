@@ -0,0 +1,146 @@
+"""
+group_boxes and GroupingDetector on hand-placed fragments, so which boxes belong together is known exactly.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.BoxGrouping import connected_components, group_boxes
+from OPRDetectRecog.GroupingDetector import GroupingDetector
+from fakes import blank, blob_detector, bounds, fill
+
+
+def boxes(*rects) -> QuadBoxArray:
+    points = [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)] for x0, y0, x1, y1 in rects]
+    return QuadBoxArray(numpy.array(points, dtype=numpy.float32).reshape(-1, 4, 2), padding=0)
+
+
+def rotated(rects, degrees: float) -> QuadBoxArray:
+    """
+    The rectangles rotated by degrees around the origin, as tilted boxes along a tilted line.
+    """
+    theta = numpy.radians(degrees)
+    turn = numpy.array([[numpy.cos(theta), -numpy.sin(theta)], [numpy.sin(theta), numpy.cos(theta)]])
+    points = boxes(*rects).Points.astype(numpy.float64) @ turn.T
+    return QuadBoxArray(points.astype(numpy.float32), padding=0)
+
+
+def members(groups) -> list[list[int]]:
+    return [m.tolist() for m in groups.Members]
+
+
+def test_connected_components_follow_chains():
+    labels = connected_components(6, numpy.array([4, 1, 3]), numpy.array([5, 2, 4]))
+    assert labels.tolist() == [0, 1, 1, 3, 3, 3]
+
+
+def test_fragments_on_a_baseline_become_one_line():
+    layout = boxes(
+        (130, 10, 200, 30),    # first line, third word
+        (10, 50, 80, 70),      # second line
+        (10, 10, 60, 30),      # first line, first word
+        (70, 12, 120, 31),     # first line, second word, slightly lower
+    )
+
+    groups = group_boxes(layout)
+
+    assert bounds(groups.Boxes) == [(10, 10, 200, 31), (10, 50, 80, 70)]
+    assert members(groups) == [[2, 3, 0], [1]]
+    assert groups.GroupOf.tolist() == [0, 1, 0, 0]
+    assert bounds(groups.members_of(0)) == bounds(layout[[0, 2, 3]])
+
+
+def test_wide_gaps_and_mismatched_heights_stay_apart():
+    layout = boxes(
+        (10, 10, 60, 30),
+        (100, 10, 150, 30),    # gap of 40 against a height of 20
+        (300, 10, 350, 30),
+        (355, 0, 420, 60),     # close, but three times as tall
+    )
+
+    groups = group_boxes(layout)
+
+    assert members(groups) == [[0], [1], [2], [3]]
+
+
+def test_block_mode_stacks_close_lines_and_reads_them_in_order():
+    layout = boxes(
+        (10, 40, 90, 60),      # second line of the bubble
+        (100, 10, 160, 30),    # first line, second word
+        (10, 10, 90, 30),      # first line, first word
+        (10, 200, 90, 220),    # a caption far below
+    )
+
+    lines = group_boxes(layout, "line")
+    blocks = group_boxes(layout, "block")
+
+    assert members(lines) == [[2, 1], [0], [3]]
+    assert bounds(blocks.Boxes) == [(10, 10, 160, 60), (10, 200, 90, 220)]
+    assert members(blocks) == [[2, 1, 0], [3]]
+
+
+def test_vertical_columns_read_top_to_bottom_and_right_to_left():
+    layout = boxes(
+        (100, 10, 120, 60),    # right column, top
+        (70, 70, 90, 130),     # left column, bottom
+        (100, 68, 120, 120),   # right column, bottom
+        (70, 10, 90, 60),      # left column, top
+    )
+
+    lines = group_boxes(layout, "line")
+    blocks = group_boxes(layout, "block")
+
+    assert members(lines) == [[0, 2], [3, 1]]
+    assert members(blocks) == [[0, 2, 3, 1]]
+
+
+def test_rotated_fragments_merge_along_their_line():
+    layout = rotated([(10, 10, 60, 30), (70, 10, 130, 30), (140, 10, 200, 30)], 20)
+
+    groups = group_boxes(layout)
+
+    assert members(groups) == [[0, 1, 2]]
+    assert groups.Boxes.Angles[0] == pytest.approx(20, abs=0.01)
+
+    # the merged box is the rotated rectangle around them, not an axis-aligned one grown by the tilt
+    expected = rotated([(10, 10, 200, 30)], 20).Points[0]
+    numpy.testing.assert_allclose(groups.Boxes.Points[0], expected, atol=0.01)
+
+
+def test_tilts_beyond_max_angle_stay_apart():
+    layout = QuadBoxArray.concatenate([rotated([(10, 10, 60, 30)], 0), rotated([(65, 10, 115, 30)], 15)])
+    assert len(group_boxes(layout)) == 2
+
+
+def test_empty_input_and_invalid_mode():
+    empty = boxes()
+    assert len(group_boxes(empty)) == 0
+
+    with pytest.raises(ValueError):
+        group_boxes(boxes((0, 0, 10, 10)), "paragraph")
+
+
+def test_grouping_detector_maps_merged_boxes_to_detections():
+    frame = blank(200, 400)
+    fill(frame, 20, 20, 80, 40)
+    fill(frame, 90, 20, 160, 40)
+    fill(frame, 20, 120, 200, 140)
+
+    inner = blob_detector()
+    detector = GroupingDetector(inner)
+    groups = detector.detect_groups(frame)
+
+    assert bounds(groups.Boxes) == [(20, 20, 160, 40), (20, 120, 200, 140)]
+    assert bounds(groups.members_of(0)) == [(20, 20, 80, 40), (90, 20, 160, 40)]
+    assert bounds(groups.members_of(1)) == [(20, 120, 200, 140)]
+
+    # every detection points at the merged box it went into
+    for index, group in enumerate(groups.GroupOf.tolist()):
+        assert index in groups.Members[group].tolist()
+
+    assert bounds(detector.detect(frame)) == bounds(groups.Boxes)
+    assert detector.Detector is inner and detector.Mode == "line"
@@ -0,0 +1,119 @@
+"""
+BoxIndex, non_max_suppression and reading_order on small hand-placed layouts.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Custom.BoxIndex import BoxIndex, non_max_suppression, pairwise_iou, reading_order
+
+
+def boxes(*rects) -> QuadBoxArray:
+    points = [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)] for x0, y0, x1, y1 in rects]
+    return QuadBoxArray(numpy.array(points, dtype=numpy.float32).reshape(-1, 4, 2), padding=0)
+
+
+def pairs(i, j) -> set:
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def test_pairwise_iou():
+    a = numpy.array([[0, 0, 10, 10]], dtype=numpy.float32)
+    b = numpy.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=numpy.float32)
+
+    numpy.testing.assert_allclose(pairwise_iou(a, b), [[1.0, 50 / 150, 0.0]])
+
+
+def test_nms_keeps_the_higher_score():
+    layout = boxes((0, 0, 100, 20), (2, 0, 102, 20), (200, 0, 300, 20))
+
+    assert non_max_suppression(layout, numpy.array([0.9, 0.8, 0.5])).tolist() == [0, 2]
+    assert non_max_suppression(layout, numpy.array([0.7, 0.8, 0.5])).tolist() == [1, 2]
+
+
+def test_nms_scores_by_area_by_default():
+    layout = boxes((0, 0, 100, 20), (0, 0, 104, 21))
+    assert non_max_suppression(layout).tolist() == [1]
+
+
+def test_nms_only_suppressed_boxes_stop_suppressing():
+    # a overlaps b and b overlaps c, but a and c are apart: a removes b, so c survives
+    layout = boxes((0, 0, 100, 20), (30, 0, 130, 20), (60, 0, 160, 20))
+
+    assert non_max_suppression(layout, numpy.array([0.9, 0.8, 0.7]), iou_threshold=0.3).tolist() == [0, 2]
+
+
+def test_nms_below_the_threshold_keeps_everything():
+    layout = boxes((0, 0, 100, 20), (80, 0, 180, 20))
+    assert non_max_suppression(layout, numpy.array([0.9, 0.8])).tolist() == [0, 1]
+
+
+def test_horizontal_lines_read_top_to_bottom_left_to_right():
+    layout = boxes(
+        (300, 52, 400, 72),    # second line, right
+        (10, 12, 100, 32),     # first line, left
+        (10, 50, 100, 70),     # second line, left
+        (150, 10, 250, 30),    # first line, right, a little higher
+    )
+
+    assert reading_order(layout, "horizontal").tolist() == [1, 3, 2, 0]
+    assert reading_order(layout).tolist() == [1, 3, 2, 0]
+
+
+def test_vertical_columns_read_right_to_left_top_to_bottom():
+    layout = boxes(
+        (10, 10, 30, 110),     # left column, top
+        (60, 130, 80, 230),    # right column, bottom
+        (62, 10, 82, 110),     # right column, top
+        (10, 130, 30, 230),    # left column, bottom
+    )
+
+    assert reading_order(layout, "vertical").tolist() == [2, 1, 0, 3]
+    assert reading_order(layout).tolist() == [2, 1, 0, 3]
+
+
+def test_reading_order_rejects_unknown_directions():
+    with pytest.raises(ValueError):
+        reading_order(boxes((0, 0, 10, 10), (20, 0, 30, 10)), "diagonal")
+
+
+def test_candidate_pairs_at_cell_boundaries():
+    layout = boxes(
+        (0, 0, 9, 9),          # cell (0, 0)
+        (10, 0, 19, 9),        # cell (1, 0), no cell shared with the first
+        (5, 0, 15, 9),         # cells (0, 0) and (1, 0), meets both but is reported once each
+        (0, 20, 10, 29),       # ends exactly on x = 10, so it is entered in cells (0, 2) and (1, 2)
+        (10, 20, 19, 29),      # cell (1, 2), shares it with the box before but only touches its edge
+    )
+    index = BoxIndex(layout, cell_size=10)
+
+    assert pairs(*index.candidate_pairs()) == {(0, 2), (1, 2), (3, 4)}
+
+    i, j, _ = index.overlapping_pairs()
+    assert pairs(i, j) == {(0, 2), (1, 2)}
+
+
+def test_candidate_pairs_cover_every_overlap():
+    rng = numpy.random.default_rng(7)
+    origins = rng.uniform(0, 400, (200, 2))
+    sizes = rng.uniform(5, 60, (200, 2))
+    layout = boxes(*numpy.concatenate([origins, origins + sizes], axis=1).tolist())
+
+    index = BoxIndex(layout)
+    iou = pairwise_iou(index.Bounds, index.Bounds)
+    expected = {(i, j) for i, j in zip(*numpy.nonzero(numpy.triu(iou > 0, k=1)))}
+
+    i, j, _ = index.overlapping_pairs()
+    assert pairs(i, j) == expected
+    assert expected <= pairs(*index.candidate_pairs())
+
+
+def test_query_returns_overlapping_boxes():
+    layout = boxes((0, 0, 9, 9), (10, 0, 19, 9), (50, 50, 60, 60))
+    index = BoxIndex(layout, cell_size=10)
+
+    assert index.query((8, 2, 12, 4)).tolist() == [0, 1]
+    assert index.query((30, 30, 40, 40)).tolist() == []
@@ -0,0 +1,75 @@
+"""
+BoxTracker over crops cut from drawn HUD lines, with a recognizer that numbers its readings so reused text shows
+up as an older reading.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.BoxTracker import BoxTracker
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from fakes import blank, blob_detector, reading_recognizer, rect, write
+
+
+CROPPER = blob_detector()
+
+
+def crops(text: str, x: int = 40, y: int = 40, width: int = 260, extra: list = ()) -> list:
+    frame = write(blank(240, 480), text, x + 6, y + 28)
+    boxes = QuadBoxArray.from_boxes([rect(x, y, x + width, y + 40), *extra])
+    return CROPPER.crop_boxes(frame, boxes)
+
+
+def texts(tracks) -> list[str]:
+    return [track.Results[0].Original for track in tracks]
+
+
+def test_unchanged_text_is_reused():
+    tracker = BoxTracker(reading_recognizer())
+
+    first = tracker.update(crops("Gold: 1,234,567"))
+    second = tracker.update(crops("Gold: 1,234,567"))
+
+    assert texts(first) == texts(second) == ["read 0"]
+    assert second[0].Reused and second[0].TrackId == first[0].TrackId
+    assert (tracker.Recognized, tracker.Reused) == (1, 1)
+
+
+@pytest.mark.parametrize("before, after", [("Gold: 1,234,567", "Gold: 1,234,561"), ("HP 98/100", "HP 99/100"), ("Hello", "Hallo")])
+def test_one_changed_character_is_recognized_again(before, after):
+    tracker = BoxTracker(reading_recognizer())
+
+    first = tracker.update(crops(before))
+    second = tracker.update(crops(after))
+
+    assert texts(second) == ["read 1"]
+    assert not second[0].Reused
+
+    # same place, new text: the track keeps its id
+    assert second[0].TrackId == first[0].TrackId
+
+
+def test_a_moved_box_keeps_its_text():
+    tracker = BoxTracker(reading_recognizer())
+
+    first = tracker.update(crops("HP 98/100", x=40, y=40))
+    moved = tracker.update(crops("HP 98/100", x=48, y=44))
+
+    assert texts(moved) == ["read 0"]
+    assert moved[0].Reused and moved[0].TrackId == first[0].TrackId
+    assert moved[0].Results[0].QuadBox.Points == moved[0].QuadBox.Points
+
+
+def test_empty_crops_do_not_crash_update():
+    tracker = BoxTracker(reading_recognizer())
+    empty = rect(300, 200, 300, 200)
+
+    first = tracker.update(crops("HP 98/100", extra=[empty]))
+    second = tracker.update(crops("HP 98/100", extra=[empty]))
+
+    assert first[1].QuadBox.Width == 0
+    assert texts(second) == ["read 0", "read 1"]
+    assert second[1].Reused
@@ -0,0 +1,101 @@
+"""
+IncrementalDetector on top of the blob detector, whose recorded call shapes show how much of each frame was
+actually detected.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.IncrementalDetector import IncrementalDetector
+from fakes import blank, blob_detector, bounds, fill
+
+
+def screen() -> numpy.ndarray:
+    frame = blank(320, 640)
+    fill(frame, 40, 40, 200, 60)
+    fill(frame, 400, 240, 600, 260)
+    return frame
+
+
+def test_first_frame_is_detected_in_full_and_a_repeat_is_skipped():
+    inner = blob_detector()
+    detector = IncrementalDetector(inner)
+
+    first = detector.detect(screen())
+    second = detector.detect(screen())
+
+    assert bounds(first) == bounds(second) == [(40, 40, 200, 60), (400, 240, 600, 260)]
+    assert inner.calls == [(320, 640)]
+    assert (detector.FullDetections, detector.PartialDetections, detector.SkippedDetections) == (1, 0, 1)
+    assert detector.DirtyRatio == 0.0
+
+
+def test_a_small_change_detects_only_its_region():
+    inner = blob_detector()
+    detector = IncrementalDetector(inner)
+    detector.detect(screen())
+
+    changed = fill(screen(), 420, 40, 500, 56)
+    boxes = detector.detect(changed)
+
+    assert bounds(boxes) == [(40, 40, 200, 60), (400, 240, 600, 260), (420, 40, 500, 56)]
+    assert detector.PartialDetections == 1
+
+    # the changed block grown by the margin, far less than the frame
+    height, width = inner.calls[-1]
+    assert height < 320 and width < 640
+
+
+def test_boxes_inside_a_redetected_region_are_replaced():
+    detector = IncrementalDetector(blob_detector())
+    detector.detect(screen())
+
+    # the short top line moves down a little, the old box must not survive next to the new one
+    moved = fill(fill(screen(), 40, 40, 200, 60, 255), 40, 70, 200, 90)
+    boxes = detector.detect(moved)
+
+    assert bounds(boxes) == [(40, 70, 200, 90), (400, 240, 600, 260)]
+
+
+def test_a_line_reaching_into_a_change_is_redetected_whole():
+    inner = blob_detector()
+    detector = IncrementalDetector(inner)
+
+    frame = blank(320, 640)
+    fill(frame, 20, 150, 600, 170)
+    detector.detect(frame)
+
+    # only the end of the long line changes, the region must grow to the whole line so it isn't cut
+    fill(frame, 600, 150, 620, 170)
+    boxes = detector.detect(frame)
+
+    assert bounds(boxes) == [(20, 150, 620, 170)]
+    assert inner.calls[-1][1] >= 600
+
+
+def test_a_mostly_changed_frame_falls_back_to_full_detection():
+    inner = blob_detector()
+    detector = IncrementalDetector(inner)
+    detector.detect(screen())
+
+    inverted = 255 - screen()
+    boxes = detector.detect(inverted)
+
+    assert detector.FullDetections == 2
+    assert inner.calls[-1] == (320, 640)
+    assert len(boxes) == 1
+
+
+def test_reset_and_a_new_size_detect_in_full():
+    inner = blob_detector()
+    detector = IncrementalDetector(inner)
+
+    detector.detect(screen())
+    detector.reset()
+    detector.detect(screen())
+    detector.detect(blank(100, 100))
+
+    assert inner.calls == [(320, 640), (320, 640), (100, 100)]
@@ -0,0 +1,191 @@
+"""
+The onnxruntime plugins run end to end on tiny graphs built here with onnx.helper, so no exported model has to be
+downloaded: an Identity graph stands in for the DB detector, whose output is then just its normalized input, and
+a graph that always emits the same logits stands in for the CRNN recognizer.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from onnx import TensorProto, helper
+from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.Detectors.onnx_db_detector import MEAN, STD, onnx_db_detector
+from OPRDetectRecog.Recognizers.onnx_crnn_recognizer import onnx_crnn_recognizer
+
+
+CHARACTERS = ["a", "b", "c"]
+
+# class 0 is the CTC blank and the last one the space
+BLANK, A, B, C, SPACE = range(5)
+
+
+def save_model(graph, path) -> str:
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def identity_model(path) -> str:
+    graph = helper.make_graph(
+        [helper.make_node("Identity", ["x"], ["y"])],
+        "identity",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3, "height", "width"])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 3, "height", "width"])],
+    )
+    return save_model(graph, path)
+
+
+def logits_model(path, logits: numpy.ndarray) -> str:
+    # the input only takes part as 0 * its mean, so the graph has a real dependency on it but always emits logits
+    nodes = [
+        helper.make_node("ReduceMean", ["x"], ["mean"], keepdims=0),
+        helper.make_node("Mul", ["mean", "zero"], ["nothing"]),
+        helper.make_node("Add", ["logits", "nothing"], ["y"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "fixed_logits",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", 3, 48, "width"])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, list(logits.shape))],
+        initializer=[
+            helper.make_tensor("logits", TensorProto.FLOAT, logits.shape, logits.ravel().tolist()),
+            helper.make_tensor("zero", TensorProto.FLOAT, [], [0.0]),
+        ],
+    )
+    return save_model(graph, path)
+
+
+def one_hot(sequences: list[list[int]], classes: int = 5) -> numpy.ndarray:
+    logits = numpy.zeros((len(sequences), len(sequences[0]), classes), dtype=numpy.float32)
+    for n, sequence in enumerate(sequences):
+        logits[n, numpy.arange(len(sequence)), sequence] = 10.0
+    return logits
+
+
+def frame_for(probability: numpy.ndarray) -> numpy.ndarray:
+    """
+    An RGB frame whose normalized blue channel, the first one the BGR model sees, is probability.
+    """
+
+    frame = numpy.zeros((*probability.shape, 3), dtype=numpy.uint8)
+    frame[..., 2] = numpy.round((probability * STD[0] + MEAN[0]) * 255)
+    return frame
+
+
+def recognizer_for(tmp_path, logits: numpy.ndarray) -> onnx_crnn_recognizer:
+    (tmp_path / "dict.txt").write_text("\n".join(CHARACTERS) + "\n", encoding="utf-8")
+    logits_model(tmp_path / "rec.onnx", logits)
+
+    recognizer = onnx_crnn_recognizer()
+    assert recognizer.initialize(None, path=str(tmp_path))
+    return recognizer
+
+
+def test_detect_boxes_a_text_region(tmp_path):
+    detector = onnx_db_detector()
+    assert detector.initialize(None, path=identity_model(tmp_path / "det.onnx"))
+
+    probability = numpy.zeros((160, 320), dtype=numpy.float32)
+    probability[40:61, 50:251] = 1.0
+
+    boxes = detector.detect(frame_for(probability))
+
+    assert len(boxes) == 1
+
+    # the 200x20 kernel is unclipped by 200 * 20 * 1.5 / 440 on every side, then padded by 5
+    grow = 200 * 20 * 1.5 / 440 + 5
+    x0, y0, x1, y1 = boxes.Bounds[0]
+    assert x0 == pytest.approx(50 - grow, abs=1.5)
+    assert x1 == pytest.approx(250 + grow, abs=1.5)
+    assert y0 == pytest.approx(40 - grow, abs=1.5)
+    assert y1 == pytest.approx(60 + grow, abs=1.5)
+
+
+def test_detect_drops_faint_and_empty_maps(tmp_path):
+    detector = onnx_db_detector()
+    assert detector.initialize(None, path=identity_model(tmp_path / "det.onnx"))
+
+    assert len(detector.detect(frame_for(numpy.zeros((96, 96), dtype=numpy.float32)))) == 0
+
+    # above thresh, so a region, but below box_thresh on average
+    faint = numpy.zeros((96, 96), dtype=numpy.float32)
+    faint[30:60, 20:80] = 0.4
+    assert len(detector.detect(frame_for(faint))) == 0
+
+
+def test_decode_collapses_repeats_and_drops_blanks(tmp_path):
+    recognizer = recognizer_for(tmp_path, one_hot([[A] * 8]))
+
+    sequences = [
+        # repeats collapse, a blank between two equal characters keeps both, trailing blanks are padding
+        [A, A, BLANK, A, B, B, C, BLANK, BLANK, BLANK],
+        [C, SPACE, SPACE, A, BLANK, BLANK, BLANK, BLANK, BLANK, BLANK],
+        [BLANK] * 10,
+    ]
+    texts, scores = recognizer.decode(one_hot(sequences))
+
+    assert texts == ["aabc", "c a", ""]
+
+    confidence = numpy.exp(10.0) / (numpy.exp(10.0) + 4)
+    assert scores[0] == pytest.approx(confidence, rel=1e-5)
+    assert scores[1] == pytest.approx(confidence, rel=1e-5)
+    assert scores[2] == 0.0
+
+
+def test_decode_takes_probabilities_as_they_are(tmp_path):
+    recognizer = recognizer_for(tmp_path, one_hot([[A] * 8]))
+
+    probabilities = numpy.full((1, 3, 5), 0.1, dtype=numpy.float32)
+    probabilities[0, [0, 1, 2], [B, BLANK, C]] = [0.6, 0.6, 0.8]
+
+    texts, scores = recognizer.decode(probabilities)
+
+    assert texts == ["bc"]
+    assert scores[0] == pytest.approx(0.7)
+
+
+def test_recognize_batch_runs_the_session(tmp_path):
+    recognizer = recognizer_for(tmp_path, one_hot([[BLANK, B, B, BLANK, A, SPACE, BLANK, BLANK]]))
+
+    crop = numpy.full((24, 96, 3), 255, dtype=numpy.uint8)
+    box = QuadBox([(0, 0), (96, 0), (96, 24), (0, 24)], padding=0)
+    results = recognizer.recognize_batch([crop], [box])
+
+    assert len(results) == 1
+    assert [result.Original for result in results[0]] == ["ba"]
+
+
+def test_recognize_batch_skips_empty_crops(tmp_path):
+    recognizer = recognizer_for(tmp_path, one_hot([[BLANK, B, B, BLANK, A, SPACE, BLANK, BLANK]]))
+
+    crop = numpy.full((24, 96, 3), 255, dtype=numpy.uint8)
+    empty = numpy.empty((0, 0, 3), dtype=numpy.uint8)
+    box = QuadBox([(0, 0), (96, 0), (96, 24), (0, 24)], padding=0)
+
+    # only the one real crop reaches the model, which emits a single line
+    results = recognizer.recognize_batch([empty, crop, empty], [box] * 3)
+    assert [[result.Original for result in line] for line in results] == [[], ["ba"], []]
+
+    assert recognizer.recognize_batch([empty, empty], [box] * 2) == [[], []]
+
+
+def test_pack_zeroes_the_padding(tmp_path):
+    recognizer = recognizer_for(tmp_path, one_hot([[A] * 8]))
+
+    wide = numpy.full((48, 192, 3), 255, dtype=numpy.uint8)
+    narrow = numpy.full((48, 96, 3), 255, dtype=numpy.uint8)
+    batch = recognizer.pack([narrow, wide], 4.0)
+
+    assert batch.shape == (2, 3, 48, 192)
+    assert numpy.all(batch[0, :, :, :96] == 1.0)
+    assert numpy.all(batch[0, :, :, 96:] == 0.0)
+    assert numpy.all(batch[1] == 1.0)
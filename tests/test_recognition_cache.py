@@ -0,0 +1,134 @@
+"""
+CachedRecognizer in front of a fake recognizer that reads every crop it is sent as "read <n>", so a cache hit
+shows up as an older reading coming back and a miss as a new one.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.Interfaces.Recognizer import Recognizer
+from OPRDetectRecog.Custom.LinguistResult import LinguistResult
+from OPRDetectRecog.Custom.Quadbox import QuadBox
+from OPRDetectRecog.RecognitionCache import CachedRecognizer
+
+
+class reading_recognizer(Recognizer):
+
+    def __init__(self):
+        super().__init__(max_batch_size=8)
+        self._name = "reading_recognizer"
+        self._input_format = "numpy"
+        self.reads = 0
+
+    def get_supported_languages(self, as_dict: bool = False):
+        return {"any": "any"} if as_dict else ["any"]
+
+    def recognize(self, frame, bbox) -> list[LinguistResult]:
+        return self.recognize_batch([frame], [bbox])[0]
+
+    def recognize_batch(self, frames, bboxes) -> list[list[LinguistResult]]:
+        results = []
+        for bbox in bboxes:
+            results.append([LinguistResult(bbox, f"read {self.reads}", None, 1.0)])
+            self.reads += 1
+        return results
+
+
+def box(x: float = 0, y: float = 0, width: float = 100, height: float = 30) -> QuadBox:
+    return QuadBox([(x, y), (x + width, y), (x + width, y + height), (x, y + height)], padding=0)
+
+
+def line(text: str, width: int = 120, height: int = 32) -> numpy.ndarray:
+    pixels = numpy.full((height, width, 3), 255, dtype=numpy.uint8)
+    # centred, like the text in a padded box
+    (text_width, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+    cv2.putText(pixels, text, ((width - text_width) // 2, height - 9), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2, cv2.LINE_AA)
+    return pixels
+
+
+def jpeg(pixels: numpy.ndarray, quality: int = 60) -> numpy.ndarray:
+    return cv2.imdecode(cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, quality])[1], cv2.IMREAD_COLOR)
+
+
+def read(cache: CachedRecognizer, pixels: numpy.ndarray, bbox: QuadBox = None) -> str:
+    return cache.recognize(pixels, bbox or box())[0].Original
+
+
+def test_exact_hit_is_rebound_to_the_new_box():
+    cache = CachedRecognizer(reading_recognizer())
+
+    first = cache.recognize(line("Hello"), box(0, 0))
+    second = cache.recognize(line("Hello"), box(50, 200))
+
+    assert first[0].Original == second[0].Original == "read 0"
+    assert second[0].QuadBox.Points == box(50, 200).Points
+    assert (cache.Hits, cache.Misses) == (1, 1)
+
+
+def test_batch_sends_only_the_misses():
+    recognizer = reading_recognizer()
+    cache = CachedRecognizer(recognizer)
+    read(cache, line("Hello"))
+
+    results = cache.recognize_batch([line("Hello"), line("World"), line("Hello")], [box()] * 3)
+
+    assert [r[0].Original for r in results] == ["read 0", "read 1", "read 0"]
+    assert recognizer.reads == 2
+
+
+def test_lru_evicts_by_bytes():
+    # every entry costs the overhead plus its 6 byte text
+    cache = CachedRecognizer(reading_recognizer(), max_bytes=2 * (CachedRecognizer.ENTRY_OVERHEAD + 6))
+
+    read(cache, line("one"))
+    read(cache, line("two"))
+    assert cache.Bytes == 2 * (CachedRecognizer.ENTRY_OVERHEAD + 6)
+
+    # touching "one" makes "two" the least recently used
+    assert read(cache, line("one")) == "read 0"
+    read(cache, line("three"))
+
+    assert cache.Evictions == 1
+    assert cache.Bytes <= 2 * (CachedRecognizer.ENTRY_OVERHEAD + 6)
+    assert read(cache, line("one")) == "read 0"
+    assert read(cache, line("two")) == "read 3"
+
+
+def test_perceptual_hits_through_compression_noise():
+    cache = CachedRecognizer(reading_recognizer(), perceptual=True)
+
+    assert read(cache, line("Gold: 1,234")) == "read 0"
+    assert read(cache, jpeg(line("Gold: 1,234"))) == "read 0"
+    assert cache.Hits == 1
+
+
+def test_perceptual_hits_a_neighbouring_size_bucket():
+    cache = CachedRecognizer(reading_recognizer(), perceptual=True)
+
+    # 127 and 130 pixels wide fall in the 15th and 16th 8 pixel bucket
+    assert read(cache, line("Hello", width=127)) == "read 0"
+    assert read(cache, line("Hello", width=130)) == "read 0"
+
+
+@pytest.mark.parametrize("first, second", [("Hello", "Jello"), ("Hello", "hello"), ("Hello", "Hallo"), ("HP 98/100", "HP 99/100")])
+def test_perceptual_misses_on_one_changed_character(first, second):
+    cache = CachedRecognizer(reading_recognizer(), perceptual=True)
+
+    assert read(cache, line(first)) == "read 0"
+    assert read(cache, line(second)) == "read 1"
+
+    # the newer reading replaces the older one under a shared key, both still answer for themselves
+    assert read(cache, line(second)) == "read 1"
+
+
+def test_empty_crops_do_not_reach_opencv():
+    for perceptual in (False, True):
+        cache = CachedRecognizer(reading_recognizer(), perceptual=perceptual)
+        empty = numpy.empty((0, 0, 3), dtype=numpy.uint8)
+
+        assert read(cache, empty) == "read 0"
+        assert read(cache, empty) == "read 0"
+        assert read(cache, line("Hello")) == "read 1"
@@ -0,0 +1,140 @@
+"""
+SharedRing attaching and SharedMemoryPipeline's slot bookkeeping. The pipeline's process pools are swapped for
+thread pools running the fake plugins, so the shared memory path runs in full but in one process.
+"""
+
+import multiprocessing
+import sys
+import time
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from OPRDetectRecog import SharedMemoryPipeline as shared_pipeline
+from OPRDetectRecog.Custom import SharedRing as shared_ring
+from OPRDetectRecog.Custom.SharedRing import SharedRing, attach
+from OPRDetectRecog.Custom.Quadbox import QuadBoxArray
+from OPRDetectRecog.Pipeline import _WORKER_PLUGINS
+from fakes import blank, blob_detector, bounds, fill, reading_recognizer
+
+
+before_313 = pytest.mark.skipif(sys.version_info >= (3, 13), reason="attaching untracked needs no resource tracker")
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing(2, 1024)
+    yield ring
+    segment = shared_ring._ATTACHED.pop(ring.Name, None)
+    if segment is not None:
+        segment.close()
+    ring.close()
+
+
+def test_attach_reads_the_written_frame(ring):
+    frame = numpy.arange(60, dtype=numpy.uint8).reshape(4, 5, 3)
+    view = attach(ring.write(frame))
+
+    numpy.testing.assert_array_equal(view, frame)
+    assert not view.flags.writeable
+    assert ring.FreeSlots == 1
+
+
+@before_313
+def test_attach_keeps_the_owners_tracker_registration(ring, monkeypatch):
+    unregistered = []
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: unregistered.append(name))
+
+    attach(ring.write(numpy.zeros(16, dtype=numpy.uint8)))
+
+    # the owner's tracker is this process's tracker, which must still hold the segment for the owner's unlink
+    assert unregistered == []
+
+
+def read_in_child(ref, connection) -> None:
+    unregistered = []
+    resource_tracker.unregister = lambda name, rtype: unregistered.append(name)
+    connection.send((int(attach(ref).sum()), unregistered))
+
+
+@before_313
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_a_forked_worker_leaves_the_segment_to_the_owner(ring):
+    ref = ring.write(numpy.full(16, 3, dtype=numpy.uint8))
+
+    receiver, sender = multiprocessing.get_context("fork").Pipe(duplex=False)
+    child = multiprocessing.get_context("fork").Process(target=read_in_child, args=(ref, sender))
+    child.start()
+    total, unregistered = receiver.recv()
+    child.join()
+
+    assert total == 48
+    assert unregistered == []
+
+    # the segment outlives the worker
+    segment = shared_memory.SharedMemory(name=ring.Name, create=False)
+    segment.close()
+
+
+def fake_pool(workers, initializer=None, initargs=()):
+    return ThreadPoolExecutor(workers)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(shared_pipeline, "ProcessPoolExecutor", fake_pool)
+    monkeypatch.setitem(_WORKER_PLUGINS, "detector", blob_detector())
+    monkeypatch.setitem(_WORKER_PLUGINS, "recognizer", reading_recognizer())
+
+    pipeline = shared_pipeline.SharedMemoryPipeline("blob", "reading", detect_queue_size=1, recognize_queue_size=1)
+    yield pipeline
+    pipeline.close()
+
+
+def page(index: int, height: int = 120, width: int = 200) -> numpy.ndarray:
+    return fill(blank(height, width), 10 + 10 * index, 20, 60 + 10 * index, 40)
+
+
+def wait_for_free_slots(ring: SharedRing, count: int, timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while ring.FreeSlots < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return ring.FreeSlots
+
+
+def bounds_of(results) -> list[tuple[int, ...]]:
+    return bounds(QuadBoxArray.from_boxes([result.QuadBox for result in results]))
+
+
+def test_frames_come_back_in_order_and_free_their_slots(pipeline):
+    results = list(pipeline.run(page(index) for index in range(8)))
+
+    assert [bounds_of(result) for result in results] == [[(10 + 10 * i, 20, 60 + 10 * i, 40)] for i in range(8)]
+    assert pipeline.Ring.SlotBytes == 2**20
+    assert wait_for_free_slots(pipeline.Ring, pipeline._slots) == pipeline._slots
+
+
+def test_stopping_early_releases_every_slot(pipeline):
+    # more frames than slots, so a leaked slot would leave the second run waiting for one forever
+    stream = pipeline.run(page(index % 8) for index in range(40))
+    next(stream)
+    stream.close()
+
+    assert wait_for_free_slots(pipeline.Ring, pipeline._slots) == pipeline._slots
+
+    results = list(pipeline.run(page(index % 8) for index in range(20)))
+    assert len(results) == 20
+
+
+def test_oversized_frames_take_the_pickling_path(pipeline):
+    # the ring is sized from the first frame, 1 MiB, and the second doesn't fit
+    large = fill(blank(700, 600), 100, 300, 400, 330)
+    results = list(pipeline.run([page(0), large, page(1)]))
+
+    assert [bounds_of(result) for result in results] == [[(10, 20, 60, 40)], [(100, 300, 400, 330)], [(20, 20, 70, 40)]]
+    assert large.nbytes > pipeline.Ring.SlotBytes
+    assert wait_for_free_slots(pipeline.Ring, pipeline._slots) == pipeline._slots
@@ -0,0 +1,73 @@
+"""
+TiledDetector over the blob detector with small tiles, 200 pixels with a 50 pixel overlap, so that lines placed
+across the seams are cut the way a real detector would cut them.
+"""
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("OperaPowerRelay")
+
+from OPRDetectRecog.TiledDetector import TiledDetector, tile_starts
+from fakes import blank, blob_detector, bounds, fill
+
+
+@pytest.fixture
+def tiled():
+    detector = TiledDetector(blob_detector(), tile_size=200, overlap=50)
+    yield detector
+    detector.close()
+
+
+def test_tiles_overlap_and_end_flush():
+    assert tile_starts(150, 200, 50) == [0]
+    assert tile_starts(350, 200, 50) == [0, 150]
+    assert tile_starts(500, 200, 50) == [0, 150, 300]
+
+
+def test_a_short_line_straddling_a_vertical_seam_is_kept_once(tiled):
+    # tiles span x 0-200 and 150-350, the left one only sees the line's first 20 pixels
+    frame = fill(blank(200, 350), 180, 50, 220, 70)
+
+    assert bounds(tiled.detect(frame)) == [(180, 50, 220, 70)]
+    assert tiled.Detectors[0].calls == [(200, 200), (200, 200)]
+
+
+@pytest.mark.parametrize("x0, x1", [(130, 220), (100, 300)])
+def test_a_line_longer_than_the_overlap_is_joined(tiled, x0, x1):
+    # 1.8 and 4 times the overlap: the short one still merges by containment, the long one only as seam pieces
+    frame = fill(blank(200, 350), x0, 50, x1, 70)
+
+    assert bounds(tiled.detect(frame)) == [(x0, 50, x1, 70)]
+
+
+def test_adjacent_lines_stay_separate(tiled):
+    frame = blank(200, 350)
+    # two long lines stacked close together, both cut by the seam
+    fill(frame, 100, 50, 300, 70)
+    fill(frame, 100, 72, 300, 92)
+    # two lines end to end with a small gap inside the overlap band
+    fill(frame, 20, 120, 175, 140)
+    fill(frame, 180, 120, 330, 140)
+
+    assert bounds(tiled.detect(frame)) == [(20, 120, 175, 140), (100, 50, 300, 70), (100, 72, 300, 92), (180, 120, 330, 140)]
+
+
+def test_a_tall_column_crossing_a_horizontal_seam_is_joined(tiled):
+    # tiles span y 0-200 and 150-350
+    frame = fill(blank(350, 200), 50, 100, 70, 300)
+
+    assert bounds(tiled.detect(frame)) == [(50, 100, 70, 300)]
+
+
+def test_a_frame_smaller_than_a_tile_is_detected_whole(tiled):
+    frame = fill(blank(120, 180), 10, 10, 90, 30)
+
+    assert bounds(tiled.detect(frame)) == [(10, 10, 90, 30)]
+    assert tiled.Detectors[0].calls == [(120, 180)]
+
+
+def test_invalid_tiling_is_rejected():
+    with pytest.raises(ValueError):
+        TiledDetector(blob_detector(), tile_size=200, overlap=200)